@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Generic, List
+from typing import Callable, Dict, Generic, List, Optional
 from problem import HeuristicFunction, Problem, S, A, Solution
+from search_tree import SearchTree
 
 # This is an abstract class for all goal based agents
 class GoalBasedAgent(ABC, Generic[S, A]):
@@ -21,18 +22,26 @@ class HumanAgent(GoalBasedAgent[S, A]):
     def act(self, problem: Problem[S, A], state: S) -> A:
         return self.user_input_fn(problem, state)
 
+# If a search tree is given, it is passed to the search function (as the "tree" keyword argument) so every search after the first one
+# reuses what the previous searches learned (see search_tree.py). This makes replanning after a deviation from the plan cheap.
+# Only UniformCostSearch and AStarSearch support it.
+
 # This agent applies an uninformed search algorithm to find the solution to goal for the given state
 class UninformedSearchAgent(GoalBasedAgent[S, A]):
-    def __init__(self, search_fn: Callable[[Problem[S, A], S], Solution]) -> None:
+    def __init__(self, search_fn: Callable[[Problem[S, A], S], Solution], tree: Optional[SearchTree] = None) -> None:
         super().__init__()
         self.search_fn = search_fn
+        self.tree = tree
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
         if state not in self.policy:
-            solution = self.search_fn(problem, state)
+            if self.tree is None:
+                solution = self.search_fn(problem, state)
+            else:
+                solution = self.search_fn(problem, state, tree=self.tree)
             # if no solution was found, we return None
             if solution is None:
                 self.policy[state] = None
@@ -46,17 +55,22 @@ class UninformedSearchAgent(GoalBasedAgent[S, A]):
 
 # This agent applies an informed search algorithm to find the solution to goal for the given state
 class InformedSearchAgent(GoalBasedAgent[S, A]):
-    def __init__(self, search_fn: Callable[[Problem[S, A], S, HeuristicFunction], Solution], heuristic: HeuristicFunction) -> None:
+    def __init__(self, search_fn: Callable[[Problem[S, A], S, HeuristicFunction], Solution], heuristic: HeuristicFunction,
+                 tree: Optional[SearchTree] = None) -> None:
         super().__init__()
         self.search_fn = search_fn
         self.heuristic = heuristic
+        self.tree = tree
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
         if state not in self.policy:
-            solution = self.search_fn(problem, state, self.heuristic)
+            if self.tree is None:
+                solution = self.search_fn(problem, state, self.heuristic)
+            else:
+                solution = self.search_fn(problem, state, self.heuristic, tree=self.tree)
             # if no solution was found, we return None
             if solution is None:
                 self.policy[state] = None
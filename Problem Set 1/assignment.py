@@ -0,0 +1,115 @@
+from typing import List, Sequence
+
+# This file implements the Hungarian algorithm (in its shortest augmenting path form) for the minimum cost assignment
+# between rows and columns, where the number of rows is at most the number of columns and every row is assigned to a column.
+# The algorithm keeps a potential for every row (u) and every column (v) such that:
+#   cost[i][j] - u[i] - v[j] >= 0 for every row 'i' and column 'j' (the reduced costs are non-negative)
+#   cost[i][j] - u[i] - v[j] == 0 if row 'i' is assigned to column 'j'
+# Every row is added by a single augmentation (a Dijkstra search over the reduced costs) which costs O(columns^2).
+# So, when only one row changes, the solution is repaired by removing this row and adding it back (O(columns^2))
+# instead of solving the whole problem again (O(rows * columns^2)).
+# A missing edge should be given a large finite cost (not infinity) so that the potentials stay finite.
+class Assignment:
+    def __init__(self, column_count: int) -> None:
+        self.column_count = column_count
+        # All the lists are 1-indexed (as in the classical formulation) and index 0 is a dummy row/column used during the augmentation
+        self.costs: List[Sequence[float]] = [()]
+        self.u: List[float] = [0.0]
+        self.v: List[float] = [0.0] * (column_count + 1)
+        self.row_of: List[int] = [0] * (column_count + 1)    # The row assigned to each column (0 if the column is free)
+
+    def __len__(self) -> int:
+        return len(self.costs) - 1
+
+    # Returns a copy that can be modified without changing this assignment (the cost rows are shared since they are never modified)
+    def copy(self) -> 'Assignment':
+        other = Assignment.__new__(Assignment)
+        other.column_count = self.column_count
+        other.costs = self.costs.copy()
+        other.u = self.u.copy()
+        other.v = self.v.copy()
+        other.row_of = self.row_of.copy()
+        return other
+
+    # Adds a row given the cost of assigning it to each column (0-indexed) and returns the (0-indexed) row index
+    def add_row(self, costs: Sequence[float]) -> int:
+        if len(self) >= self.column_count:
+            raise Exception("An assignment can not have more rows than columns")
+        self.costs.append((0.0, *costs))
+        self.u.append(0.0)
+        self._augment(len(self))
+        return len(self) - 1
+
+    # Changes the costs of the given (0-indexed) row and repairs the solution.
+    # The repair is exact when every column is assigned (rows == columns). Otherwise, a freed column may keep a potential
+    # that is not zero which breaks the optimality conditions, so the assignment is solved again from scratch.
+    def replace_row(self, row: int, costs: Sequence[float]) -> None:
+        row += 1
+        self.costs[row] = (0.0, *costs)
+        if len(self) < self.column_count:
+            rows = self.costs[1:]
+            self.costs, self.u = [()], [0.0]
+            self.v = [0.0] * (self.column_count + 1)
+            self.row_of = [0] * (self.column_count + 1)
+            for row_costs in rows:
+                self.costs.append(row_costs)
+                self.u.append(0.0)
+                self._augment(len(self))
+            return
+        # Removing a row keeps the reduced costs of the other rows non-negative and their assigned edges tight
+        self.row_of[self.row_of.index(row, 1)] = 0
+        self.u[row] = 0.0
+        self._augment(row)
+
+    # Returns the (0-indexed) column assigned to each row
+    def columns(self) -> List[int]:
+        columns = [0] * len(self)
+        for column in range(1, self.column_count + 1):
+            row = self.row_of[column]
+            if row:
+                columns[row - 1] = column - 1
+        return columns
+
+    # Returns the total cost of the assignment
+    def total(self) -> float:
+        costs = self.costs
+        return sum(costs[row][column] for column, row in enumerate(self.row_of) if column and row)
+
+    # Assigns the given (1-indexed) free row by finding the shortest augmenting path over the reduced costs
+    def _augment(self, row: int) -> None:
+        m, costs, u, v, row_of = self.column_count, self.costs, self.u, self.v, self.row_of
+        inf = float('inf')
+        row_of[0] = row
+        column = 0
+        min_reduced = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        way = [0] * (m + 1)
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            current_costs, current_u = costs[current_row], u[current_row]
+            delta, next_column = inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = current_costs[j] - current_u - v[j]
+                    if reduced < min_reduced[j]:
+                        min_reduced[j] = reduced
+                        way[j] = column
+                    if min_reduced[j] < delta:
+                        delta = min_reduced[j]
+                        next_column = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_reduced[j] -= delta
+            column = next_column
+            if row_of[column] == 0:
+                break
+        # Flip the assignments along the augmenting path
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+        row_of[0] = 0
@@ -0,0 +1,324 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import argparse, csv, fnmatch, glob, json, os, signal, subprocess, sys, time
+
+from problem import Problem
+from search_stats import SearchStatistics
+from portfolio import solution_cost
+from helpers.utils import load_function
+
+try:
+    import resource
+except ImportError: # The resource module is not available on Windows, so the peak memory is not reported there
+    resource = None
+
+# This file benchmarks the search algorithms of this problem set on the levels, the parks and the graphs.
+# Every combination of (instance, algorithm, heuristic) is a benchmark case. Each case runs in a fresh worker process
+# (so the caches of one case do not help another and the peak memory of the process belongs to this case only),
+# where the search is repeated several times (the problem is loaded again before every run so its cache starts empty).
+# The timed runs do not collect any search statistics (so their cost is not measured); the expanded and generated nodes
+# are collected by one more run with the statistics enabled.
+# For each case, it reports the median and the 90th percentile of the wall time, the number of expanded nodes,
+# the nodes per second (based on the median time) and the peak resident memory of the worker process.
+# The results can be appended to a history file (CSV or JSON lines, depending on the extension) and compared with a baseline:
+# a case regresses if its median time exceeds the baseline time by more than the threshold (a fraction) or if it expands
+# more nodes than in the baseline (the node counts are deterministic so any increase is reported).
+# The times of the very short cases are mostly noise, so their times are only compared if the baseline time is at least "min_time".
+# If any case regresses, the script exits with status 1.
+
+# The loaders and the heuristics of every domain (the heuristics are given by their dotted names so they can be loaded in the workers)
+@dataclass
+class Domain:
+    name: str
+    pattern: str
+    loader: Callable[[str], Problem]
+    heuristics: Dict[str, str]
+
+def _load_sokoban(path: str) -> Problem:
+    from sokoban import SokobanProblem
+    return SokobanProblem.from_file(path)
+
+def _load_parking(path: str) -> Problem:
+    from parking import ParkingProblem
+    return ParkingProblem.from_file(path)
+
+def _load_graph(path: str) -> Problem:
+    from graph import GraphRoutingProblem
+    return GraphRoutingProblem.from_file(path)
+
+DOMAINS: Dict[str, Domain] = {
+    "sokoban": Domain("sokoban", "levels/*.txt", _load_sokoban, {
+        "zero": "portfolio.zero_heuristic",
+        "weak": "sokoban_heuristic.weak_heuristic",
+        "strong": "sokoban_heuristic.strong_heuristic",
+    }),
+    "parking": Domain("parking", "parks/*.txt", _load_parking, {
+        "zero": "portfolio.zero_heuristic",
+        "distance": "parking_heuristic.parking_heuristic",
+    }),
+    "graph": Domain("graph", "graphs/*.json", _load_graph, {
+        "zero": "portfolio.zero_heuristic",
+        "euclidean": "graph.graphrouting_heuristic",
+    }),
+}
+
+# A search algorithm: its dotted name, whether it takes a heuristic, a function that creates its extra keyword arguments
+# for a problem (they are created again for every run so nothing is shared between the runs) and the domains it supports
+# (None means all the domains)
+@dataclass
+class Algorithm:
+    name: str
+    search: str
+    informed: bool
+    kwargs: Callable[[Problem], Dict[str, Any]] = lambda problem: {}
+    domains: Optional[Tuple[str, ...]] = None
+
+# The transposition table of IDA* is sized for the instance: about twice the number of states if it is known (the graphs)
+# and 2**16 slots otherwise. A new (empty) table is created for every run.
+def _transposition_table(problem: Problem) -> Dict[str, Any]:
+    from transposition import TranspositionTable
+    states = len(getattr(problem, "adjacency", ())) or 2**15
+    return {"table": TranspositionTable(1 << max(4, (2 * states - 1).bit_length()), "depth")}
+
+ALGORITHMS: Dict[str, Algorithm] = {algorithm.name: algorithm for algorithm in [
+    Algorithm("bfs", "search.BreadthFirstSearch", False),
+    Algorithm("dfs", "search.DepthFirstSearch", False),
+    Algorithm("ucs", "search.UniformCostSearch", False),
+    Algorithm("bucs", "search.BidirectionalUniformCostSearch", False, domains=("graph",)),
+    Algorithm("astar", "search.AStarSearch", True),
+    Algorithm("gbfs", "search.BestFirstSearch", True),
+    Algorithm("wastar", "search.WeightedAStarSearch", True, lambda problem: {"weight": 2.0}),
+    Algorithm("bastar", "search.BidirectionalAStar", True, domains=("graph",)),
+    Algorithm("idastar", "search.IterativeDeepeningAStar", True, _transposition_table),
+    Algorithm("ara", "search.AnytimeRepairingAStar", True),
+]}
+
+# One benchmark case (the heuristic is None for the uninformed algorithms)
+@dataclass
+class BenchmarkCase:
+    domain: str
+    instance: str
+    algorithm: str
+    heuristic: Optional[str]
+
+    @property
+    def key(self) -> str:
+        return f"{self.domain}/{os.path.basename(self.instance)}/{self.algorithm}/{self.heuristic or '-'}"
+
+# Returns the given percentile (a fraction between 0 and 1) of the values using linear interpolation between the closest ranks
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    position = fraction * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+# Returns the peak resident memory of this process in megabytes (or None if it can not be measured)
+def peak_rss() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+class _Timeout(Exception):
+    pass
+
+def _raise_timeout(*_):
+    raise _Timeout()
+
+# Runs one benchmark case (this function is executed in a worker process)
+def _run_case(case: BenchmarkCase, repeat: int, timeout: Optional[float]) -> Dict[str, Any]:
+    domain, algorithm = DOMAINS[case.domain], ALGORITHMS[case.algorithm]
+    search_fn = load_function(algorithm.search, use_local=True)
+    heuristic = None if case.heuristic is None else load_function(domain.heuristics[case.heuristic], use_local=True)
+    # The time limit uses an interval timer signal (if the platform supports it)
+    use_timer = timeout is not None and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+    times: List[float] = []
+    stats: Optional[SearchStatistics] = None
+    status, cost = "ok", None
+    # The last run (after the timed ones) only collects the statistics
+    for run in range(repeat + 1):
+        collect = run == repeat
+        problem = domain.loader(case.instance)
+        initial_state = problem.get_initial_state()
+        args = (problem, initial_state) if heuristic is None else (problem, initial_state, heuristic)
+        kwargs = algorithm.kwargs(problem)
+        if collect:
+            stats = kwargs["stats"] = SearchStatistics()
+        try:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            start = time.perf_counter()
+            solution = search_fn(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+        except _Timeout:
+            status, stats = "timeout", None
+            break
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        if collect:
+            break
+        times.append(elapsed)
+        cost = solution_cost(problem, initial_state, solution)
+        if solution is not None and cost is None:
+            status = "invalid"
+            break
+        if solution is None:
+            status = "unsolved"
+    median = percentile(times, 0.5) if times else None
+    return {
+        "case": case.key,
+        "domain": case.domain,
+        "instance": os.path.basename(case.instance),
+        "algorithm": case.algorithm,
+        "heuristic": case.heuristic or "-",
+        "status": status,
+        "runs": len(times),
+        "median_time": median,
+        "p90_time": percentile(times, 0.9) if times else None,
+        "min_time": min(times) if times else None,
+        "expanded": stats.expanded if stats is not None else None,
+        "generated": stats.generated if stats is not None else None,
+        "nodes_per_second": stats.expanded / median if stats is not None and median else None,
+        "cost": cost,
+        "peak_rss_mb": peak_rss(),
+    }
+
+# Returns all the benchmark cases that match the filters (None means no filter)
+def create_cases(domains: Optional[List[str]] = None, algorithms: Optional[List[str]] = None,
+                 heuristics: Optional[List[str]] = None, instances: Optional[str] = None) -> List[BenchmarkCase]:
+    cases = []
+    for domain in DOMAINS.values():
+        if domains is not None and domain.name not in domains:
+            continue
+        paths = sorted(glob.glob(domain.pattern))
+        if instances is not None:
+            paths = [path for path in paths if fnmatch.fnmatch(os.path.basename(path), instances)]
+        for path in paths:
+            for algorithm in ALGORITHMS.values():
+                if algorithms is not None and algorithm.name not in algorithms:
+                    continue
+                if algorithm.domains is not None and domain.name not in algorithm.domains:
+                    continue
+                if not algorithm.informed:
+                    cases.append(BenchmarkCase(domain.name, path, algorithm.name, None))
+                    continue
+                for heuristic in domain.heuristics:
+                    if heuristics is not None and heuristic not in heuristics:
+                        continue
+                    cases.append(BenchmarkCase(domain.name, path, algorithm.name, heuristic))
+    return cases
+
+# Runs the cases one after the other, each in a fresh worker process, and returns their results
+# (every case gets its own executor since "max_tasks_per_child" is only available in python 3.11+)
+def run_benchmarks(cases: List[BenchmarkCase], repeat: int = 3, timeout: Optional[float] = 60,
+                   on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    results = []
+    for case in cases:
+        with ProcessPoolExecutor(1) as executor:
+            result = executor.submit(_run_case, case, repeat, timeout).result()
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+# Returns the commit of the code (or None if it is not in a git repository)
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+# Appends the results to the history file (CSV if the file name ends with ".csv", otherwise JSON lines)
+def append_history(path: str, results: List[Dict[str, Any]], label: Optional[str] = None) -> None:
+    timestamp, commit = time.strftime("%Y-%m-%dT%H:%M:%S"), git_commit()
+    rows = [{"timestamp": timestamp, "commit": commit, "label": label, **result} for result in results]
+    if not rows:
+        return
+    if path.endswith(".csv"):
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        with open(path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            if not exists:
+                writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+# Saves the median times and the expanded nodes of the results as a baseline
+def save_baseline(path: str, results: List[Dict[str, Any]]) -> None:
+    baseline = {
+        result["case"]: {"median_time": result["median_time"], "expanded": result["expanded"]}
+        for result in results if result["status"] == "ok"
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+# Returns the messages describing the cases that regressed compared to the baseline
+def find_regressions(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float,
+                     min_time: float = 0.01) -> List[str]:
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["case"])
+        if reference is None:
+            continue
+        if result["status"] != "ok":
+            regressions.append(f"{result['case']}: {result['status']} (the baseline was solved)")
+            continue
+        reference_time = reference.get("median_time")
+        if reference_time is not None and reference_time >= min_time and result["median_time"] > reference_time * (1 + threshold):
+            regressions.append(f"{result['case']}: median time {result['median_time']:.4f}s > baseline {reference['median_time']:.4f}s "
+                               f"(+{result['median_time'] / reference['median_time'] - 1:.1%})")
+        if reference.get("expanded") is not None and result["expanded"] > reference["expanded"]:
+            regressions.append(f"{result['case']}: expanded {result['expanded']} nodes > baseline {reference['expanded']}")
+    return regressions
+
+def format_result(result: Dict[str, Any]) -> str:
+    def number(value: Optional[float], digits: int) -> str:
+        return "-" if value is None else f"{value:.{digits}f}"
+    return (f"{result['case']:<45} {result['status']:<8} median {number(result['median_time'], 4)}s "
+            f"p90 {number(result['p90_time'], 4)}s expanded {result['expanded'] if result['expanded'] is not None else '-'} "
+            f"nodes/s {number(result['nodes_per_second'], 0)} rss {number(result['peak_rss_mb'], 1)}MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms on the levels, parks and graphs")
+    parser.add_argument("--domains", "-d", nargs="+", choices=list(DOMAINS), default=None, help="the domains to benchmark (default: all)")
+    parser.add_argument("--algorithms", "-a", nargs="+", choices=list(ALGORITHMS), default=None, help="the algorithms to benchmark (default: all)")
+    parser.add_argument("--heuristics", "-hf", nargs="+", default=None, help="the heuristic names to benchmark (default: all)")
+    parser.add_argument("--instances", "-i", default=None, help="a file name pattern to select the instances (e.g. 'level[12].txt')")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="the number of runs of every case")
+    parser.add_argument("--timeout", "-t", type=float, default=60, help="the time limit of one run in seconds (0 for no limit)")
+    parser.add_argument("--history", "-o", default=None, help="append the results to this history file (.csv or JSON lines)")
+    parser.add_argument("--label", "-l", default=None, help="a label stored with the results in the history file")
+    parser.add_argument("--baseline", "-b", default=None, help="compare the results with this baseline file")
+    parser.add_argument("--threshold", "-th", type=float, default=0.2, help="the allowed slowdown relative to the baseline (a fraction)")
+    parser.add_argument("--min-time", "-mt", type=float, default=0.01, help="the times of the cases faster than this (in the baseline) are not compared")
+    parser.add_argument("--save-baseline", "-sb", default=None, help="save the results as a baseline to this file")
+    args = parser.parse_args()
+
+    cases = create_cases(args.domains, args.algorithms, args.heuristics, args.instances)
+    print(f"Running {len(cases)} benchmark cases ({args.repeat} runs each)")
+    results = run_benchmarks(cases, args.repeat, args.timeout or None, lambda result: print(format_result(result), flush=True))
+    if args.history is not None:
+        append_history(args.history, results, args.label)
+    if args.save_baseline is not None:
+        save_baseline(args.save_baseline, results)
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_time)
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
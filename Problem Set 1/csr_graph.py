@@ -0,0 +1,214 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from array import array
+import json, math, mmap, struct, sys
+
+from problem import Problem
+from graph import GraphRoutingProblem
+from helpers.instrumentation import record_calls
+
+# This file contains a compressed-sparse-row (CSR) representation of the graphs used in the graph routing problem.
+# The nodes are identified by integer ids (0 to node_count-1), and the edges of node 'i' are the edge indices
+# in the range [offsets[i], offsets[i+1]). For every edge index 'e', neighbors[e] is the node at the end of the edge
+# and weights[e] is the precomputed edge cost (the euclidean distance between the two nodes).
+# All the arrays are contiguous so a graph can be saved to a binary file and memory-mapped back without parsing.
+
+# The binary file starts with a header followed by the sections (each section starts at a multiple of 8 bytes):
+#   offsets (int32 x node_count+1), neighbors (int32 x edge_count), weights (float64 x edge_count),
+#   positions (float64 x 2*node_count) and the node names (utf-8 separated by new lines).
+# The arrays are stored in the native byte order which is recorded in the header.
+_MAGIC = b"CSRG"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIB3xIIiiQ")
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+class CSRGraph:
+    names: List[str]            # The name of each node
+    positions: Sequence[float]  # The position of node 'i' is (positions[2*i], positions[2*i+1])
+    offsets: Sequence[int]      # The edges of node 'i' are in the range [offsets[i], offsets[i+1])
+    neighbors: Sequence[int]    # The node at the end of each edge
+    weights: Sequence[float]    # The cost of each edge
+    start: int                  # The id of the start node (-1 if undefined)
+    goal: int                   # The id of the goal node (-1 if undefined)
+
+    def __init__(self, names: List[str], positions: Sequence[float], offsets: Sequence[int],
+                 neighbors: Sequence[int], weights: Sequence[float], start: int = -1, goal: int = -1) -> None:
+        self.names = names
+        self.positions = positions
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+        self.start = start
+        self.goal = goal
+        self._ids: Optional[Dict[str, int]] = None
+        self._mapping: Optional[mmap.mmap] = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.neighbors)
+
+    # Returns the id of the node with the given name
+    def get_id(self, name: str) -> int:
+        if self._ids is None:
+            self._ids = {name: index for index, name in enumerate(self.names)}
+        return self._ids[name]
+
+    # Builds the CSR arrays from a list of node names, positions and (sorted) adjacency lists of node ids
+    @staticmethod
+    def from_adjacency(names: List[str], positions: Sequence[float], adjacency: Iterable[Iterable[int]], start: int = -1, goal: int = -1) -> 'CSRGraph':
+        offsets, neighbors, weights = array('i', [0]), array('i'), array('d')
+        for node, adjacent in enumerate(adjacency):
+            x, y = positions[2*node], positions[2*node+1]
+            for neighbor in adjacent:
+                neighbors.append(neighbor)
+                weights.append(math.sqrt((x - positions[2*neighbor])**2 + (y - positions[2*neighbor+1])**2))
+            offsets.append(len(neighbors))
+        return CSRGraph(names, positions, offsets, neighbors, weights, start, goal)
+
+    # Converts a graph routing problem into a CSR graph (the node ids follow the order of the adjacency dictionary)
+    @staticmethod
+    def from_problem(problem: GraphRoutingProblem) -> 'CSRGraph':
+        nodes = list(problem.adjacency.keys())
+        ids = {node: index for index, node in enumerate(nodes)}
+        for adjacent in problem.adjacency.values():
+            for node in adjacent:
+                if node not in ids:
+                    ids[node] = len(nodes)
+                    nodes.append(node)
+        positions = array('d', (value for node in nodes for value in (node.position.x, node.position.y)))
+        adjacency = [[ids[neighbor] for neighbor in problem.adjacency.get(node, [])] for node in nodes]
+        return CSRGraph.from_adjacency([node.name for node in nodes], positions, adjacency,
+                                       ids.get(problem.start, -1), ids.get(problem.goal, -1))
+
+    # Reads a graph from a json file (the same format read by GraphRoutingProblem.from_file) without creating GraphNodes
+    @staticmethod
+    def from_json(path: str) -> 'CSRGraph':
+        with open(path, 'r') as f:
+            problem_def: Dict[str, Dict] = json.load(f)
+        graph_def: Dict[str, Dict] = problem_def.get("graph", {})
+        names = list(graph_def.keys())
+        ids = {name: index for index, name in enumerate(names)}
+        positions = array('d', (value for item in graph_def.values() for value in item.get("position", [0,0])))
+        adjacency = ([ids[adjacent] for adjacent in sorted(item.get("adjacent", [])) if adjacent in ids] for item in graph_def.values())
+        return CSRGraph.from_adjacency(names, positions, adjacency,
+                                       ids.get(problem_def.get("start", ""), -1), ids.get(problem_def.get("goal", ""), -1))
+
+    # Saves the graph into the binary format
+    def save(self, path: str) -> None:
+        names = '\n'.join(self.names).encode('utf-8')
+        sections = [
+            array('i', self.offsets).tobytes(),
+            array('i', self.neighbors).tobytes(),
+            array('d', self.weights).tobytes(),
+            array('d', self.positions).tobytes(),
+            names
+        ]
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, sys.byteorder == "little", self.node_count, self.edge_count,
+                                 self.start, self.goal, len(names)))
+            f.write(bytes(_align(_HEADER.size) - _HEADER.size))
+            for section in sections:
+                f.write(section)
+                f.write(bytes(_align(len(section)) - len(section)))
+
+    # Loads a graph from the binary format. The arrays are views over a read-only memory map of the file,
+    # so the loading time does not depend on the graph size and the pages are only read when they are accessed.
+    @staticmethod
+    def load(path: str) -> 'CSRGraph':
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, little_endian, node_count, edge_count, start, goal, names_size = _HEADER.unpack_from(mapping, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise Exception(f"{path} is not a CSR graph file (version {_VERSION})")
+        if bool(little_endian) != (sys.byteorder == "little"):
+            raise Exception(f"{path} was saved on a machine with a different byte order")
+        view = memoryview(mapping)
+        position = _align(_HEADER.size)
+        def section(size: int, fmt: str) -> memoryview:
+            nonlocal position
+            data = view[position:position+size]
+            position += _align(size)
+            return data.cast(fmt) if fmt else data
+        offsets = section(4 * (node_count + 1), 'i')
+        neighbors = section(4 * edge_count, 'i')
+        weights = section(8 * edge_count, 'd')
+        positions = section(16 * node_count, 'd')
+        names = bytes(section(names_size, None)).decode('utf-8').split('\n') if node_count else []
+        graph = CSRGraph(names, positions, offsets, neighbors, weights, start, goal)
+        graph._mapping = mapping
+        return graph
+
+    # A memory-mapped graph is copied into arrays when pickled (e.g. to send it to another process)
+    def __getstate__(self) -> Dict:
+        state = dict(self.__dict__, _mapping=None)
+        if self._mapping is not None:
+            for name, fmt in (("positions", 'd'), ("offsets", 'i'), ("neighbors", 'i'), ("weights", 'd')):
+                state[name] = array(fmt, state[name])
+        return state
+
+    # Reads a graph from a binary file (.csr) or a json file
+    @staticmethod
+    def from_file(path: str) -> 'CSRGraph':
+        if path.endswith(".csr"):
+            return CSRGraph.load(path)
+        return CSRGraph.from_json(path)
+
+# This is a thin view of the graph routing problem over a CSR graph
+# The state is a node id and the action is an edge index, so the successor and the cost are simple array lookups
+class CSRGraphRoutingProblem(Problem[int, int]):
+    def __init__(self, graph: CSRGraph, start: Optional[int] = None, goal: Optional[int] = None) -> None:
+        super().__init__()
+        self.graph = graph
+        self.start = graph.start if start is None else start
+        self.goal = graph.goal if goal is None else goal
+
+    def get_initial_state(self) -> int:
+        return self.start
+
+    def is_goal(self, state: int) -> bool:
+        return state == self.goal
+
+    # The actions are the indices of the edges leaving the current node
+    # We use @record_calls to track the arguments with which this function is called to retrieve the traversal order
+    @record_calls
+    def get_actions(self, state: int) -> Iterable[int]:
+        offsets = self.graph.offsets
+        return range(offsets[state], offsets[state+1])
+
+    def get_successor(self, state: int, action: int) -> int:
+        return self.graph.neighbors[action]
+
+    def get_cost(self, state: int, action: int) -> float:
+        return self.graph.weights[action]
+
+    # Converts a solution (a list of edge indices) to the names of the visited nodes (excluding the initial node)
+    def to_names(self, path: List[int]) -> List[str]:
+        names, neighbors = self.graph.names, self.graph.neighbors
+        return [names[neighbors[edge]] for edge in path]
+
+    # Read a graph routing problem from file (json or binary)
+    @staticmethod
+    def from_file(path: str) -> 'CSRGraphRoutingProblem':
+        return CSRGraphRoutingProblem(CSRGraph.from_file(path))
+
+def csr_graphrouting_heuristic(problem: CSRGraphRoutingProblem, state: int) -> float:
+    positions, goal = problem.graph.positions, problem.goal
+    dx = positions[2*state] - positions[2*goal]
+    dy = positions[2*state+1] - positions[2*goal+1]
+    return math.sqrt(dx * dx + dy * dy)
+
+if __name__ == "__main__":
+    import argparse
+    # Convert a json graph into the binary format
+    parser = argparse.ArgumentParser(description="Convert a graph from json to the binary CSR format")
+    parser.add_argument("graph", help="path to the json graph")
+    parser.add_argument("output", help="path to the binary graph (.csr)")
+    args = parser.parse_args()
+    graph = CSRGraph.from_json(args.graph)
+    graph.save(args.output)
+    print(f"Saved {graph.node_count} nodes and {graph.edge_count} edges to {args.output}")
@@ -0,0 +1,93 @@
+from typing import Dict, Generic, List, Optional, Tuple
+import heapq
+
+from problem import S, A
+
+# This is the frontier used by the best-first searches (Uniform Cost Search, A* Search and Best First Search)
+# It is a priority queue where:
+#   - Every heap entry is a tuple (priority, order, state_id), so all the heap comparisons are done on numbers (in C)
+#     instead of calling a python comparison function on a node object. The order breaks the ties in a FIFO manner.
+#   - Every state is given an integer id the first time it is pushed. The ids index a best-g table and the parent pointers.
+#   - To decrease the priority of a state, a new entry is pushed and the old entry is left in the heap.
+#     The old entry becomes stale and it is skipped when it is popped (lazy deletion).
+# A state that has been pushed and is no longer in the frontier has been popped (it is closed / explored).
+class PriorityFrontier(Generic[S, A]):
+    def __init__(self) -> None:
+        self.heap: List[Tuple[float, int, int]] = []
+        self.open: Dict[int, Tuple[float, int, int]] = {}   # The live heap entry of each state_id in the frontier
+        self.ids: Dict[S, int] = {}                         # The state_id of every state seen so far
+        self.states: List[S] = []                           # The state of each state_id
+        self.g: List[float] = []                            # The best path cost found so far for each state_id
+        self.parents: List[int] = []                        # The state_id of the parent of each state_id (-1 for the root)
+        self.actions: List[Optional[A]] = []                # The action that leads from the parent to each state_id
+        self.order = 0
+
+    def __len__(self) -> int:
+        return len(self.open)
+
+    def __bool__(self) -> bool:
+        return bool(self.open)
+
+    # Returns the id of the given state or None if it was never pushed
+    def get_id(self, state: S) -> Optional[int]:
+        return self.ids.get(state)
+
+    # Returns True if the state was pushed and popped before (it is explored)
+    def is_closed(self, state: S) -> bool:
+        state_id = self.ids.get(state)
+        return state_id is not None and state_id not in self.open
+
+    # Adds a state to the frontier or decreases its priority if it is already in the frontier.
+    # Nothing happens if the state is closed or if it is already in the frontier with a priority that is not higher.
+    # It returns the state_id if the state was added (or updated), and None otherwise.
+    def push(self, state: S, priority: float, g: float = 0.0, parent: int = -1, action: Optional[A] = None) -> Optional[int]:
+        state_id = self.ids.get(state)
+        if state_id is None:
+            state_id = len(self.states)
+            self.ids[state] = state_id
+            self.states.append(state)
+            self.g.append(g)
+            self.parents.append(parent)
+            self.actions.append(action)
+        else:
+            current = self.open.get(state_id)
+            if current is None or priority >= current[0]:
+                return None
+            self.g[state_id] = g
+            self.parents[state_id] = parent
+            self.actions[state_id] = action
+        entry = (priority, self.order, state_id)
+        self.order += 1
+        self.open[state_id] = entry
+        heapq.heappush(self.heap, entry)
+        return state_id
+
+    # Removes and returns the state_id and the state with the lowest priority (ties are broken by the push order)
+    def pop(self) -> Tuple[int, S]:
+        heap, open = self.heap, self.open
+        while True:
+            entry = heapq.heappop(heap)
+            state_id = entry[2]
+            if open.get(state_id) is entry:
+                del open[state_id]
+                return state_id, self.states[state_id]
+
+    # Returns the lowest priority in the frontier (or infinity if the frontier is empty) without popping it
+    def peek_priority(self) -> float:
+        heap, open = self.heap, self.open
+        while heap:
+            entry = heap[0]
+            if open.get(entry[2]) is entry:
+                return entry[0]
+            heapq.heappop(heap)
+        return float('inf')
+
+    # Rebuilds the list of actions from the root to the given state_id by following the parent pointers
+    def path(self, state_id: int) -> List[A]:
+        path = []
+        parents, actions = self.parents, self.actions
+        while parents[state_id] != -1:
+            path.append(actions[state_id])
+            state_id = parents[state_id]
+        path.reverse()
+        return path
@@ -4,7 +4,7 @@ import json
 
 from problem import Problem
 from mathutils import Point, euclidean_distance
-from helpers.utils import record_calls
+from helpers.instrumentation import record_calls
 
 # In the graph routing problem, the state is a graph node
 # We use dataclass with frozen=True to automatically implement:
@@ -46,6 +46,26 @@ class GraphRoutingProblem(Problem[GraphNode, GraphNode]):
     # The cost of an action is the distance between the current node and the next node 
     def get_cost(self, state: GraphNode, action: GraphNode) -> float:
         return euclidean_distance(state.position, action.position)
+
+    # Returns the reverse adjacency where every node is mapped to the nodes that have an edge to it
+    # It is built once from the adjacency and stored in the problem cache
+    def get_reverse_adjacency(self) -> Dict[GraphNode, List[GraphNode]]:
+        cache = self.cache()
+        reverse_adjacency = cache.get("reverse_adjacency")
+        if reverse_adjacency is None:
+            reverse_adjacency = {node: [] for node in self.adjacency}
+            for node, adjacent in self.adjacency.items():
+                for neighbor in adjacent:
+                    reverse_adjacency.setdefault(neighbor, []).append(node)
+            for adjacent in reverse_adjacency.values():
+                adjacent.sort(key=lambda node: node.name)
+            cache["reverse_adjacency"] = reverse_adjacency
+        return reverse_adjacency
+
+    # Returns the problem of routing backward from the goal to the given node over the reversed edges
+    # Since the edge costs are symmetric, the cost of a reversed edge is the same as the original one
+    def reverse(self, target: GraphNode) -> 'GraphRoutingProblem':
+        return GraphRoutingProblem(self.goal, target, self.get_reverse_adjacency())
     
     # Read a graph routing problem from file
     @staticmethod
@@ -0,0 +1,165 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+import functools, os, time
+
+# This module instruments the functions that are used to count the explored nodes (and to profile the searches).
+# Every instrumented function gets a Probe (stored in its "probe" attribute) that holds:
+#   - the number of calls,
+#   - the arguments of the recorded calls (only every "sample"-th call is recorded and only the last "limit" records are kept),
+#   - a histogram of the call durations (only for timed functions).
+# The fetch helpers in helpers.utils (fetch_tracked_call_count and fetch_recorded_calls) read the probe, so the autograder works unchanged.
+#
+# The instrumentation can be switched off:
+#   - Entirely, by setting the environment variable INSTRUMENTATION=off before the modules are imported.
+#     The decorators then return the original functions so there is no overhead at all (and all the counters stay 0).
+#   - At runtime, by calling set_enabled(False). The wrappers are still called but they only check a flag.
+
+_enabled = os.environ.get("INSTRUMENTATION", "on").strip().lower() not in ("off", "0", "false", "no")
+_active = _enabled # Whether the decorators install the wrappers (decided once at import time)
+
+# All the probes (indexed by the qualified names of the instrumented functions) for reporting
+probes: Dict[str, "Probe"] = {}
+
+# The durations are stored in power of two buckets: bucket i contains the calls that took less than 2**i nanoseconds
+# (and at least 2**(i-1) nanoseconds). 48 buckets cover durations up to about 39 hours.
+HISTOGRAM_BUCKETS = 48
+
+def is_enabled() -> bool:
+    return _enabled
+
+# Pauses or resumes the counting (it has no effect if the instrumentation was switched off at import time)
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled and _active
+
+class Probe:
+    def __init__(self, name: str, sample: int = 1, limit: Optional[int] = None) -> None:
+        if sample <= 0:
+            raise Exception("The sampling period must be positive")
+        self.name = name
+        self.sample = sample
+        self.limit = limit
+        self.calls = 0
+        # The recorded calls are stored as (args, kwargs) tuples; they are converted to dictionaries only when fetched
+        self.records: Deque[Tuple[tuple, Dict[str, Any]]] = deque(maxlen=limit)
+        self.histogram: List[int] = [0] * HISTOGRAM_BUCKETS
+        self.total_time = 0 # in nanoseconds
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.records = deque(maxlen=self.limit)
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.total_time = 0
+
+    # Returns the number of calls and resets the counter
+    def fetch_count(self) -> int:
+        calls = self.calls
+        self.calls = 0
+        return calls
+
+    # Returns the recorded calls (in the format of helpers.utils.record_calls) and clears them
+    def fetch_records(self) -> Deque[Dict[str, Any]]:
+        records = deque({"args": args, "kwargs": kwargs} for args, kwargs in self.records)
+        self.records = deque(maxlen=self.limit)
+        return records
+
+    # Returns an approximation (the upper bound of the bucket) of the given percentile of the call durations in seconds
+    def percentile(self, fraction: float) -> float:
+        timed = sum(self.histogram)
+        if timed == 0:
+            return 0.0
+        threshold, seen = fraction * timed, 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= threshold:
+                return (1 << bucket) * 1e-9
+        return (1 << (HISTOGRAM_BUCKETS - 1)) * 1e-9
+
+    def summary(self) -> Dict[str, Any]:
+        timed = sum(self.histogram)
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "recorded": len(self.records),
+            "timed": timed,
+            "total_time": self.total_time * 1e-9,
+            "mean_time": self.total_time * 1e-9 / timed if timed else 0.0,
+            "p50_time": self.percentile(0.5),
+            "p99_time": self.percentile(0.99),
+        }
+
+def _attach(fn: Callable, wrapper: Callable, probe: Probe) -> Callable:
+    functools.update_wrapper(wrapper, fn)
+    wrapper.probe = probe
+    probes[probe.name] = probe
+    return wrapper
+
+# Instruments a function. The cheapest wrapper that provides the requested information is used:
+#   - record: records the arguments of every "sample"-th call (keeping the last "limit" records if a limit is given).
+#   - timed: builds a histogram of the call durations.
+# The calls are always counted.
+def instrument(record: bool = False, sample: int = 1, limit: Optional[int] = None, timed: bool = False) -> Callable[[Callable], Callable]:
+    def decorator(fn: Callable) -> Callable:
+        if not _active:
+            return fn
+        probe = Probe(fn.__qualname__, sample, limit)
+        if timed:
+            clock = time.perf_counter_ns
+            def timed_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return fn(*args, **kwargs)
+                probe.calls += 1
+                if record and probe.calls % probe.sample == 0:
+                    probe.records.append((args, kwargs))
+                start = clock()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    duration = clock() - start
+                    probe.total_time += duration
+                    probe.histogram[min(duration.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+            return _attach(fn, timed_wrapper, probe)
+        if record:
+            def recording_wrapper(*args, **kwargs):
+                if _enabled:
+                    probe.calls += 1
+                    if probe.calls % probe.sample == 0:
+                        probe.records.append((args, kwargs))
+                return fn(*args, **kwargs)
+            return _attach(fn, recording_wrapper, probe)
+        def counting_wrapper(*args, **kwargs):
+            if _enabled:
+                probe.calls += 1
+            return fn(*args, **kwargs)
+        return _attach(fn, counting_wrapper, probe)
+    return decorator
+
+# The drop-in replacements of the decorators in helpers.utils
+def track_call_count(fn: Callable) -> Callable:
+    return instrument()(fn)
+
+def record_calls(fn: Callable) -> Callable:
+    return instrument(record=True)(fn)
+
+def time_calls(fn: Callable) -> Callable:
+    return instrument(timed=True)(fn)
+
+def reset_all() -> None:
+    for probe in probes.values():
+        probe.reset()
+
+# Returns a human readable report of all the probes that were called
+def report() -> str:
+    lines = []
+    for probe in probes.values():
+        summary = probe.summary()
+        if summary["calls"] == 0:
+            continue
+        line = f"{summary['name']}: {summary['calls']} calls"
+        if summary["recorded"]:
+            line += f", {summary['recorded']} recorded"
+        if summary["timed"]:
+            line += f", total {summary['total_time']:.3f}s, mean {summary['mean_time'] * 1e6:.2f}us, " \
+                    f"p50 < {summary['p50_time'] * 1e6:.2f}us, p99 < {summary['p99_time'] * 1e6:.2f}us"
+        lines.append(line)
+    return "\n".join(lines)
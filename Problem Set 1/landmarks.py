@@ -0,0 +1,161 @@
+from typing import Dict, List, Optional, Tuple
+import hashlib, json, os
+
+from graph import GraphNode, GraphRoutingProblem, graphrouting_heuristic
+from frontier import PriorityFrontier
+from mathutils import euclidean_distance
+
+# This file implements the ALT heuristic (A*, Landmarks and Triangle inequality) for the graph routing problem.
+# For a few selected nodes (landmarks), we precompute the shortest distance from every landmark to every node
+# and from every node to every landmark. Then, by the triangle inequality, for any node 'v' and goal 't':
+#   d(v, t) >= d(L, t) - d(L, v)     and     d(v, t) >= d(v, L) - d(t, L)
+# The maximum of these bounds over all the landmarks is a consistent heuristic that knows about detours and dead ends.
+# The tables are built once per graph (offline) and saved next to the graph file.
+
+INF = float('inf')
+
+# Computes the shortest distance from the source to every reachable node (Dijkstra's algorithm)
+def shortest_distances(adjacency: Dict[GraphNode, List[GraphNode]], source: GraphNode) -> Dict[GraphNode, float]:
+    frontier = PriorityFrontier()
+    frontier.push(source, 0, 0)
+    while frontier:
+        state_id, state = frontier.pop()
+        distance = frontier.g[state_id]
+        for neighbor in adjacency.get(state, []):
+            if frontier.is_closed(neighbor):
+                continue
+            neighbor_distance = distance + euclidean_distance(state.position, neighbor.position)
+            frontier.push(neighbor, neighbor_distance, neighbor_distance)
+    return {state: frontier.g[state_id] for state, state_id in frontier.ids.items()}
+
+# Returns a string that identifies the graph structure so that stale tables are not used after the graph changes
+def graph_signature(problem: GraphRoutingProblem) -> str:
+    lines = sorted(f"{node.name}@{node.position.x},{node.position.y}:{','.join(sorted(neighbor.name for neighbor in adjacent))}"
+                   for node, adjacent in problem.adjacency.items())
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+# The landmark table contains for every node 'v' two tuples (one entry per landmark):
+#   distances_from[v][i] = d(landmark i, v)   and   distances_to[v][i] = d(v, landmark i)
+# A missing node or an infinite distance means that the node is unreachable.
+class LandmarkTable:
+    def __init__(self, landmarks: List[GraphNode], distances_from: Dict[GraphNode, Tuple[float, ...]],
+                 distances_to: Dict[GraphNode, Tuple[float, ...]], signature: str) -> None:
+        self.landmarks = landmarks
+        self.distances_from = distances_from
+        self.distances_to = distances_to
+        self.signature = signature
+
+    # Returns a lower bound on the distance from the node to the goal
+    def lower_bound(self, node: GraphNode, goal: GraphNode) -> float:
+        unreachable = (INF,) * len(self.landmarks)
+        node_from, node_to = self.distances_from.get(node, unreachable), self.distances_to.get(node, unreachable)
+        goal_from, goal_to = self.distances_from.get(goal, unreachable), self.distances_to.get(goal, unreachable)
+        bound = 0
+        for landmark_goal, landmark_node, node_landmark, goal_landmark in zip(goal_from, node_from, node_to, goal_to):
+            # If the landmark can not reach the node (or the goal can not reach the landmark), the bound is useless
+            if landmark_node != INF and landmark_goal - landmark_node > bound:
+                bound = landmark_goal - landmark_node
+            if goal_landmark != INF and node_landmark - goal_landmark > bound:
+                bound = node_landmark - goal_landmark
+        return bound
+
+    # Saves the table in json (infinite distances are saved as null)
+    def save(self, path: str) -> None:
+        encode = lambda distances: [None if distance == INF else distance for distance in distances]
+        data = {
+            "signature": self.signature,
+            "landmarks": [landmark.name for landmark in self.landmarks],
+            "from": {node.name: encode(distances) for node, distances in self.distances_from.items()},
+            "to": {node.name: encode(distances) for node, distances in self.distances_to.items()}
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    # Loads a table for the given problem. It returns None if the table was built for a different graph.
+    @staticmethod
+    def load(path: str, problem: GraphRoutingProblem) -> Optional['LandmarkTable']:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get("signature") != graph_signature(problem):
+            return None
+        nodes = {node.name: node for node in problem.adjacency}
+        decode = lambda distances: tuple(INF if distance is None else distance for distance in distances)
+        return LandmarkTable(
+            [nodes[name] for name in data["landmarks"]],
+            {nodes[name]: decode(distances) for name, distances in data["from"].items()},
+            {nodes[name]: decode(distances) for name, distances in data["to"].items()},
+            data["signature"]
+        )
+
+# Selects the landmarks using the farthest selection strategy:
+# every new landmark is the node with the largest distance to its closest landmark (the first is the farthest from the start).
+# Distances are measured in both directions and unreachable nodes count as infinitely far so every component gets a landmark.
+# It returns the landmarks and the distances from and to each of them.
+def select_landmarks(problem: GraphRoutingProblem, count: int) -> Tuple[List[GraphNode], List[Dict[GraphNode, float]], List[Dict[GraphNode, float]]]:
+    nodes = sorted(problem.adjacency, key=lambda node: node.name)
+    landmarks, from_landmarks, to_landmarks = [], [], []
+    if not nodes or count <= 0:
+        return landmarks, from_landmarks, to_landmarks
+    reverse_adjacency = problem.get_reverse_adjacency()
+    distances = shortest_distances(problem.adjacency, problem.start)
+    landmarks.append(max(nodes, key=lambda node: distances.get(node, -1)))
+    closest = {node: INF for node in nodes}
+    while True:
+        from_landmarks.append(shortest_distances(problem.adjacency, landmarks[-1]))
+        to_landmarks.append(shortest_distances(reverse_adjacency, landmarks[-1]))
+        for node in nodes:
+            closest[node] = min(closest[node], from_landmarks[-1].get(node, INF), to_landmarks[-1].get(node, INF))
+        if len(landmarks) >= min(count, len(nodes)):
+            return landmarks, from_landmarks, to_landmarks
+        landmarks.append(max((node for node in nodes if node not in landmarks), key=lambda node: closest[node]))
+
+# Builds the landmark table for the given problem
+def build_landmarks(problem: GraphRoutingProblem, count: int = 4) -> LandmarkTable:
+    landmarks, from_landmarks, to_landmarks = select_landmarks(problem, count)
+    nodes = list(problem.adjacency)
+    return LandmarkTable(
+        landmarks,
+        {node: tuple(distances.get(node, INF) for distances in from_landmarks) for node in nodes},
+        {node: tuple(distances.get(node, INF) for distances in to_landmarks) for node in nodes},
+        graph_signature(problem)
+    )
+
+# Returns the path where the landmark table of a graph file is saved (next to the graph file)
+# NOTE: The table is json too, but it must not end with ".json" since the scripts and tests load every "graphs/*.json" file as a graph.
+def landmark_path(graph_path: str) -> str:
+    return os.path.splitext(graph_path)[0] + ".landmarks"
+
+# Loads the landmark table saved next to the graph file (or builds and saves it if it is missing or stale)
+# The table is stored in the problem cache so that landmark_heuristic can use it
+def load_landmarks(problem: GraphRoutingProblem, graph_path: str, count: int = 4) -> LandmarkTable:
+    path = landmark_path(graph_path)
+    table = LandmarkTable.load(path, problem) if os.path.exists(path) else None
+    if table is None or len(table.landmarks) < min(count, len(problem.adjacency)):
+        table = build_landmarks(problem, count)
+        table.save(path)
+    problem.cache()["landmarks"] = table
+    return table
+
+# The ALT heuristic. It is combined with the straight line distance by taking the maximum (both are consistent).
+# If no table was loaded into the problem cache (using load_landmarks), a table is built in memory on the first call.
+def landmark_heuristic(problem: GraphRoutingProblem, state: GraphNode) -> float:
+    cache = problem.cache()
+    table = cache.get("landmarks")
+    if table is None:
+        table = build_landmarks(problem)
+        cache["landmarks"] = table
+    return max(table.lower_bound(state, problem.goal), graphrouting_heuristic(problem, state))
+
+if __name__ == "__main__":
+    import argparse, time
+    # Build the landmark tables for the given graphs offline
+    parser = argparse.ArgumentParser(description="Build the landmark (ALT) tables for graph routing problems")
+    parser.add_argument("graphs", nargs="+", help="paths to the graph files")
+    parser.add_argument("--count", "-n", type=int, default=4, help="the number of landmarks")
+    args = parser.parse_args()
+    for graph_path in args.graphs:
+        start = time.time()
+        problem = GraphRoutingProblem.from_file(graph_path)
+        table = build_landmarks(problem, args.count)
+        table.save(landmark_path(graph_path))
+        print(f"{graph_path}: {len(table.landmarks)} landmarks ({', '.join(landmark.name for landmark in table.landmarks)}) in {time.time() - start:.3f} seconds")
@@ -25,6 +25,10 @@ class Point:
     
     def __str__(self) -> str:
         return f'({self.x}, {self.y})'
+
+    # A frozen dataclass with __slots__ can not be unpickled by assigning its fields, so it is rebuilt using the constructor
+    def __reduce__(self):
+        return (Point, (self.x, self.y))
     
     # this allow points to be used as iterators such as writing:
     # x, y = point
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Set, Tuple, List
+from typing import Any, Dict, Optional, Set, Tuple, List, Union
 from problem import Problem
 from mathutils import Direction, Point
 from helpers.utils import NotImplemented
@@ -88,8 +88,9 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
         # NotImplemented()
 
      # Read a parking problem from text containing a grid of tiles
+    # If compact is True, the problem will use the compact state representation (see CompactParkingProblem)
     @staticmethod
-    def from_text(text: str) -> 'ParkingProblem':
+    def from_text(text: str, compact: bool = False) -> 'ParkingProblem':
         passages = set()
         cars, slots = {}, {}
         lines = [line for line in (line.strip()
@@ -105,16 +106,93 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
                         cars[ord(char) - ord('A')] = Point(x, y)
                     elif char in "0123456789":
                         slots[int(char)] = Point(x, y)
-        problem = ParkingProblem()
+        problem = CompactParkingProblem() if compact else ParkingProblem()
         problem.passages = passages
         problem.cars = tuple(cars[i] for i in range(len(cars)))
         problem.slots = {position: index for index, position in slots.items()}
         problem.width = width
         problem.height = height
+        if compact:
+            problem.build_tables()
         return problem
 
     # Read a parking problem from file containing a grid of tiles
     @staticmethod
-    def from_file(path: str) -> 'ParkingProblem':
+    def from_file(path: str, compact: bool = False) -> 'ParkingProblem':
         with open(path, 'r') as f:
-            return ParkingProblem.from_text(f.read())
+            return ParkingProblem.from_text(f.read(), compact)
+
+# The compact parking state stores the cell index of every car (state[i] is the cell of car 'i').
+# It is a bytes object when the parking has at most 256 cells (and a tuple of integers otherwise),
+# so it is hashed and compared in C without creating any Point.
+CompactParkingState = Union[bytes, Tuple[int, ...]]
+
+# This is the parking problem on compact states
+# It has the same actions (in the same order), successors and costs as ParkingProblem, but:
+#   - The passages are indexed once as integer cells and neighbors[direction][cell] is the neighboring cell index (or -1 for a wall).
+#   - The occupied cells are collected in a bitmask so checking if a cell is free is a single bit test (instead of scanning the state).
+#   - The action tuples and the costs of moving every car into every cell are precomputed.
+class CompactParkingProblem(ParkingProblem):
+    cells: List[Point]              # The position of every cell (sorted by row then column)
+    index: Dict[Point, int]         # The cell index of every position
+    neighbors: List[List[int]]      # neighbors[direction][cell] is the neighboring cell index or -1 if it is a wall
+    car_actions: List[List[ParkingAction]]  # car_actions[car][direction] is the action (car, direction)
+    move_costs: List[List[int]]     # move_costs[car][cell] is the cost of moving the car into the cell
+    goal_state: Optional[CompactParkingState]
+
+    # Builds the cell index and the lookup tables (called once when the problem is read)
+    def build_tables(self) -> None:
+        self.cells = sorted(self.passages, key=lambda point: (point.y, point.x))
+        self.index = {cell: index for index, cell in enumerate(self.cells)}
+        self.neighbors = [
+            [self.index.get(cell + direction.to_vector(), -1) for cell in self.cells]
+            for direction in Direction
+        ]
+        self.car_actions = [[(car, direction) for direction in Direction] for car in range(len(self.cars))]
+        self.move_costs = [
+            [ord('Z') - ord('A') + 1 - car + (100 if cell in self.slots and self.slots[cell] != car else 0) for cell in self.cells]
+            for car in range(len(self.cars))
+        ]
+        self.pack = bytes if len(self.cells) <= 256 else tuple
+        slot_of_car = {car: position for position, car in self.slots.items()}
+        has_all_slots = all(car in slot_of_car for car in range(len(self.cars)))
+        self.goal_state = self.encode(tuple(slot_of_car[car] for car in range(len(self.cars)))) if has_all_slots else None
+
+    # Converts a ParkingState to a CompactParkingState
+    def encode(self, state: ParkingState) -> CompactParkingState:
+        return self.pack(self.index[position] for position in state)
+
+    # Converts a CompactParkingState to a ParkingState
+    def decode(self, state: CompactParkingState) -> ParkingState:
+        return tuple(self.cells[cell] for cell in state)
+
+    def get_initial_state(self) -> CompactParkingState:
+        return self.encode(self.cars)
+
+    def is_goal(self, state: CompactParkingState) -> bool:
+        return state == self.goal_state
+
+    def get_actions(self, state: CompactParkingState) -> List[ParkingAction]:
+        occupied = 0
+        for cell in state:
+            occupied |= 1 << cell
+        actions = []
+        for car, cell in enumerate(state):
+            car_actions = self.car_actions[car]
+            for direction, neighbors in enumerate(self.neighbors):
+                neighbor = neighbors[cell]
+                if neighbor >= 0 and not occupied >> neighbor & 1:
+                    actions.append(car_actions[direction])
+        return actions
+
+    def get_successor(self, state: CompactParkingState, action: ParkingAction) -> CompactParkingState:
+        car, direction = action
+        cell = self.neighbors[direction][state[car]]
+        if cell < 0:
+            # If we try to move into a wall, then this action is wrong
+            raise Exception(f"Invalid action {action} in state {self.decode(state)}")
+        return state[:car] + self.pack((cell,)) + state[car+1:]
+
+    def get_cost(self, state: CompactParkingState, action: ParkingAction) -> float:
+        car, direction = action
+        return self.move_costs[car][self.neighbors[direction][state[car]]]
@@ -0,0 +1,51 @@
+from typing import Dict, List
+from collections import deque
+
+from parking import CompactParkingProblem, ParkingProblem, ParkingState
+from mathutils import Direction, Point
+
+# This heuristic sums, for every car, the number of steps between the car and its slot multiplied by the cost of one step of this car.
+# Every car has to make at least that many steps (even if all the other cars were removed) and every step of car 'i'
+# costs at least 26 - i (the same weight used by get_cost), so it never overestimates the cost.
+# It is also consistent since a move only changes the distance of the moved car by at most one step.
+# The distances are computed by a breadth first search from every slot over the passages (ignoring the other cars).
+# They are computed once per problem and stored in the problem cache.
+
+# Returns, for every car, the distance from every position (or cell index for the compact problem) to the car's slot
+# (the positions that can not reach the slot are missing)
+def get_distance_fields(problem: ParkingProblem) -> List[Dict]:
+    cache = problem.cache()
+    fields = cache.get('distance_fields')
+    if fields is not None:
+        return fields
+    slot_of_car = {car: position for position, car in problem.slots.items()}
+    fields = []
+    for car in range(len(problem.cars)):
+        distances: Dict[Point, int] = {}
+        if car in slot_of_car:
+            distances[slot_of_car[car]] = 0
+            queue = deque([slot_of_car[car]])
+            while queue:
+                position = queue.popleft()
+                for direction in Direction:
+                    neighbor = position + direction.to_vector()
+                    if neighbor in problem.passages and neighbor not in distances:
+                        distances[neighbor] = distances[position] + 1
+                        queue.append(neighbor)
+        # The compact states store cell indices instead of points
+        if isinstance(problem, CompactParkingProblem):
+            distances = {problem.index[position]: distance for position, distance in distances.items()}
+        fields.append(distances)
+    cache['distance_fields'] = fields
+    return fields
+
+def parking_heuristic(problem: ParkingProblem, state: ParkingState) -> float:
+    fields = get_distance_fields(problem)
+    total = 0
+    for car, position in enumerate(state):
+        distance = fields[car].get(position)
+        # If the car can not reach its slot (or it has no slot), the goal can not be reached
+        if distance is None:
+            return float('inf')
+        total += distance * (ord('Z') - ord('A') + 1 - car)
+    return total
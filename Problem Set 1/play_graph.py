@@ -5,7 +5,7 @@ from helpers.utils import fetch_recorded_calls
 import argparse, os, json
 
 # Create an agent based on the user selections
-def create_agent(args: argparse.Namespace):
+def create_agent(args: argparse.Namespace, problem: GraphRoutingProblem):
     agent_type: str = args.agent
     if agent_type == "human":
         # This function reads the action from the user (human)
@@ -38,9 +38,21 @@ def create_agent(args: argparse.Namespace):
     if agent_type == "astar":
         from search import AStarSearch
         return InformedSearchAgent(AStarSearch, graphrouting_heuristic)
+    if agent_type == "alt":
+        from search import AStarSearch
+        from landmarks import landmark_heuristic, load_landmarks
+        # Load the landmark table saved next to the graph (it is built and saved if it is missing)
+        load_landmarks(problem, args.graph)
+        return InformedSearchAgent(AStarSearch, landmark_heuristic)
     if agent_type == "gbfs":
         from search import BestFirstSearch
         return InformedSearchAgent(BestFirstSearch, graphrouting_heuristic)
+    if agent_type == "bucs":
+        from search import BidirectionalUniformCostSearch
+        return UninformedSearchAgent(BidirectionalUniformCostSearch)
+    if agent_type == "bastar":
+        from search import BidirectionalAStar
+        return InformedSearchAgent(BidirectionalAStar, graphrouting_heuristic)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
@@ -60,7 +72,7 @@ def main(args: argparse.Namespace):
     if figure:
         print(figure)
     print("Current Node:", state)
-    agent = create_agent(args)
+    agent = create_agent(args, problem)
     step = 0 # This will store the current step
     path_cost = 0 # This will store the total path cost
     traversed_nodes = [] # This will store all the traversed nodes in order of traversal
@@ -100,7 +112,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Graph as Human or AI")
     parser.add_argument("graph", help="path to the graph to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'alt', 'gbfs', 'bucs', 'bastar'],
                         help="the agent that will play the game")
 
     args = parser.parse_args()
@@ -1,9 +1,11 @@
-from typing import List
-from sokoban import SokobanProblem, Direction, SokobanState, SokobanTile
+from typing import List, Optional
+from sokoban import SokobanProblem, SokobanPushProblem, Direction, SokobanState, SokobanTile, push_search
 from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent
+from search_tree import SearchTree
 from helpers.utils import fetch_tracked_call_count
 from helpers.heuristic_checks import test_heuristic_consistency
-from functools import lru_cache
+from search_stats import SearchStatistics
+from functools import lru_cache, partial
 import argparse, time
 
 def colored_sokoban(level: str):
@@ -17,6 +19,9 @@ def colored_sokoban(level: str):
     level = level.replace(SokobanTile.GOAL, f'{bcolors.BRIGHT_BLUE}{SokobanTile.GOAL}{bcolors.ENDC}')
     return level
 
+# The heuristics that are admissible and consistent when every push costs 1 (the weak and strong heuristics count the player steps)
+PUSH_HEURISTICS = ("zero", "matching")
+
 # Return the heuristic selected by the user
 def get_heuristic(name: str):
     if name == "zero":
@@ -27,11 +32,14 @@ def get_heuristic(name: str):
     if name == "strong":
         from sokoban_heuristic import strong_heuristic
         return strong_heuristic
+    if name == "matching":
+        from sokoban_heuristic import matching_heuristic
+        return matching_heuristic
     print(f"Requested Heuristic '{name}' is invalid")
     exit(-1)
 
 # Create an agent based on the user selections
-def create_agent(args: argparse.Namespace):
+def create_agent(args: argparse.Namespace, stats: Optional[SearchStatistics] = None):
     agent_type: str = args.agent
     if agent_type == "human":
         # This function reads the action from the user (human)
@@ -50,31 +58,49 @@ def create_agent(args: argparse.Namespace):
                 else:
                     print("Invalid Action")
         return HumanAgent(sokoban_user_action)
+    # If desired by the user, the search agents search over the crate pushes (see SokobanPushProblem)
+    # and the returned pushes are expanded back into player steps
+    wrap = push_search if args.pushes else (lambda search_fn: search_fn)
+    # If requested by the user, the search fills the statistics object
+    if stats is not None:
+        wrap_search = wrap
+        wrap = lambda search_fn: wrap_search(partial(search_fn, stats=stats))
     if agent_type == "bfs":
         from search import BreadthFirstSearch
-        return UninformedSearchAgent(BreadthFirstSearch)
+        return UninformedSearchAgent(wrap(BreadthFirstSearch))
     if agent_type == "dfs":
         from search import DepthFirstSearch
-        return UninformedSearchAgent(DepthFirstSearch)
+        return UninformedSearchAgent(wrap(DepthFirstSearch))
     if agent_type == "ucs":
         from search import UniformCostSearch
-        return UninformedSearchAgent(UniformCostSearch)
+        return UninformedSearchAgent(wrap(UniformCostSearch), SearchTree() if args.reuse_tree else None)
     if agent_type == "astar":
         from search import AStarSearch
         # We cache the heuristic calls to speed up the search process if the heuristic is not fast
         heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
         # If desired by the user, we track every transition and check for the heuristic consistency for each transition
         if args.checks:
-            SokobanProblem.get_successor = test_heuristic_consistency(heuristic)(SokobanProblem.get_successor)
-        return InformedSearchAgent(AStarSearch, heuristic)
+            checked = SokobanPushProblem if args.pushes else SokobanProblem
+            checked.get_successor = test_heuristic_consistency(heuristic)(checked.get_successor)
+        return InformedSearchAgent(wrap(AStarSearch), heuristic, SearchTree() if args.reuse_tree else None)
+    if agent_type == "ara":
+        from search import AnytimeRepairingAStar
+        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
+        if args.checks:
+            checked = SokobanPushProblem if args.pushes else SokobanProblem
+            checked.get_successor = test_heuristic_consistency(heuristic)(checked.get_successor)
+        # Every improved solution is printed with its suboptimality bound and the best one is used when the deadline expires
+        report = lambda solution, cost, bound: print(f"Found a solution with cost {cost} (at most {bound:.3f} times the optimal cost)")
+        return InformedSearchAgent(wrap(partial(AnytimeRepairingAStar, deadline=args.deadline, on_solution=report)), heuristic)
     if agent_type == "gbfs":
         from search import BestFirstSearch
         # We cache the heuristic calls to speed up the search process if the heuristic is not fast
         heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
         # If desired by the user, we track every transition and check for the heuristic consistency for each transition
         if args.checks:
-            SokobanProblem.get_successor = test_heuristic_consistency(heuristic)(SokobanProblem.get_successor)
-        return InformedSearchAgent(BestFirstSearch, heuristic)
+            checked = SokobanPushProblem if args.pushes else SokobanProblem
+            checked.get_successor = test_heuristic_consistency(heuristic)(checked.get_successor)
+        return InformedSearchAgent(wrap(BestFirstSearch), heuristic)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
@@ -82,16 +108,23 @@ def main(args: argparse.Namespace):
     state_printer = lambda state: print(state)
     if args.ansicolors: state_printer = lambda state: print(colored_sokoban(str(state)))
     start = time.time() # Track run time
-    problem = SokobanProblem.from_file(args.level) # create the problem
+    problem = SokobanProblem.from_file(args.level, args.compact) # create the problem
+    if args.cache_capacity is not None:
+        problem.cache(args.cache_capacity) # bound the memory used by the heuristic cache
     state = problem.get_initial_state() # Get the initial state
     print("Initial State:")
     state_printer(state)
-    agent = create_agent(args)
+    # If requested by the user, the search statistics are collected and appended to a JSON lines file
+    stats = None
+    if args.stats is not None:
+        stats = SearchStatistics(labels={"level": args.level, "heuristic": args.heuristic, "pushes": args.pushes, "compact": args.compact})
+    agent = create_agent(args, stats)
     step = 0 # This will store the current step
     total_explored_nodes = 0 # This will store the number of traversed nodes during search
     unsolvable = False # This will store whether the problem is unsolvable or not
     while not problem.is_goal(state):
         fetch_tracked_call_count(SokobanProblem.is_goal) # Clear the call counter
+        fetch_tracked_call_count(SokobanPushProblem.get_actions)
         action = agent.act(problem, state) # Request an action from the agent
         # If no solution was found, break
         if action is None:
@@ -100,6 +133,7 @@ def main(args: argparse.Namespace):
             break
         # Get the number of traversed nodes
         total_explored_nodes += fetch_tracked_call_count(SokobanProblem.is_goal)
+        total_explored_nodes += fetch_tracked_call_count(SokobanPushProblem.get_actions)
         # Apply the action to the state
         state = problem.get_successor(state, action)
         step += 1
@@ -117,6 +151,9 @@ def main(args: argparse.Namespace):
     # This was a search agent, display the number of traversed nodes
     if not isinstance(agent, HumanAgent):
         print(f"Search explored {total_explored_nodes} nodes")
+    if stats is not None:
+        print("Search statistics:", stats.to_json(indent=2))
+        stats.save(args.stats)
     # Finally print the elapsed time for the whole process
     print(f"Elapsed time: {time.time() - start} seconds")
 
@@ -126,17 +163,37 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Sokoban as Human or AI")
     parser.add_argument("level", help="path to the sokoban level to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'ara', 'gbfs'],
                         help="the agent that will play the game")
     parser.add_argument("--heuristic", '-hf', default="zero",
-                        choices=["zero", "weak", "strong"],
+                        choices=["zero", "weak", "strong", "matching"],
                         help="choose the heuristic to use with A* or Greedy Best First Search")
     parser.add_argument("--checks", "-c", action='store_true', default=False,
                         help="Enable consistency checks for the heuristic")
+    parser.add_argument("--compact", "-cs", action="store_true",
+                        help="Use the compact state representation (bitmask crates and Zobrist hashing)")
+    parser.add_argument("--deadline", "-dl", type=float, default=None,
+                        help="the time limit (in seconds) of the anytime search (ara); the best solution found so far is used when it expires")
+    parser.add_argument("--pushes", "-p", action="store_true",
+                        help="Search over crate pushes instead of player steps (the solution minimizes the number of pushes)")
+    parser.add_argument("--cache-capacity", "-cc", type=int, default=None,
+                        help="the maximum number of entries in the problem cache (the least recently used entries are evicted)")
+    parser.add_argument("--reuse-tree", "-rt", action="store_true",
+                        help="Keep what the searches learned so replanning from a state off the plan is cheap (only ucs and astar)")
+    parser.add_argument("--stats", "-st", default=None,
+                        help="append the search statistics (as a JSON line) to this file")
     parser.add_argument("--ansicolors", "-ac", action="store_true",
                         help="Print the level on the console with ANSI colors (only works on some terminals)")
 
     args = parser.parse_args()
+    if args.pushes and args.agent in ("astar", "ara", "gbfs") and args.heuristic not in PUSH_HEURISTICS:
+        parser.error(f"the heuristic '{args.heuristic}' counts player steps so it can not be used with --pushes "
+                     f"(use one of: {', '.join(PUSH_HEURISTICS)})")
+    # A new push problem is created for every search (see push_search), so the tree and the cache of the level problem are not used
+    if args.pushes and args.reuse_tree:
+        parser.error("--reuse-tree can not be used with --pushes (every search creates a new push problem)")
+    if args.pushes and args.cache_capacity is not None:
+        parser.error("--cache-capacity can not be used with --pushes (every search creates a new push problem)")
     try:
         main(args)
     except KeyboardInterrupt:
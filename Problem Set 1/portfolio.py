@@ -0,0 +1,160 @@
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from queue import Empty
+import multiprocessing, time
+
+from problem import Problem, S, A, Solution
+from helpers.utils import load_function
+
+# This file runs a portfolio of search configurations in parallel (one process per configuration) on the same problem instance.
+# Different configurations are fast on different instances (e.g. greedy searches find a solution quickly but not the optimal one),
+# so running them together on a multi-core machine returns the answer of the fastest one.
+# The problem and the initial state are sent to the worker processes so they must be picklable.
+# The searches and the heuristics are given by their dotted names (e.g. "search.AStarSearch") and loaded in the workers,
+# since functions defined in the main script or lambdas can not be sent to another process.
+
+# A search configuration: the search function, the heuristic (None for uninformed searches) and extra keyword arguments
+@dataclass
+class SearchConfig:
+    name: str
+    search: str
+    heuristic: Optional[str] = None
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+# The result of one configuration (the solution is None if it did not find one)
+@dataclass
+class SearchResult:
+    name: str
+    solution: Solution
+    cost: float
+    elapsed: float
+
+# This heuristic is used in the portfolios of the problems that have no heuristic (it can be loaded by name in the workers)
+def zero_heuristic(problem: Problem[S, A], state: S) -> float:
+    return 0
+
+# Returns the default portfolio for a heuristic: A*, greedy best first search, weighted A* and IDA* (with a transposition table)
+def default_configs(heuristic: str) -> List[SearchConfig]:
+    from transposition import TranspositionTable
+    return [
+        SearchConfig("astar", "search.AStarSearch", heuristic),
+        SearchConfig("gbfs", "search.BestFirstSearch", heuristic),
+        SearchConfig("wastar", "search.WeightedAStarSearch", heuristic, {"weight": 2.0}),
+        SearchConfig("idastar", "search.IterativeDeepeningAStar", heuristic, {"table": TranspositionTable(2**18, "depth")}),
+    ]
+
+# Returns the cost of a solution, or None if it is not a valid solution (an action is invalid or it does not end at a goal)
+def solution_cost(problem: Problem[S, A], initial_state: S, solution: Solution) -> Optional[float]:
+    if solution is None:
+        return None
+    cost, state = 0, initial_state
+    try:
+        for action in solution:
+            cost += problem.get_cost(state, action)
+            state = problem.get_successor(state, action)
+    except Exception:
+        return None
+    return cost if problem.is_goal(state) else None
+
+# Runs one configuration and puts (its index, its result, the error message) on the queue (this function is executed in a worker process)
+def _run_config(queue: "multiprocessing.Queue", index: int, problem: Problem[S, A], initial_state: S, config: SearchConfig) -> None:
+    try:
+        start = time.time()
+        search_fn = load_function(config.search, use_local=True)
+        args = (problem, initial_state) if config.heuristic is None else (problem, initial_state, load_function(config.heuristic, use_local=True))
+        solution = search_fn(*args, **config.kwargs)
+        queue.put((index, SearchResult(config.name, solution, float('inf'), time.time() - start), None))
+    except Exception as error:
+        queue.put((index, None, str(error)))
+
+# Stops the worker processes that are still running (the portfolio starts them itself so it can terminate them)
+def _terminate(processes: Dict[int, multiprocessing.Process]) -> None:
+    for process in processes.values():
+        if process.is_alive():
+            process.terminate()
+    for process in processes.values():
+        process.join()
+
+# Runs the configurations in parallel and returns the chosen result and the results of all the configurations that finished.
+# If "best" is False, the first valid solution is returned as soon as it is found.
+# If "best" is True, the searches run until they all finish or the deadline expires, then the cheapest valid solution is returned.
+# If the deadline (in seconds) expires before any valid solution is found, the chosen result is None.
+# The configurations that are still running when the result is chosen are terminated.
+def run_portfolio(problem: Problem[S, A], initial_state: S, configs: List[SearchConfig], deadline: Optional[float] = None,
+                  best: bool = False, workers: Optional[int] = None) -> Tuple[Optional[SearchResult], List[SearchResult]]:
+    end_time = None if deadline is None else time.time() + deadline
+    # By default, every configuration gets its own process (even if there are less cores) so that they all start immediately
+    workers = workers or len(configs)
+    queue = multiprocessing.Queue()
+    running: Dict[int, multiprocessing.Process] = {}
+    waiting = list(range(len(configs)))
+    chosen: Optional[SearchResult] = None
+    finished: List[SearchResult] = []
+    try:
+        while running or waiting:
+            while waiting and len(running) < workers:
+                index = waiting.pop(0)
+                process = multiprocessing.Process(target=_run_config, args=(queue, index, problem, initial_state, configs[index]), daemon=True)
+                process.start()
+                running[index] = process
+            timeout = None if end_time is None else end_time - time.time()
+            if timeout is not None and timeout <= 0:
+                break
+            # The queue is polled so that a worker that died without a result (e.g. killed by the system) is noticed
+            try:
+                index, result, error = queue.get(timeout=0.1 if timeout is None else min(0.1, timeout))
+            except Empty:
+                for index, process in list(running.items()):
+                    if not process.is_alive() and queue.empty():
+                        print(f"Search configuration '{configs[index].name}' failed: the worker exited with code {process.exitcode}")
+                        running.pop(index).join()
+                continue
+            running.pop(index).join()
+            if result is None:
+                print(f"Search configuration '{configs[index].name}' failed: {error}")
+                continue
+            # The solution is checked (and its cost is computed) in the main process
+            cost = solution_cost(problem, initial_state, result.solution)
+            if cost is None:
+                result.solution = None
+            else:
+                result.cost = cost
+            finished.append(result)
+            if result.solution is not None and (chosen is None or result.cost < chosen.cost):
+                chosen = result
+            if chosen is not None and not best:
+                break
+    finally:
+        _terminate(running)
+        queue.close()
+    return chosen, finished
+
+if __name__ == "__main__":
+    import argparse
+    # Run the default portfolio on a problem instance
+    parser = argparse.ArgumentParser(description="Run a portfolio of searches in parallel on a problem instance")
+    parser.add_argument("problem", choices=["sokoban", "parking", "graph"], help="the type of the problem")
+    parser.add_argument("path", help="path to the problem file")
+    parser.add_argument("--heuristic", "-hf", default=None, help="the dotted name of the heuristic (defaults to the problem heuristic)")
+    parser.add_argument("--deadline", "-dl", type=float, default=None, help="the time limit in seconds")
+    parser.add_argument("--best", "-b", action="store_true", help="wait for all the searches (or the deadline) and return the cheapest solution")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="the number of worker processes (defaults to one per configuration)")
+    args = parser.parse_args()
+    if args.problem == "sokoban":
+        from sokoban import SokobanProblem
+        problem, heuristic = SokobanProblem.from_file(args.path), "sokoban_heuristic.strong_heuristic"
+    elif args.problem == "parking":
+        from parking import ParkingProblem
+        problem, heuristic = ParkingProblem.from_file(args.path), "parking_heuristic.parking_heuristic"
+    else:
+        from graph import GraphRoutingProblem
+        problem, heuristic = GraphRoutingProblem.from_file(args.path), "graph.graphrouting_heuristic"
+    start = time.time()
+    chosen, finished = run_portfolio(problem, problem.get_initial_state(), default_configs(args.heuristic or heuristic),
+                                     args.deadline, args.best, args.workers)
+    for result in finished:
+        print(f"{result.name}: cost = {result.cost}, time = {result.elapsed:.3f} seconds")
+    if chosen is None:
+        print("No solution was found")
+    else:
+        print(f"Chosen: {chosen.name} with cost {chosen.cost} in {time.time() - start:.3f} seconds")
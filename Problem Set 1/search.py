@@ -1,9 +1,14 @@
 from problem import HeuristicFunction, Problem, S, A, Solution
 from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import heapq, time
 from helpers.utils import NotImplemented
 
 #Done: Import any modules you want to use
-import heapq
+from frontier import PriorityFrontier
+from transposition import TranspositionTable
+from search_stats import SearchStatistics
+from search_tree import SearchTree
 
 # All search functions take a problem and a state
 # If it is an informed search function, it will also receive a heuristic function
@@ -13,19 +18,50 @@ import heapq
 # 1. A list of actions which represent the path from the initial state to the final state
 # 2. None if there is no solution
 
-def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+# Every search function also accepts an optional SearchStatistics object ("stats") which it fills while searching (see search_stats.py)
+
+# Every search stores a parent pointer (the parent state and the action that generated the state) instead of a copy of the path
+# The solution is rebuilt once by following the parent pointers back from the goal to the initial state
+def _reconstruct_path(parents: Dict[S, Tuple[S, A]], state: S) -> List[A]:
+    path = []
+    parent = parents[state]
+    while parent is not None:
+        state, action = parent
+        path.append(action)
+        parent = parents[state]
+    path.reverse()
+    return path
+
+# Starts filling the statistics (if requested) and returns the heuristic that the search should use (it is timed if the statistics are requested)
+def _start_stats(stats: Optional[SearchStatistics], algorithm: str, heuristic: Optional[HeuristicFunction] = None) -> Optional[HeuristicFunction]:
+    if stats is None:
+        return heuristic
+    stats.start(algorithm)
+    return None if heuristic is None else stats.timed(heuristic)
+
+# Finishes filling the statistics (if requested) and returns the solution.
+# "seen" is the number of distinct states that were reached, so every other generated successor was a duplicate.
+def _finish_stats(stats: Optional[SearchStatistics], solution: Solution, seen: Optional[int] = None) -> Solution:
+    if stats is None:
+        return solution
+    if seen is not None:
+        stats.count_duplicates(seen)
+    return stats.finish(solution)
+
+def BreadthFirstSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStatistics] = None) -> Solution:
     #Done: ADD YOUR CODE HERE
+    _start_stats(stats, "BreadthFirstSearch")
     #My-Comment: check whether the initial state is the Goal
     if problem.is_goal(initial_state):
-        return []
+        return _finish_stats(stats, [], 1)
     #My-Comment: create a queue to store the states
     frontier = deque()
     frontier.append(initial_state)
     #My-Comment: create a set to store the explored states
     explored = set()
-    #My-Comment: dictionary to add the path for each node
-    path = {}
-    path[initial_state] = []
+    #My-Comment: dictionary to add the parent and the action for each node
+    parents = {}
+    parents[initial_state] = None
     #My-Comment: loop until the queue is empty
     while frontier:
         #My-Comment: get the first state from the queue
@@ -35,36 +71,41 @@ def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
         explored.add(node)
         #My-Comment: get all the actions from the current state
         actions = problem.get_actions(node)
+        if stats is not None:
+            stats.expand(len(frontier), len(explored))
         #My-Comment: loop over all the actions
         for action in actions:
             #My-Comment: get the next state from the current state and the action
             child = problem.get_successor(node, action)
+            if stats is not None:
+                stats.generated += 1
             #My-Comment: check whether the state is not explored and not in the queue
-            if child not in explored and child not in path:
-                # add the cation to get this node
-                path[child] = path[node] + [action]
+            if child not in explored and child not in parents:
+                # add the parent and the action to get this node
+                parents[child] = (node, action)
                 #My-Comment: check whether the state is the goal
                 if problem.is_goal(child):
-                    return path[child]
+                    return _finish_stats(stats, _reconstruct_path(parents, child), len(parents))
                 #My-Comment: add it to the queue
                 frontier.append(child)
                 
-    return None
+    return _finish_stats(stats, None, len(parents))
     # NotImplemented()
 
-def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def DepthFirstSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStatistics] = None) -> Solution:
     #Done: ADD YOUR CODE HERE
+    _start_stats(stats, "DepthFirstSearch")
     #My-Comment: check whether the initial state is the Goal
     if problem.is_goal(initial_state):
-        return []
+        return _finish_stats(stats, [], 1)
     #My-Comment: create a queue to store the states
     frontier = deque()
     frontier.append(initial_state)
     #My-Comment: create a set to store the explored states
     explored = set()
-    #My-Comment: dictionary to add the path for each node
-    path = {}
-    path[initial_state] = []
+    #My-Comment: dictionary to add the parent and the action for each node
+    parents = {}
+    parents[initial_state] = None
     #My-Comment: loop until the queue is empty
     while frontier:
         #My-Comment: get the first state from the queue
@@ -72,258 +113,467 @@ def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
         node = frontier.pop()
         #My-Comment: check whether the state is the goal
         if problem.is_goal(node):
-            return path[node]
+            return _finish_stats(stats, _reconstruct_path(parents, node), len(parents))
         #My-Comment: add it to explored nodes
         explored.add(node)
         #My-Comment: get all the actions from the current state
         actions = problem.get_actions(node)
+        if stats is not None:
+            stats.expand(len(frontier), len(explored))
         #My-Comment: loop over all the actions
         for action in actions:
             #My-Comment: get the next state from the current state and the action
             child = problem.get_successor(node, action)
+            if stats is not None:
+                stats.generated += 1
             #My-Comment: check whether the state is not explored and not in the queue
-            if child not in explored and child not in path:
+            if child not in explored and child not in parents:
                 #My-Comment: add it to the queue
                 frontier.append(child)
-                # add the cation to get this node
-                path[child] = path[node] + [action]
+                # add the parent and the action to get this node
+                parents[child] = (node, action)
 
-    return None
+    return _finish_stats(stats, None, len(parents))
     # NotImplemented()
     
 
-def UniformCostSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def UniformCostSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStatistics] = None,
+                      tree: Optional[SearchTree] = None) -> Solution:
     #Done: ADD YOUR CODE HERE
-    #My-Comment: define class for the node
-    class Node:
-        def __init__(self, state, cost, order, path):
-            self.state = state
-            self.cost = cost
-            self.order = order
-            self.path = path
-
-        #My-Comment: Comparison based on cost and order
-        def __gt__(self, other):
-            if self.cost > other.cost:
-                return True
-            if self.cost == other.cost:
-                return self.order > other.order
-            return False
-
-        def __eq__(self, other):
-            return self.state == other.state
-    
+    _start_stats(stats, "UniformCostSearch")
+    #My-Comment: if a search tree is given, reuse the knowledge of the previous searches (see _replanning_search)
+    if tree is not None:
+        return _replanning_search(problem, initial_state, None, tree, stats)
     #My-Comment: check whether the initial state is the Goal
     if problem.is_goal(initial_state):
-        return []
-    #My-Comment: create an empty priroty queue
-    frontier = []
-    #My-Comment: dictionary to add nodes position in priority queue
-    node_positions = {}
-    #My-Comment: To keep track of the order of the nodes entering the
-    order = 0 
-    #My-Comment: create a set to store the explored states
-    explored = set()
-    #My-Comment: create the initial node
-    initial_node = Node(initial_state, 0, order, [])
-    #My-Comment: add the initial node to the queue
-    heapq.heappush(frontier, initial_node)
-    #My-Comment: add the initial node to the dictionary
-    node_positions[initial_state] = initial_node
+        return _finish_stats(stats, [], 1)
+    #My-Comment: create the priority queue, it also keeps the best cost and the parent of every state
+    #My-Comment: the priority of a state is its path cost and ties are broken by the order of entering the queue
+    frontier = PriorityFrontier()
+    #My-Comment: add the initial state to the queue
+    frontier.push(initial_state, 0, 0)
     #My-Comment: loop until the queue is empty
-    while len(frontier):
-        #My-Comment: get the first state from the priority queue
-        node=heapq.heappop(frontier)
-        #My-Comment: remove it from node_position also
-        node_positions.pop(node.state)
+    while frontier:
+        #My-Comment: get the first state from the priority queue (it becomes explored)
+        state_id, state = frontier.pop()
         #My-Comment: check whether the state is the goal
-        if problem.is_goal(node.state):
-            return node.path
-        #My-Comment: add it to explored nodes
-        explored.add(node.state)
+        if problem.is_goal(state):
+            return _finish_stats(stats, frontier.path(state_id), len(frontier.states))
+        path_cost = frontier.g[state_id]
         #My-Comment: get all the actions from the current state
-        actions = problem.get_actions(node.state)
+        actions = problem.get_actions(state)
+        if stats is not None:
+            stats.expand(len(frontier), len(frontier.states) - len(frontier))
         #My-Comment: loop over all the actions
         for action in actions:
             #My-Comment: get the next state from the current state and the action
-            child = problem.get_successor(node.state, action)
-            #My-Comment: get cost, path and order of child and create the node
-            path = node.path + [action]
-            cost = node.cost + problem.get_cost(node.state, action)
-            child_node = Node(child, cost, order, path)
-            order += 1
-            #My-Comment: check whether the state is not explored and not in the queue
-            if child not in explored and child not in node_positions:
-                heapq.heappush(frontier, child_node)
-                node_positions[child] = child_node
-            #My-Comment: check whether the state is in the frontier
-            elif child in node_positions:
-                #My-Comment: compare the costs
-                existing_node = node_positions[child]
-                if child_node < existing_node:
-                    node_positions[child].state = child_node.state
-                    node_positions[child].cost = child_node.cost
-                    node_positions[child].order = child_node.order
-                    node_positions[child].path = child_node.path
-      
-    return None
+            child = problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            #My-Comment: add the child if it is not explored and not in the queue
+            #My-Comment: or decrease its cost if it is in the queue with a higher cost
+            child_cost = path_cost + problem.get_cost(state, action)
+            frontier.push(child, child_cost, child_cost, state_id, action)
+
+    return _finish_stats(stats, None, len(frontier.states))
     # NotImplemented()
 
 
-def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
+def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                stats: Optional[SearchStatistics] = None, tree: Optional[SearchTree] = None) -> Solution:
     #Done: ADD YOUR CODE HERE
-    #My-Comment: define class for the node
-    class Node:
-        def __init__(self, state, path_cost, cost, order, path):
-            self.state = state
-            self.path_cost = path_cost
-            self.cost = cost
-            self.order = order
-            self.path = path
-
-        #My-Comment: Comparison based on cost and order
-        def __gt__(self, other):
-            if self.cost > other.cost:
-                return True
-            if self.cost == other.cost:
-                return self.order > other.order
-            return False
-
-        def __eq__(self, other):
-            return self.state == other.state
-    
+    heuristic = _start_stats(stats, "AStarSearch", heuristic)
+    #My-Comment: if a search tree is given, reuse the knowledge of the previous searches (see _replanning_search)
+    if tree is not None:
+        return _replanning_search(problem, initial_state, heuristic, tree, stats)
     #My-Comment: check whether the initial state is the Goal
     if problem.is_goal(initial_state):
-        return []
-    #My-Comment: create an empty priroty queue
-    frontier = []
-    #My-Comment: dictionary to add nodes position in priority queue
-    node_positions = {}
-    #My-Comment: To keep track of the order of the nodes entering the
-    order = 0 
-    #My-Comment: create a set to store the explored states
-    explored = set()
-    #My-Comment: create the initial node
-    initial_node = Node(initial_state, 0, 0, order, [])
-    #My-Comment: add the initial node to the queue
-    heapq.heappush(frontier, initial_node)
-    #My-Comment: add the initial node to the dictionary
-    node_positions[initial_state] = initial_node
+        return _finish_stats(stats, [], 1)
+    #My-Comment: create the priority queue, it also keeps the best path cost and the parent of every state
+    #My-Comment: the priority of a state is path cost + heuristic and ties are broken by the order of entering the queue
+    frontier = PriorityFrontier()
+    #My-Comment: add the initial state to the queue
+    frontier.push(initial_state, 0, 0)
     #My-Comment: loop until the queue is empty
-    while len(frontier):
-        #My-Comment: get the first state from the priority queue
-        node=heapq.heappop(frontier)
-        #My-Comment: remove it from node_position also
-        node_positions.pop(node.state)
+    while frontier:
+        #My-Comment: get the first state from the priority queue (it becomes explored)
+        state_id, state = frontier.pop()
         #My-Comment: check whether the state is the goal
-        if problem.is_goal(node.state):
-            return node.path
-        #My-Comment: add it to explored nodes
-        explored.add(node.state)
+        if problem.is_goal(state):
+            return _finish_stats(stats, frontier.path(state_id), len(frontier.states))
+        path_cost = frontier.g[state_id]
         #My-Comment: get all the actions from the current state
-        actions = problem.get_actions(node.state)
+        actions = problem.get_actions(state)
+        if stats is not None:
+            stats.expand(len(frontier), len(frontier.states) - len(frontier))
         #My-Comment: loop over all the actions
         for action in actions:
             #My-Comment: get the next state from the current state and the action
-            child = problem.get_successor(node.state, action)
-            #My-Comment: get cost, path and order of child and create the node
-            path = node.path + [action]
-            path_cost = node.path_cost + problem.get_cost(node.state, action)
-            cost = path_cost + heuristic(problem, child)
-            child_node = Node(child, path_cost, cost, order, path)
-            order += 1
-            #My-Comment: check whether the state is not explored and not in the queue
-            if child not in explored and child not in node_positions:
-                heapq.heappush(frontier, child_node)
-                node_positions[child] = child_node
-            #My-Comment: check whether the state is in the frontier
-            elif child in node_positions:
-                #My-Comment: compare the costs
-                existing_node = node_positions[child]
-                if child_node < existing_node:
-                    node_positions[child].state = child_node.state
-                    node_positions[child].path_cost = child_node.path_cost
-                    node_positions[child].cost = child_node.cost
-                    node_positions[child].order = child_node.order
-                    node_positions[child].path = child_node.path
-      
-    return None
+            child = problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            #My-Comment: explored states are never reopened so skip them before computing the heuristic
+            if frontier.is_closed(child):
+                continue
+            #My-Comment: add the child if it is not in the queue or decrease its cost if it is in the queue with a higher cost
+            child_cost = path_cost + problem.get_cost(state, action)
+            frontier.push(child, child_cost + heuristic(problem, child), child_cost, state_id, action)
+
+    return _finish_stats(stats, None, len(frontier.states))
     # NotImplemented()
 
-def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
-    #Done: ADD YOUR CODE HERE
-    #My-Comment: define class for the node
-    class Node:
-        def __init__(self, state, cost, order, path):
-            self.state = state
-            self.cost = cost
-            self.order = order
-            self.path = path
+# This is A* (or UCS if there is no heuristic) that reuses the knowledge of the previous searches stored in the tree (see search_tree.py)
+# and adds the knowledge of this search to it. The heuristic is improved with the learned costs and the search stops as soon as
+# it expands a state on a known solution path (a pseudo-goal), then the known path from this state to the goal is appended.
+# Used by the agents to replan cheaply when they are asked to act in a state that is not on their plan.
+def _replanning_search(problem: Problem[S, A], initial_state: S, heuristic: Optional[HeuristicFunction], tree: SearchTree,
+                       stats: Optional[SearchStatistics]) -> Solution:
+    tree.bind(problem)
+    estimate = tree.heuristic(heuristic)
+    #My-Comment: check whether the initial state is the Goal or it is already on a known solution path
+    if problem.is_goal(initial_state):
+        return _finish_stats(stats, [], 1)
+    known = tree.path_from(initial_state)
+    if known is not None:
+        return _finish_stats(stats, known, 1)
+    frontier = PriorityFrontier()
+    frontier.push(initial_state, estimate(problem, initial_state), 0)
+    distance = tree.distance
+    while frontier:
+        state_id, state = frontier.pop()
+        #My-Comment: stop at a goal or at a pseudo-goal (its cost to the goal is exact so the total cost is the lowest possible)
+        if state in distance or problem.is_goal(state):
+            cost = frontier.g[state_id] + distance.get(state, 0)
+            tree.learn(frontier, state_id, cost)
+            return _finish_stats(stats, frontier.path(state_id) + tree.path_from(state), len(frontier.states))
+        path_cost = frontier.g[state_id]
+        actions = problem.get_actions(state)
+        if stats is not None:
+            stats.expand(len(frontier), len(frontier.states) - len(frontier))
+        for action in actions:
+            child = problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            if frontier.is_closed(child):
+                continue
+            child_cost = path_cost + problem.get_cost(state, action)
+            frontier.push(child, child_cost + estimate(problem, child), child_cost, state_id, action)
+    #My-Comment: none of the reachable states can reach a goal
+    tree.learn_failure(frontier)
+    return _finish_stats(stats, None, len(frontier.states))
 
-        #My-Comment: Comparison based on cost and order
-        def __gt__(self, other):
-            if self.cost > other.cost:
-                return True
-            if self.cost == other.cost:
-                return self.order > other.order
-            return False
+# Weighted A* expands the states in the order of f = g + weight * h. A weight larger than 1 makes the search greedier so it usually
+# finds a solution faster, and with a consistent heuristic the solution costs at most "weight" times the optimal cost.
+def WeightedAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, weight: float = 2.0,
+                        stats: Optional[SearchStatistics] = None) -> Solution:
+    heuristic = _start_stats(stats, "WeightedAStarSearch", heuristic)
+    #My-Comment: check whether the initial state is the Goal
+    if problem.is_goal(initial_state):
+        return _finish_stats(stats, [], 1)
+    #My-Comment: this is the same as A* except that the heuristic is multiplied by the weight in the priority
+    frontier = PriorityFrontier()
+    frontier.push(initial_state, 0, 0)
+    while frontier:
+        state_id, state = frontier.pop()
+        if problem.is_goal(state):
+            return _finish_stats(stats, frontier.path(state_id), len(frontier.states))
+        path_cost = frontier.g[state_id]
+        actions = problem.get_actions(state)
+        if stats is not None:
+            stats.expand(len(frontier), len(frontier.states) - len(frontier))
+        for action in actions:
+            child = problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            if frontier.is_closed(child):
+                continue
+            child_cost = path_cost + problem.get_cost(state, action)
+            frontier.push(child, child_cost + weight * heuristic(problem, child), child_cost, state_id, action)
 
-        def __eq__(self, other):
-            return self.state == other.state
-    
+    return _finish_stats(stats, None, len(frontier.states))
+
+def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                    stats: Optional[SearchStatistics] = None) -> Solution:
+    #Done: ADD YOUR CODE HERE
+    heuristic = _start_stats(stats, "BestFirstSearch", heuristic)
     #My-Comment: check whether the initial state is the Goal
     if problem.is_goal(initial_state):
-        return []
-    #My-Comment: create an empty priroty queue
-    frontier = []
-    #My-Comment: dictionary to add nodes position in priority queue
-    node_positions = {}
-    #My-Comment: To keep track of the order of the nodes entering the
-    order = 0 
-    #My-Comment: create a set to store the explored states
-    explored = set()
-    #My-Comment: create the initial node
-    initial_node = Node(initial_state, 0, order, [])
-    #My-Comment: add the initial node to the queue
-    heapq.heappush(frontier, initial_node)
-    #My-Comment: add the initial node to the dictionary
-    node_positions[initial_state] = initial_node
+        return _finish_stats(stats, [], 1)
+    #My-Comment: create the priority queue, it also keeps the parent of every state
+    #My-Comment: the priority of a state is its heuristic and ties are broken by the order of entering the queue
+    frontier = PriorityFrontier()
+    #My-Comment: add the initial state to the queue
+    frontier.push(initial_state, 0)
     #My-Comment: loop until the queue is empty
-    while len(frontier):
-        #My-Comment: get the first state from the priority queue
-        node=heapq.heappop(frontier)
-        #My-Comment: remove it from node_position also
-        node_positions.pop(node.state)
+    while frontier:
+        #My-Comment: get the first state from the priority queue (it becomes explored)
+        state_id, state = frontier.pop()
         #My-Comment: check whether the state is the goal
-        if problem.is_goal(node.state):
-            return node.path
-        #My-Comment: add it to explored nodes
-        explored.add(node.state)
+        if problem.is_goal(state):
+            return _finish_stats(stats, frontier.path(state_id), len(frontier.states))
         #My-Comment: get all the actions from the current state
-        actions = problem.get_actions(node.state)
+        actions = problem.get_actions(state)
+        if stats is not None:
+            stats.expand(len(frontier), len(frontier.states) - len(frontier))
         #My-Comment: loop over all the actions
         for action in actions:
             #My-Comment: get the next state from the current state and the action
-            child = problem.get_successor(node.state, action)
-            #My-Comment: get cost, path and order of child and create the node
-            path = node.path + [action]
-            cost = heuristic(problem, child)
-            child_node = Node(child, cost, order, path)
-            order += 1
-            #My-Comment: check whether the state is not explored and not in the queue
-            if child not in explored and child not in node_positions:
-                heapq.heappush(frontier, child_node)
-                node_positions[child] = child_node
-            #My-Comment: check whether the state is in the frontier
-            elif child in node_positions:
-                #My-Comment: compare the costs
-                existing_node = node_positions[child]
-                if child_node < existing_node:
-                    node_positions[child].state = child_node.state
-                    node_positions[child].cost = child_node.cost
-                    node_positions[child].order = child_node.order
-                    node_positions[child].path = child_node.path
-      
-    return None
+            child = problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            #My-Comment: the heuristic of a state never changes so only new states are added to the queue
+            if frontier.get_id(child) is not None:
+                continue
+            frontier.push(child, heuristic(problem, child), 0, state_id, action)
+
+    return _finish_stats(stats, None, len(frontier.states))
     # NotImplemented()
-    
\ No newline at end of file
+
+# The bidirectional searches run a forward search from the initial state and a backward search from the goal on the reversed graph
+# and stop once the best path found through a meeting state can not be improved.
+# They require a problem that supports "reverse" (such as GraphRoutingProblem) where the action is the next state.
+def BidirectionalUniformCostSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStatistics] = None) -> Solution:
+    _start_stats(stats, "BidirectionalUniformCostSearch")
+    return _bidirectional_search(problem, initial_state, None, stats)
+
+# The heuristic is evaluated on the forward problem for the forward search and on the reversed problem for the backward search
+# so it must estimate the distance to "problem.goal" (like graphrouting_heuristic). It should be consistent.
+def BidirectionalAStar(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                       stats: Optional[SearchStatistics] = None) -> Solution:
+    heuristic = _start_stats(stats, "BidirectionalAStar", heuristic)
+    return _bidirectional_search(problem, initial_state, heuristic, stats)
+
+def _bidirectional_search(problem: Problem[S, A], initial_state: S, heuristic: Optional[HeuristicFunction],
+                          stats: Optional[SearchStatistics]) -> Solution:
+    #My-Comment: check whether the initial state is the Goal
+    if problem.is_goal(initial_state):
+        return _finish_stats(stats, [], 1)
+    #My-Comment: the backward problem goes from the goal to the initial state over the reversed edges
+    backward_problem = problem.reverse(initial_state)
+    estimate = heuristic or (lambda *_: 0)
+    #My-Comment: create a priority queue for each direction
+    forward, backward = PriorityFrontier(), PriorityFrontier()
+    forward.push(initial_state, estimate(problem, initial_state), 0)
+    backward.push(backward_problem.start, estimate(backward_problem, backward_problem.start), 0)
+    #My-Comment: the cost of the best path found so far and the state where the two searches met on it
+    best_cost, meeting = float('inf'), None
+    #My-Comment: loop until one of the queues is empty
+    while forward and backward:
+        #My-Comment: stop when no unexplored path can be cheaper than the best path
+        #My-Comment: for UCS, every path not found yet costs at least the sum of the lowest costs in both queues
+        #My-Comment: for A*, every path not found yet costs at least the lowest f in each queue (with a consistent heuristic)
+        forward_bound, backward_bound = forward.peek_priority(), backward.peek_priority()
+        bound = forward_bound + backward_bound if heuristic is None else max(forward_bound, backward_bound)
+        if bound >= best_cost:
+            break
+        #My-Comment: expand a state from the direction with the smaller queue
+        if len(forward) <= len(backward):
+            frontier, other, side_problem = forward, backward, problem
+        else:
+            frontier, other, side_problem = backward, forward, backward_problem
+        state_id, state = frontier.pop()
+        path_cost = frontier.g[state_id]
+        actions = side_problem.get_actions(state)
+        if stats is not None:
+            stats.expand(len(forward) + len(backward), len(forward.states) + len(backward.states) - len(forward) - len(backward))
+        for action in actions:
+            child = side_problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            if frontier.is_closed(child):
+                continue
+            child_cost = path_cost + side_problem.get_cost(state, action)
+            frontier.push(child, child_cost + estimate(side_problem, child), child_cost, state_id, action)
+            #My-Comment: if the other search reached this child, we found a path through it
+            other_id = other.get_id(child)
+            if other_id is not None:
+                cost = frontier.g[frontier.get_id(child)] + other.g[other_id]
+                if cost < best_cost:
+                    best_cost, meeting = cost, child
+    #My-Comment: every state is counted once per direction (the roots were not generated)
+    seen = len(forward.states) + len(backward.states) - 1
+    #My-Comment: no path was found
+    if meeting is None:
+        return _finish_stats(stats, None, seen)
+    #My-Comment: join the forward path to the meeting state with the backward path from the meeting state to the goal
+    path = forward.path(forward.get_id(meeting))
+    state_id = backward.parents[backward.get_id(meeting)]
+    while state_id != -1:
+        path.append(backward.states[state_id])
+        state_id = backward.parents[state_id]
+    return _finish_stats(stats, path, seen)
+
+# Iterative Deepening A* runs depth first searches where a state is only expanded if its f = g + h does not exceed a threshold.
+# The first threshold is the heuristic of the initial state, and after every failed iteration the threshold becomes
+# the smallest f that exceeded it. With an admissible heuristic, the first solution found is optimal.
+# It only stores the current path (and an explicit stack of action iterators instead of recursion), so its memory is linear
+# in the solution depth. The cost is that states are searched again in every iteration and along different paths.
+# An optional transposition table (with a bounded capacity) prunes the states reached again in the same iteration.
+def IterativeDeepeningAStar(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                            table: Optional[TranspositionTable] = None, stats: Optional[SearchStatistics] = None) -> Solution:
+    heuristic = _start_stats(stats, "IterativeDeepeningAStar", heuristic)
+    #My-Comment: check whether the initial state is the Goal
+    if problem.is_goal(initial_state):
+        return _finish_stats(stats, [])
+    exhausted = object()
+    threshold = heuristic(problem, initial_state)
+    while threshold < float('inf'):
+        #My-Comment: the smallest f that exceeds the threshold becomes the threshold of the next iteration
+        next_threshold = float('inf')
+        if stats is not None:
+            stats.iterations += 1
+            stats.expand(1, 0 if table is None else len(table))
+        if table is not None:
+            table.new_iteration()
+            table.visit(initial_state, 0)
+        #My-Comment: every stack entry contains a state on the current path, its path cost and the iterator over its remaining actions
+        stack = [(initial_state, 0, iter(problem.get_actions(initial_state)))]
+        path: List[A] = []
+        on_path = {initial_state}
+        while stack:
+            state, path_cost, actions = stack[-1]
+            action = next(actions, exhausted)
+            #My-Comment: all the children were searched, so backtrack
+            if action is exhausted:
+                stack.pop()
+                on_path.discard(state)
+                if path:
+                    path.pop()
+                continue
+            child = problem.get_successor(state, action)
+            if stats is not None:
+                stats.generated += 1
+            #My-Comment: skip the cycles on the current path
+            if child in on_path:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            child_cost = path_cost + problem.get_cost(state, action)
+            f = child_cost + heuristic(problem, child)
+            if f > threshold:
+                if stats is not None:
+                    stats.cutoffs += 1
+                next_threshold = min(next_threshold, f)
+                continue
+            #My-Comment: every solution found in this iteration costs exactly the threshold (since all the cheaper ones were searched before)
+            if problem.is_goal(child):
+                path.append(action)
+                return _finish_stats(stats, path)
+            if table is not None and not table.visit(child, child_cost):
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            path.append(action)
+            on_path.add(child)
+            stack.append((child, child_cost, iter(problem.get_actions(child))))
+            if stats is not None:
+                stats.expand(len(stack), 0 if table is None else len(table))
+        threshold = next_threshold
+    return _finish_stats(stats, None)
+
+# Anytime Repairing A* (ARA*) runs a sequence of weighted A* searches (f = g + w * h) with decreasing weights.
+# The first search (with a large weight) finds a solution quickly, then every next search improves it.
+# The searches reuse each other's effort: the path costs (g) and the parents are kept, and only the states whose
+# path cost improved are searched again. Within one search, a state is expanded at most once and the states whose cost
+# improves after they were expanded are stored in an "inconsistent" list that is added to the queue of the next search.
+# After every search, the cost of the best solution is at most "bound" times the optimal cost where:
+#   bound = min(w, cost of the solution / the smallest g + h in the queue and the inconsistent list)
+# "on_solution" is called with the solution, its cost and its bound every time a search ends with a solution.
+# If the "deadline" (in seconds from the start) expires, the best solution found so far is returned (or None if none was found).
+# With a consistent heuristic and a final weight of 1, the solution returned after all the searches is optimal.
+def AnytimeRepairingAStar(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                          weights: Sequence[float] = (5.0, 3.0, 2.0, 1.5, 1.25, 1.0), deadline: Optional[float] = None,
+                          on_solution: Optional[Callable[[List[A], float, float], None]] = None,
+                          stats: Optional[SearchStatistics] = None) -> Solution:
+    heuristic = _start_stats(stats, "AnytimeRepairingAStar", heuristic)
+    #My-Comment: check whether the initial state is the Goal
+    if problem.is_goal(initial_state):
+        return _finish_stats(stats, [], 1)
+    end_time = None if deadline is None else time.time() + deadline
+    g: Dict[S, float] = {initial_state: 0}
+    h: Dict[S, float] = {initial_state: heuristic(problem, initial_state)}
+    parents: Dict[S, Optional[Tuple[S, A]]] = {initial_state: None}
+    #My-Comment: the queue is a heap of (priority, order, state) where the live priority of every state in the queue is in "queued"
+    #My-Comment: the entries whose priority is not the live one are stale and they are skipped when popped
+    heap: List[Tuple[float, int, S]] = []
+    queued: Dict[S, float] = {}
+    order = 0
+    def push(state: S, weight: float) -> None:
+        nonlocal order
+        priority = g[state] + weight * h[state]
+        queued[state] = priority
+        heapq.heappush(heap, (priority, order, state))
+        order += 1
+    push(initial_state, weights[0])
+    inconsistent: Dict[S, None] = {}
+    goal: Optional[S] = None
+    best_solution: Solution = None
+    for weight in weights:
+        #My-Comment: start a new search with the states whose cost improved since their expansion
+        for state in inconsistent:
+            queued[state] = None
+        inconsistent.clear()
+        states = list(queued)
+        heap.clear()
+        queued.clear()
+        for state in states:
+            push(state, weight)
+        closed = set()
+        if stats is not None:
+            stats.iterations += 1
+        #My-Comment: expand until no state in the queue can lead to a solution that is better than the current one (according to the weight)
+        while heap:
+            if end_time is not None and time.time() >= end_time:
+                return _finish_stats(stats, best_solution, len(g))
+            priority, _, state = heap[0]
+            if queued.get(state) != priority:
+                heapq.heappop(heap)
+                continue
+            if goal is not None and g[goal] <= priority:
+                break
+            heapq.heappop(heap)
+            del queued[state]
+            closed.add(state)
+            path_cost = g[state]
+            actions = problem.get_actions(state)
+            if stats is not None:
+                stats.expand(len(queued), len(closed))
+            for action in actions:
+                child = problem.get_successor(state, action)
+                if stats is not None:
+                    stats.generated += 1
+                child_cost = path_cost + problem.get_cost(state, action)
+                if child_cost >= g.get(child, float('inf')):
+                    continue
+                g[child] = child_cost
+                parents[child] = (state, action)
+                if child not in h:
+                    h[child] = heuristic(problem, child)
+                if problem.is_goal(child):
+                    if goal is None or child_cost < g[goal]:
+                        goal = child
+                    continue
+                #My-Comment: a state is expanded at most once per search, so the improved closed states wait for the next search
+                if child in closed:
+                    if stats is not None:
+                        stats.reopened += 1
+                    inconsistent[child] = None
+                else:
+                    push(child, weight)
+        if goal is None:
+            #My-Comment: the queue is empty and no goal was reached, so there is no solution
+            if not heap:
+                return _finish_stats(stats, None, len(g))
+            continue
+        #My-Comment: record the solution of this search and compute its suboptimality bound
+        #My-Comment: the parents of some states on the path may have improved after the goal was reached (so the path cost can be lower than g[goal])
+        best_solution = _reconstruct_path(parents, goal)
+        cost, state = 0, initial_state
+        for action in best_solution:
+            cost += problem.get_cost(state, action)
+            state = problem.get_successor(state, action)
+        lowest = min((g[state] + h[state] for state in (*queued, *inconsistent)), default=float('inf'))
+        bound = min(weight, cost / lowest) if lowest > 0 else weight
+        if on_solution is not None:
+            on_solution(best_solution, cost, max(bound, 1.0))
+    return _finish_stats(stats, best_solution, len(g))
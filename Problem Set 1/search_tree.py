@@ -0,0 +1,78 @@
+from typing import Callable, Dict, Generic, List, Optional, Tuple
+
+from problem import HeuristicFunction, Problem, S, A
+from frontier import PriorityFrontier
+
+# This is the knowledge kept between the searches of an agent so that replanning (after the agent deviates from its plan)
+# costs a fraction of the first search. It implements the ideas of Adaptive A* and Tree Adaptive A*:
+#   - Learned heuristic: after a search finds a solution with cost C, every expanded state s can not reach the goal
+#     with a cost less than C - g(s) (otherwise the search would have found a cheaper solution through s).
+#     So h(s) = max(h(s), C - g(s)) is still admissible (and consistent if h is consistent) and it is more informed,
+#     which makes the next searches expand fewer states. If a search fails, the expanded states can not reach the goal at all.
+#   - Pseudo-goals: the states on the solution paths know their exact cost to the goal and the actions that lead to it.
+#     A later search that reaches one of them can stop there and append the known path (the exact cost makes this optimal).
+# These rules are only valid if the actions costs and the goals do not change between the searches (which is the case for all
+# the problems in this problem set), so the tree is bound to one problem and it is cleared if it is used with another problem.
+class SearchTree(Generic[S, A]):
+    def __init__(self) -> None:
+        self.problem: Optional[Problem[S, A]] = None
+        self.learned: Dict[S, float] = {}                   # The learned lower bound on the cost to the goal of each expanded state
+        self.distance: Dict[S, float] = {}                  # The exact cost to the goal of the states on the known solution paths
+        self.next: Dict[S, Tuple[A, S]] = {}                # The action (and the next state) from each of these states toward the goal
+
+    def __len__(self) -> int:
+        return len(self.learned)
+
+    # Makes sure the tree belongs to the given problem (the knowledge about another problem is discarded)
+    def bind(self, problem: Problem[S, A]) -> None:
+        if self.problem is not problem:
+            self.problem = problem
+            self.learned.clear()
+            self.distance.clear()
+            self.next.clear()
+
+    # Returns the heuristic improved with the knowledge of the tree (the heuristic can be None for the uninformed searches)
+    def heuristic(self, heuristic: Optional[HeuristicFunction]) -> Callable[[Problem[S, A], S], float]:
+        learned, distance = self.learned, self.distance
+        def improved(problem: Problem[S, A], state: S) -> float:
+            exact = distance.get(state)
+            if exact is not None:
+                return exact
+            value = 0 if heuristic is None else heuristic(problem, state)
+            return max(value, learned.get(state, 0))
+        return improved
+
+    # Returns the known path from the state to the goal, or None if the state is not on a known solution path
+    def path_from(self, state: S) -> Optional[List[A]]:
+        if state not in self.distance:
+            return None
+        path = []
+        step = self.next.get(state)
+        while step is not None:
+            action, state = step
+            path.append(action)
+            step = self.next.get(state)
+        return path
+
+    # Learns from a search that ended at the given state (a goal or a pseudo-goal) with the given solution cost
+    def learn(self, frontier: PriorityFrontier[S, A], state_id: int, cost: float) -> None:
+        learned, open, g = self.learned, frontier.open, frontier.g
+        for expanded_id, state in enumerate(frontier.states):
+            if expanded_id in open:
+                continue
+            value = cost - g[expanded_id]
+            if value > learned.get(state, 0):
+                learned[state] = value
+        states, parents, actions = frontier.states, frontier.parents, frontier.actions
+        self.distance.setdefault(states[state_id], cost - g[state_id])
+        while parents[state_id] != -1:
+            parent_id = parents[state_id]
+            parent = states[parent_id]
+            self.distance[parent] = cost - g[parent_id]
+            self.next[parent] = (actions[state_id], states[state_id])
+            state_id = parent_id
+
+    # Learns from a search that explored all the reachable states without finding a goal
+    def learn_failure(self, frontier: PriorityFrontier[S, A]) -> None:
+        for state in frontier.states:
+            self.learned[state] = float('inf')
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
-from typing import FrozenSet, Iterable
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+from collections import deque
 from enum import Enum
+import random
 
 from mathutils import Direction, Point
 from problem import Problem
-from helpers.utils import track_call_count
+from helpers.instrumentation import track_call_count
 
 # This file contains the definition for the Sokoban problem
 # In this problem, the agent can move Up, Down, Left or Right
@@ -26,13 +28,42 @@ class SokobanTile(str, Enum):
 # we only need the default equality which compares objects by pointers.
 # The layout contains the problem details that are unchangeable across states such as:
 #   The walkable area (locations without walls) and the locations of the goals
+# It also contains the dead squares which are computed once when the layout is created (see compute_pull_distances).
 @dataclass(eq=False, frozen=True)
 class SokobanLayout:
-    __slots__ = ("width", "height", "walkable", "goals")
+    __slots__ = ("width", "height", "walkable", "goals", "dead_squares")
     width: int
     height: int
     walkable: FrozenSet[Point]
     goals: FrozenSet[Point]
+    # "dead_squares" (FrozenSet[Point]) is not a dataclass field since it is computed from the walkable area and the goals
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "dead_squares", self.walkable.difference(compute_pull_distances(self.walkable, self.goals)))
+
+    # A frozen dataclass with __slots__ can not be unpickled by assigning its fields, so it is rebuilt using the constructor
+    def __reduce__(self):
+        return (SokobanLayout, (self.width, self.height, self.walkable, self.goals))
+
+# This function computes the minimum number of pushes needed to move a crate from every square to any of the given targets
+# while ignoring the other crates. It runs a breadth first search backward from the targets where a crate is pulled:
+# a crate at 'c' could have been pushed there from 'c + v' if the player could stand at 'c + 2v' (both are walkable).
+# The squares that are missing from the result can never be pushed to a target.
+# When the targets are the goals, these squares are the dead squares: a crate on them can never reach a goal
+# (and a crate on a dead square can only be pushed to another dead square).
+def compute_pull_distances(walkable: FrozenSet[Point], targets: Iterable[Point]) -> Dict[Point, int]:
+    distances = {target: 0 for target in targets}
+    queue = deque(distances)
+    while queue:
+        crate = queue.popleft()
+        distance = distances[crate] + 1
+        for vector in Direction._Vectors:
+            previous = crate + vector
+            if previous in distances or previous not in walkable or previous + vector not in walkable:
+                continue
+            distances[previous] = distance
+            queue.append(previous)
+    return distances
 
 # For the sokoban state, we use dataclass with frozen=True to automatically implement:
 #   the constructor, the == operator, the hash function and to make the class immutable
@@ -46,6 +77,13 @@ class SokobanState:
     player: Point
     crates: FrozenSet[Point]
 
+    # Returns True if any crate is on a dead square (so the goal can not be reached from this state)
+    def has_dead_crate(self) -> bool:
+        return not self.layout.dead_squares.isdisjoint(self.crates)
+
+    def __reduce__(self):
+        return (SokobanState, (self.layout, self.player, self.crates))
+
     # This operator will convert the state to a string containing the grid representation of the level at the current state
     def __str__(self) -> str:
         def position_to_str(position):
@@ -117,8 +155,9 @@ class SokobanProblem(Problem[SokobanState, Direction]):
         return 1
 
     # Read a sokoban problem from text containing a grid of tiles
+    # If compact is True, the problem will use the compact state representation (see CompactSokobanProblem)
     @staticmethod
-    def from_text(text: str) -> 'SokobanProblem':
+    def from_text(text: str, compact: bool = False) -> 'SokobanProblem':
         walkable, crates, goals =  set(), set(), set()
         player: Point = None
         lines = [line for line in (line.strip() for line in text.splitlines()) if line]
@@ -139,13 +178,305 @@ class SokobanProblem(Problem[SokobanState, Direction]):
                     elif char == SokobanTile.CRATE_ON_GOAL:
                         crates.add(Point(x, y))
                         goals.add(Point(x, y))
-        problem = SokobanProblem()
-        problem.layout = SokobanLayout(width, height, frozenset(walkable), frozenset(goals))
-        problem.initial_state = SokobanState(problem.layout, player, frozenset(crates))
+        layout = SokobanLayout(width, height, frozenset(walkable), frozenset(goals))
+        initial_state = SokobanState(layout, player, frozenset(crates))
+        problem = CompactSokobanProblem(SokobanBoard(layout)) if compact else SokobanProblem()
+        problem.layout = layout
+        problem.initial_state = problem.encode(initial_state) if compact else initial_state
         return problem
 
     # Read a sokoban problem from file containing a grid of tiles
     @staticmethod
-    def from_file(path: str) -> 'SokobanProblem':
+    def from_file(path: str, compact: bool = False) -> 'SokobanProblem':
         with open(path, 'r') as f:
-            return SokobanProblem.from_text(f.read())
\ No newline at end of file
+            return SokobanProblem.from_text(f.read(), compact)
+
+# The sokoban board indexes the walkable cells of a layout so that the compact state can store:
+#   the player as a cell index and the crates as a bitmask over the cell indices (bit 'i' is set if cell 'i' has a crate).
+# It also contains the neighbor table (neighbors[direction][cell] is the neighboring cell index or -1 if it is a wall)
+# and the random keys used for Zobrist hashing: the hash of a state is the XOR of the key of the player cell and
+# the keys of all the crate cells, so it can be updated incrementally in O(1) when the player moves or pushes a crate.
+class SokobanBoard:
+    def __init__(self, layout: SokobanLayout, seed: int = 0) -> None:
+        self.layout = layout
+        self.cells: List[Point] = sorted(layout.walkable, key=lambda point: (point.y, point.x))
+        self.index: Dict[Point, int] = {cell: index for index, cell in enumerate(self.cells)}
+        self.neighbors: List[List[int]] = [
+            [self.index.get(cell + direction.to_vector(), -1) for cell in self.cells]
+            for direction in Direction
+        ]
+        self.goal_mask = self.to_mask(layout.goals)
+        self.dead_mask = self.to_mask(layout.dead_squares)
+        rng = random.Random(seed)
+        self.player_keys = [rng.getrandbits(64) for _ in self.cells]
+        self.crate_keys = [rng.getrandbits(64) for _ in self.cells]
+
+    # Converts a set of points to a bitmask of cell indices
+    def to_mask(self, points: Iterable[Point]) -> int:
+        mask = 0
+        for point in points:
+            mask |= 1 << self.index[point]
+        return mask
+
+    # Converts a bitmask of cell indices to a set of points
+    def to_points(self, mask: int) -> FrozenSet[Point]:
+        cells, points = self.cells, []
+        while mask:
+            lowest = mask & -mask
+            points.append(cells[lowest.bit_length() - 1])
+            mask ^= lowest
+        return frozenset(points)
+
+    # Computes the Zobrist hash of a state from scratch
+    def hash(self, player: int, crates: int) -> int:
+        key = self.player_keys[player]
+        while crates:
+            lowest = crates & -crates
+            key ^= self.crate_keys[lowest.bit_length() - 1]
+            crates ^= lowest
+        return key
+
+# The compact sokoban state stores the player cell index, the crates bitmask and the Zobrist hash.
+# It is much smaller than SokobanState and it is hashed in O(1). Two states are equal if they have the same player and crates.
+# For compatibility with code written for SokobanState (such as the heuristics and printing),
+# it also exposes "layout", "player" and "crates" as points (they are decoded on demand and the crates are decoded once).
+class CompactSokobanState:
+    __slots__ = ("board", "player_index", "crate_mask", "key", "_crates")
+    board: SokobanBoard
+    player_index: int
+    crate_mask: int
+    key: int
+
+    def __init__(self, board: SokobanBoard, player_index: int, crate_mask: int, key: int) -> None:
+        self.board = board
+        self.player_index = player_index
+        self.crate_mask = crate_mask
+        self.key = key
+        self._crates = None
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactSokobanState):
+            return NotImplemented
+        return self.key == other.key and self.player_index == other.player_index and self.crate_mask == other.crate_mask
+
+    # Pickle the state without the decoded crates
+    def __getstate__(self):
+        return (self.board, self.player_index, self.crate_mask, self.key)
+
+    def __setstate__(self, state) -> None:
+        self.board, self.player_index, self.crate_mask, self.key = state
+        self._crates = None
+
+    @property
+    def layout(self) -> SokobanLayout:
+        return self.board.layout
+
+    @property
+    def player(self) -> Point:
+        return self.board.cells[self.player_index]
+
+    @property
+    def crates(self) -> FrozenSet[Point]:
+        if self._crates is None:
+            self._crates = self.board.to_points(self.crate_mask)
+        return self._crates
+
+    # Returns True if any crate is on a dead square (so the goal can not be reached from this state)
+    def has_dead_crate(self) -> bool:
+        return self.crate_mask & self.board.dead_mask != 0
+
+    def __str__(self) -> str:
+        return str(SokobanState(self.layout, self.player, self.crates))
+
+# This is the sokoban problem on compact states
+# It has the same actions, successors and costs as SokobanProblem but the moves are done using the neighbor table and bitwise operations
+class CompactSokobanProblem(SokobanProblem):
+    board: SokobanBoard
+    initial_state: CompactSokobanState
+
+    def __init__(self, board: SokobanBoard) -> None:
+        super().__init__()
+        self.board = board
+
+    # Converts a SokobanState to a CompactSokobanState
+    def encode(self, state: SokobanState) -> CompactSokobanState:
+        board = self.board
+        player, crates = board.index[state.player], board.to_mask(state.crates)
+        return CompactSokobanState(board, player, crates, board.hash(player, crates))
+
+    # Converts a CompactSokobanState to a SokobanState
+    def decode(self, state: CompactSokobanState) -> SokobanState:
+        return SokobanState(self.layout, state.player, state.crates)
+
+    def is_goal(self, state: CompactSokobanState) -> bool:
+        return state.crate_mask == self.board.goal_mask
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @track_call_count
+    def get_actions(self, state: CompactSokobanState) -> Iterable[Direction]:
+        actions = []
+        player, crates = state.player_index, state.crate_mask
+        for direction, neighbors in zip(Direction, self.board.neighbors):
+            position = neighbors[player]
+            # Disallow walking into walls
+            if position < 0: continue
+            # Check if walking into a crate
+            if crates >> position & 1:
+                # make sure that the crate is not pushed into a wall or another crate
+                crate_position = neighbors[position]
+                if crate_position < 0 or crates >> crate_position & 1:
+                    continue
+            actions.append(direction)
+        return actions
+
+    def get_successor(self, state: CompactSokobanState, action: Direction) -> CompactSokobanState:
+        board = self.board
+        neighbors = board.neighbors[action]
+        player, crates = neighbors[state.player_index], state.crate_mask
+        if player < 0:
+            # If we try to walk into a wall, then this action is wrong
+            raise Exception(f"Invalid action {action} in state:" + "\n" + str(state))
+        key = state.key ^ board.player_keys[state.player_index] ^ board.player_keys[player]
+        if crates >> player & 1:
+            crate_position = neighbors[player]
+            if crate_position < 0 or crates >> crate_position & 1:
+                # If we try to push a crate into a wall or another crate, then this action is wrong
+                raise Exception(f"Invalid action {action} in state:" + "\n" + str(state))
+            # If we walk to a crate, we push it
+            crates ^= (1 << player) | (1 << crate_position)
+            key ^= board.crate_keys[player] ^ board.crate_keys[crate_position]
+        return CompactSokobanState(board, player, crates, key)
+
+# A push is a macro action: the player walks (around the crates) to the cell behind the crate then pushes it one cell in the direction
+@dataclass(frozen=True)
+class SokobanPush:
+    crate: Point
+    direction: Direction
+
+    def __str__(self) -> str:
+        return f"{self.crate}{self.direction}"
+
+# This is the sokoban problem where every action is a crate push (the walks between the pushes are not actions).
+# Since the player can walk anywhere in the region that is reachable without pushing a crate, the exact player cell does not matter;
+# so the player in every state is replaced by the canonical cell of its region (the top-left reachable cell).
+# This merges all the states that only differ by a walk, so the search only expands one node per crate configuration and region.
+# Every push costs 1, so the optimal solutions of this problem minimize the number of pushes (not the number of steps).
+# The solutions can be expanded back into player steps (a list of Direction) using "to_steps".
+class SokobanPushProblem(Problem[SokobanState, SokobanPush]):
+    layout: SokobanLayout
+    initial_state: SokobanState
+
+    def __init__(self, layout: SokobanLayout, initial_state: SokobanState) -> None:
+        super().__init__()
+        self.layout = layout
+        # The walkable neighbors of every walkable cell (so the flood fill does not create new points)
+        self.neighbors: Dict[Point, List[Point]] = {
+            cell: [cell + vector for vector in Direction._Vectors if cell + vector in layout.walkable]
+            for cell in layout.walkable
+        }
+        self.initial_state = self.normalize(initial_state)
+
+    def get_initial_state(self) -> SokobanState:
+        return self.initial_state
+
+    def is_goal(self, state: SokobanState) -> bool:
+        return self.layout.goals == state.crates
+
+    # Returns the cells that the player can reach from the given cell without pushing any crate (flood fill)
+    def reachable(self, player: Point, crates: FrozenSet[Point]) -> List[Point]:
+        neighbors = self.neighbors
+        visited, frontier = {player}, [player]
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if neighbor not in visited and neighbor not in crates:
+                    visited.add(neighbor)
+                    frontier.append(neighbor)
+        return frontier
+
+    # Moves the player to the canonical cell of its reachable region
+    def normalize(self, state: SokobanState) -> SokobanState:
+        player = min(self.reachable(state.player, state.crates), key=lambda cell: (cell.y, cell.x))
+        return SokobanState(state.layout, player, state.crates)
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    # A push is allowed if the player can reach the cell behind the crate and the cell in front of the crate is free.
+    # The pushes to a dead square are skipped since the goal can never be reached after them.
+    @track_call_count
+    def get_actions(self, state: SokobanState) -> Iterable[SokobanPush]:
+        walkable, dead_squares, crates = self.layout.walkable, self.layout.dead_squares, state.crates
+        reachable = set(self.reachable(state.player, crates))
+        actions = []
+        for crate in sorted(crates, key=lambda crate: (crate.y, crate.x)):
+            for direction in Direction:
+                vector = direction.to_vector()
+                target = crate + vector
+                if crate - vector not in reachable or target not in walkable or target in crates or target in dead_squares:
+                    continue
+                actions.append(SokobanPush(crate, direction))
+        return actions
+
+    def get_successor(self, state: SokobanState, action: SokobanPush) -> SokobanState:
+        target = action.crate + action.direction.to_vector()
+        if action.crate not in state.crates or target not in self.layout.walkable or target in state.crates:
+            # If we try to push something that is not a crate or push a crate into a wall or another crate, then this action is wrong
+            raise Exception(f"Invalid action {action} in state:" + "\n" + str(state))
+        crates = state.crates.symmetric_difference({action.crate, target})
+        return self.normalize(SokobanState(state.layout, action.crate, crates))
+
+    def get_cost(self, state: SokobanState, action: SokobanPush) -> float:
+        # All pushes have the same cost
+        return 1
+
+    # Expands a list of pushes into the player steps starting from the given (not normalized) state
+    # Between two pushes, the player walks along a shortest path (found by breadth first search) to the cell behind the crate
+    def to_steps(self, state: SokobanState, pushes: List[SokobanPush]) -> List[Direction]:
+        walkable = self.layout.walkable
+        player, crates = state.player, state.crates
+        steps = []
+        for push in pushes:
+            destination = push.crate - push.direction.to_vector()
+            parents = {player: None}
+            queue = deque([player])
+            while queue and destination not in parents:
+                cell = queue.popleft()
+                for direction in Direction:
+                    neighbor = cell + direction.to_vector()
+                    if neighbor not in parents and neighbor in walkable and neighbor not in crates:
+                        parents[neighbor] = (cell, direction)
+                        queue.append(neighbor)
+            if destination not in parents:
+                raise Exception(f"Invalid push {push} from the player position {player}")
+            walk, cell = [], destination
+            while parents[cell] is not None:
+                cell, direction = parents[cell]
+                walk.append(direction)
+            walk.reverse()
+            steps.extend(walk)
+            steps.append(push.direction)
+            player = push.crate
+            crates = crates.symmetric_difference({push.crate, push.crate + push.direction.to_vector()})
+        return steps
+
+    # Creates the push problem for the given sokoban problem starting from the given state
+    @staticmethod
+    def from_problem(problem: SokobanProblem, state: SokobanState) -> 'SokobanPushProblem':
+        if isinstance(problem, CompactSokobanProblem):
+            state = problem.decode(state)
+        return SokobanPushProblem(problem.layout, SokobanState(problem.layout, state.player, state.crates))
+
+# Wraps a search function so that it searches the push problem and returns the solution as player steps.
+# The returned function has the same signature as the search function (with or without a heuristic),
+# so it can be used by the search agents on SokobanProblem.
+# A new push problem is created for every call, so a search tree (see search_tree.py) is not reused between the calls.
+def push_search(search_fn: Callable[..., Optional[List[SokobanPush]]]) -> Callable[..., Optional[List[Direction]]]:
+    def search(problem: SokobanProblem, state: SokobanState, *args: Any, **kwargs: Any) -> Optional[List[Direction]]:
+        push_problem = SokobanPushProblem.from_problem(problem, state)
+        pushes = search_fn(push_problem, push_problem.get_initial_state(), *args, **kwargs)
+        if pushes is None:
+            return None
+        start = SokobanState(problem.layout, state.player, state.crates)
+        return push_problem.to_steps(start, pushes)
+    return search
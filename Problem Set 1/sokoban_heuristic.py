@@ -1,5 +1,8 @@
-from sokoban import SokobanProblem, SokobanState
+from typing import Dict, List, Tuple
+from sokoban import SokobanProblem, SokobanState, compute_pull_distances
 from mathutils import Direction, Point, manhattan_distance
+from assignment import Assignment
+from sokoban_pdb import PatternDatabase
 from helpers.utils import NotImplemented
 
 # This heuristic returns the distance between the player and the nearest crate as an estimate for the path cost
@@ -22,6 +25,7 @@ def strong_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
     # This could be useful if you want to store the results heavy computations that can be cached and used across multiple calls of this function
 
     # My-Comment: I used the cache to store the number of goals in each wall and to cache the state calculated before
+    # My-Comment: The cache may be bounded (see CacheContainer.cache) so any entry can be evicted; everything read from it is computed again if it is missing
     # My-Comment: Initialize the cache for storing computed values
     cache = problem.cache()
 
@@ -30,25 +34,9 @@ def strong_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
         return 0.0
 
     # My-Comment: Check if the state is already in the cache
-    if state in cache:
-        return cache[state]
-    
-    # Calculate how many goal in on wall and cache it
-    if 'y1' not in cache:
-        counter = sum([1 for x in range(1, state.layout.width - 1) if Point(x, 1) in state.layout.goals])
-        cache['y1'] = counter
-
-    if 'y2' not in cache:
-        counter = sum([1 for x in range(1, state.layout.width - 1) if Point(x, state.layout.height - 2) in state.layout.goals])
-        cache['y2'] = counter
-
-    if 'x1' not in cache:
-        counter = sum([1 for y in range(1, state.layout.height - 1) if Point(1, y) in state.layout.goals])
-        cache['x1'] = counter
-
-    if 'x2' not in cache:
-        counter = sum([1 for y in range(1, state.layout.height - 1) if Point(state.layout.width - 2, y) in state.layout.goals])
-        cache['x2'] = counter
+    heuristic_value = cache.get(state)
+    if heuristic_value is not None:
+        return heuristic_value
 
     # My-Comment: check for deadlocks
     if deadlocked(state, problem):
@@ -67,12 +55,140 @@ def strong_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
     # NotImplemented()
 
 
+def get_wall_goal_counts(problem: SokobanProblem) -> Dict[str, int]:
+    """
+    #My-Comment:
+    Return how many goals are on each wall side (the first and last rows and columns inside the walls).
+    They are computed once and stored together in the cache.
+    """
+    cache = problem.cache()
+    counts = cache.get('wall_goals')
+    if counts is None:
+        layout = problem.layout
+        # Calculate how many goal in on wall and cache it
+        counts = {
+            'y1': sum([1 for x in range(1, layout.width - 1) if Point(x, 1) in layout.goals]),
+            'y2': sum([1 for x in range(1, layout.width - 1) if Point(x, layout.height - 2) in layout.goals]),
+            'x1': sum([1 for y in range(1, layout.height - 1) if Point(1, y) in layout.goals]),
+            'x2': sum([1 for y in range(1, layout.height - 1) if Point(layout.width - 2, y) in layout.goals]),
+        }
+        cache['wall_goals'] = counts
+    return counts
+
+
 def compute_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
 
-    # My-Comment: weak heuristic added to it the distances of each crate to its closest goal
-    distance = weak_heuristic(problem, state) + sum(min(manhattan_distance(crate, goal)
-                                                        for goal in problem.layout.goals) for crate in state.crates)
-    return distance
+    # My-Comment: weak heuristic added to it the minimum number of pushes needed to move every crate to a different goal
+    # My-Comment: Only one of them can change in a step (either the player walks or it pushes a crate while staying next to it)
+    # My-Comment: and each of them changes by at most 1, so the sum is still consistent
+    # My-Comment: If a pattern database was built for this layout, take the maximum of both estimates (both are consistent)
+    return weak_heuristic(problem, state) + max(matching_heuristic(problem, state), pattern_heuristic(problem, state))
+
+
+def pattern_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
+    """
+    #My-Comment:
+    Return the pattern database estimate of the number of pushes (see sokoban_pdb.py).
+    The database is loaded once from the file of this layout (if it was built offline) and stored in the cache.
+    If no database was built for this layout, it returns 0.
+    """
+    cache = problem.cache()
+    if 'pattern_database' in cache:
+        database = cache['pattern_database']
+    else:
+        database = PatternDatabase.load(problem.layout)
+        cache['pattern_database'] = database
+    if database is None:
+        return 0
+    return database.lookup(state.crates, state.player)
+
+
+def get_matching_tables(problem: SokobanProblem) -> Tuple[List[Dict[Point, int]], int, Dict[Point, Tuple[int, ...]]]:
+    """
+    #My-Comment:
+    Return the push distance maps (one per goal), the cost used for the unreachable goals and the cost rows of the crates seen so far.
+    They are computed once per layout and stored together in the cache so they are always evicted together.
+    """
+    cache = problem.cache()
+    tables = cache.get('matching_tables')
+    if tables is None:
+        # My-Comment: Compute one push distance map per goal by pulling a crate backward from this goal only
+        layout = problem.layout
+        goals = sorted(layout.goals, key=lambda goal: (goal.y, goal.x))
+        # My-Comment: The cost of an unreachable goal is larger than the cost of any possible assignment
+        tables = ([compute_pull_distances(layout.walkable, [goal]) for goal in goals], len(layout.walkable) * len(goals) + 1, {})
+        cache['matching_tables'] = tables
+    return tables
+
+
+def get_crate_costs(problem: SokobanProblem, crate: Point) -> Tuple[int, ...]:
+    """
+    #My-Comment:
+    Return the minimum number of pushes needed to move the crate to each goal (ignoring the other crates).
+    If a goal can not be reached from the crate, its cost is larger than the cost of any possible assignment.
+    """
+    goal_distances, unreachable, crate_costs = get_matching_tables(problem)
+    costs = crate_costs.get(crate)
+    if costs is None:
+        costs = tuple(distances.get(crate, unreachable) for distances in goal_distances)
+        crate_costs[crate] = costs
+    return costs
+
+
+def matching_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
+    """
+    #My-Comment:
+    Return the minimum total number of pushes needed to move every crate to a different goal (ignoring the other crates).
+    It is the cost of the minimum cost assignment between the crates and the goals where the cost of an edge is a push distance.
+    It is admissible since every crate must end on a different goal and every push costs at least one step.
+    It returns infinity if there is no assignment where every crate can reach its goal.
+    The assignment depends only on the crates so it is cached for each crate configuration (with the key ('assignment', crates)).
+    When a configuration is new, the assignment of the configuration before the last push (if it is cached) is repaired
+    instead of solving it from scratch.
+    """
+    cache = problem.cache()
+    crates = state.crates
+    unreachable = get_matching_tables(problem)[1]
+    entry = cache.get(('assignment', crates))
+    if entry is None:
+        entry = repair_assignment(problem, state)
+        if entry is None:
+            # My-Comment: No previous assignment is cached so solve it from scratch
+            rows = list(crates)
+            assignment = Assignment(len(problem.layout.goals))
+            if len(rows) > assignment.column_count:
+                return float('inf')
+            for crate in rows:
+                assignment.add_row(get_crate_costs(problem, crate))
+            entry = (rows, assignment)
+        cache[('assignment', crates)] = entry
+    total = entry[1].total()
+    return float('inf') if total >= unreachable else total
+
+
+def repair_assignment(problem: SokobanProblem, state: SokobanState) -> Tuple[List[Point], Assignment]:
+    """
+    #My-Comment:
+    If the player just pushed a crate, the crate is next to the player and it was on the player's location before the push.
+    So, for every crate next to the player, check if the configuration before this push is cached and
+    repair its assignment by only replacing the row of the pushed crate. It returns None if no configuration was found.
+    """
+    cache = problem.cache()
+    crates = state.crates
+    for direction in Direction:
+        crate = state.player + direction.to_vector()
+        if crate not in crates:
+            continue
+        previous = cache.get(('assignment', crates.difference((crate,)).union((state.player,))))
+        if previous is None:
+            continue
+        rows = previous[0].copy()
+        row = rows.index(state.player)
+        rows[row] = crate
+        assignment = previous[1].copy()
+        assignment.replace_row(row, get_crate_costs(problem, crate))
+        return rows, assignment
+    return None
 
 
 def deadlocked(state: SokobanState, problem: SokobanProblem) -> bool:
@@ -81,6 +197,9 @@ def deadlocked(state: SokobanState, problem: SokobanProblem) -> bool:
     Check if the state is deadlocked.
     A state is deadlocked if there is a crate that cannot be moved to a goal.
     """
+    # My-Comment: Check if any crate is on a dead square (precomputed once for the layout so it is a set/bitmask lookup)
+    if state.has_dead_crate():
+        return True
     # Check if there is a crate that is not on a goal
     counter_crates_y1 = 0
     counter_crates_y2 = 0
@@ -103,9 +222,9 @@ def deadlocked(state: SokobanState, problem: SokobanProblem) -> bool:
             counter_crates_y2 += 1
             
 
-    cache = problem.cache()
+    counts = get_wall_goal_counts(problem)
     # Check if number of goals is less than number of crates on each side walls
-    if cache['y1'] < counter_crates_y1 or cache['y2'] < counter_crates_y2 or cache['x1'] < counter_crates_x1 or cache['x2'] < counter_crates_x2:
+    if counts['y1'] < counter_crates_y1 or counts['y2'] < counter_crates_y2 or counts['x1'] < counter_crates_x1 or counts['x2'] < counter_crates_x2:
         return True
 
     return False
@@ -116,54 +235,11 @@ def is_deadlocked(state: SokobanState, crate: Point) -> bool:
     #My-Comment:
     Check if the crate is deadlocked.
     A crate is deadlocked if it cannot be moved to a goal.
+    The crates on dead squares (corners, walls without goals and dead corridors) are already
+    detected using the layout's dead squares, so only the deadlocks caused by other crates are checked here.
     """
-    # My-Comment: Check if the crate is in a corner
-    if is_corner(state, crate):
-        return True
-
-    # My-Comment: Check if the crate is on a wall side and stuck
-    if is_on_wall(state, crate):
-        return True
-
-    return False
-
-
-def is_corner(state: SokobanState, crate: Point) -> bool:
-    """
-    #My-Comment:
-    Check if the crate is in a corner.
-    A crate is in a corner if it has a wall in 2 adjacent directions.
-    """
-    # My-Comment: Check all four corners around the crate
-    directions = [Direction.UP, Direction.LEFT,
-                  Direction.DOWN, Direction.RIGHT]
-    for i in range(4):
-        dir1 = directions[i]
-        # My-Comment: Get the next direction in the list, wrapping around to the start
-        dir2 = directions[(i+1) % 4]
-        if crate + dir1.to_vector() not in state.layout.walkable and crate + dir2.to_vector() not in state.layout.walkable:
-            return True
-        
-    return False
-
-
-def is_on_wall(state: SokobanState, crate: Point) -> bool:
-    """
-    #My-Comment:
-    Check if the crate is on a wall side and stuck.
-    A crate is on a wall if it is stuck due to other crate or ther is no goal on this wall then deadlock.
-    """
-    # My-Comment: Check if the crate is on a side of the grid
-    if not is_corridor_of_side(state, crate):
-        return False
-        
-    # My-Comment: Check if there is a wall on one side of the corridor and crate in one of the adjacent side
-    if is_wall_on_one_side_and_stuck(state, crate):
-        return True
-
-
-    # My-Comment: Check if there is a wall on one side of the corridor and there is no goal
-    if is_wall_on_one_side(state, crate):
+    # My-Comment: Check if the crate is on a wall side and stuck due to another crate
+    if is_corridor_of_side(state, crate) and is_wall_on_one_side_and_stuck(state, crate):
         return True
 
     return False
@@ -223,39 +299,3 @@ def is_corridor_of_side(state: SokobanState, crate: Point) -> bool:
         return True
 
     return False
-
-
-def is_wall_on_one_side(state: SokobanState, crate: Point) -> bool:
-    """
-    #My-Comment:
-    Check if there is a wall on one side of the corridor and there is no goal.
-    """
-    # My-Comment: Check if the crate is in the top corridor
-    if crate.y == 1:
-        # My-Comment: check if there is goal on this line then return false
-        for goal in state.layout.goals:
-            if goal.y == 1:
-                return False
-
-    # My-Comment: Check if the crate is in the bottom corridor
-    if crate.y == (state.layout.height - 2):
-        # My-Comment: check if there is goal on this line then return false
-        for goal in state.layout.goals:
-            if goal.y == (state.layout.height - 2):
-                return False
-
-    # My-Comment: Check if the crate is in the left corridor
-    if crate.x == 1:
-        # My-Comment: check if there is goal on this line then return false
-        for goal in state.layout.goals:
-            if goal.x == 1:
-                return False
-
-    # My-Comment: Check if the crate is in the right corridor
-    if crate.x == (state.layout.width - 2):
-        # My-Comment: check if there is goal on this line then return false
-        for goal in state.layout.goals:
-            if goal.x == (state.layout.width - 2):
-                return False
-
-    return True
@@ -0,0 +1,243 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+import hashlib, os, struct
+
+from sokoban import SokobanBoard, SokobanLayout
+from mathutils import Point
+
+# This file contains the pattern databases (PDB) for the sokoban problem.
+# A pattern database of size 's' stores, for every placement of 's' crates and every player cell, the exact minimum number
+# of pushes needed to move these 's' crates to any 's' goals when all the other crates are removed from the level.
+# The tables are built offline by a retrograde breadth first search that starts from the goal placements and pulls the crates.
+# Removing crates never makes a push impossible, so the value of a pattern is a lower bound on the pushes of its crates
+# in the full level, and the values of disjoint patterns can be added. The heuristic is the maximum over the
+# partitions of the crates into disjoint patterns of the sum of the pattern values (see PatternDatabase.lookup).
+# Since a step only changes the value of the pattern that contains the pushed crate (and by at most one push),
+# the heuristic is consistent.
+
+# The binary file starts with a header followed by one table per pattern size (1 to max_size).
+# The table of size 's' contains comb(cell_count, s) * cell_count bytes: the entry of a placement and a player cell
+# is at rank(placement) * cell_count + player where rank is the colexicographic rank of the sorted cell indices.
+# The value 255 means that the goals can not be reached (or that the player is on a crate).
+_MAGIC = b"SPDB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIII20s")
+UNREACHABLE = 255
+
+# Returns a hash that identifies the layout (the walkable cells and the goals)
+def layout_hash(layout: SokobanLayout) -> bytes:
+    key = lambda point: (point.y, point.x)
+    text = ';'.join(
+        ','.join(f"{point.x}:{point.y}" for point in sorted(points, key=key))
+        for points in (layout.walkable, layout.goals)
+    )
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+# Returns the path where the pattern database of a layout is saved (the file name is the layout hash)
+def pdb_path(layout: SokobanLayout, directory: Optional[str] = None) -> str:
+    if directory is None:
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdbs")
+    return os.path.join(directory, layout_hash(layout).hex() + ".pdb")
+
+# Returns the colexicographic rank of a sorted tuple of cell indices
+def rank(cells: Sequence[int]) -> int:
+    return sum(comb(cell, index + 1) for index, cell in enumerate(cells))
+
+# Returns the cells that the player can reach from the given cell without pushing any of the crates (flood fill)
+def _region(neighbors: List[List[int]], player: int, crates: Tuple[int, ...]) -> List[int]:
+    visited, frontier = {player}, [player]
+    for cell in frontier:
+        for direction_neighbors in neighbors:
+            neighbor = direction_neighbors[cell]
+            if neighbor >= 0 and neighbor not in visited and neighbor not in crates:
+                visited.add(neighbor)
+                frontier.append(neighbor)
+    return frontier
+
+# Builds the table of one pattern size starting from the given goal placements.
+# The search state is a placement (sorted cell indices) and the canonical cell (the smallest index) of the player region.
+# A pull moves a crate from 'c' to 'c + v' while the player moves from 'c + v' to 'c + 2v', which is the reverse of a push.
+# This is a module level function that only uses integers so that it can be sent to the worker processes.
+def _build_table(neighbors: List[List[int]], cell_count: int, starts: List[Tuple[int, ...]]) -> bytearray:
+    size = len(starts[0]) if starts else 0
+    table = bytearray([UNREACHABLE]) * (comb(cell_count, size) * cell_count)
+    seen = set()
+    frontier: List[Tuple[Tuple[int, ...], int]] = []
+    for crates in starts:
+        covered = set(crates)
+        for cell in range(cell_count):
+            if cell in covered: continue
+            region = _region(neighbors, cell, crates)
+            covered.update(region)
+            state = (crates, min(region))
+            if state not in seen:
+                seen.add(state)
+                frontier.append(state)
+    distance = 0
+    while frontier:
+        next_frontier = []
+        value = min(distance, UNREACHABLE - 1)
+        for crates, player in frontier:
+            region = _region(neighbors, player, crates)
+            # Every state is expanded once (at its distance) and the player regions of a placement are disjoint
+            offset = rank(crates) * cell_count
+            for cell in region:
+                table[offset + cell] = value
+            reachable = set(region)
+            for index, crate in enumerate(crates):
+                for direction_neighbors in neighbors:
+                    position = direction_neighbors[crate]
+                    if position not in reachable: continue
+                    behind = direction_neighbors[position]
+                    if behind < 0 or behind in crates: continue
+                    pulled = tuple(sorted(crates[:index] + (position,) + crates[index+1:]))
+                    state = (pulled, min(_region(neighbors, behind, pulled)))
+                    if state not in seen:
+                        seen.add(state)
+                        next_frontier.append(state)
+        frontier = next_frontier
+        distance += 1
+    return table
+
+class PatternDatabase:
+    def __init__(self, board: SokobanBoard, tables: List[bytes], signature: bytes) -> None:
+        self.board = board
+        self.tables = tables          # tables[s-1] is the table of the patterns of size 's'
+        self.signature = signature
+
+    @property
+    def max_size(self) -> int:
+        return len(self.tables)
+
+    @property
+    def size_in_bytes(self) -> int:
+        return sum(len(table) for table in self.tables)
+
+    # Returns the value of a pattern (a sorted tuple of cell indices) for the given player cell (255 if the goals are unreachable)
+    def value(self, crates: Tuple[int, ...], player: int) -> int:
+        return self.tables[len(crates)-1][rank(crates) * len(self.board.cells) + player]
+
+    # Returns the maximum over the partitions of the crates into patterns of the sum of the pattern values
+    # (or infinity if any pattern can not reach the goals).
+    # The partitions are enumerated by a dynamic program over the bitmask of the remaining crates:
+    # the lowest remaining crate is grouped with every choice of up to (max_size - 1) other remaining crates.
+    # All the group sizes are tried so that the set of partitions does not depend on the order of the cells
+    # (otherwise, the heuristic could drop by more than one push when a crate moves before another one in the cell order).
+    def lookup(self, crates: Iterable[Point], player: Point) -> float:
+        index = self.board.index
+        cells = sorted(index[crate] for crate in crates)
+        player_cell = index[player]
+        memo: Dict[int, float] = {0: 0}
+        def best(mask: int) -> float:
+            result = memo.get(mask)
+            if result is not None:
+                return result
+            members = [bit for bit in range(len(cells)) if mask >> bit & 1]
+            first, others = members[0], members[1:]
+            result = -1
+            for size in range(min(self.max_size, len(members)), 0, -1):
+                for group in combinations(others, size - 1):
+                    value = self.value(tuple(cells[bit] for bit in (first, *group)), player_cell)
+                    if value == UNREACHABLE:
+                        memo[mask] = float('inf')
+                        return float('inf')
+                    rest = mask & ~(1 << first)
+                    for bit in group:
+                        rest &= ~(1 << bit)
+                    result = max(result, value + best(rest))
+            memo[mask] = result
+            return result
+        return best((1 << len(cells)) - 1)
+
+    # Builds the pattern databases of sizes 1 to max_size for a layout.
+    # The goal placements of every size are split into chunks that are searched in parallel by a process pool,
+    # then the tables of the chunks are combined by taking the minimum (the distance from the nearest goal placement).
+    @staticmethod
+    def build(layout: SokobanLayout, max_size: int = 2, workers: Optional[int] = None) -> 'PatternDatabase':
+        board = SokobanBoard(layout)
+        cell_count = len(board.cells)
+        goals = sorted(board.index[goal] for goal in layout.goals)
+        sizes = range(1, min(max_size, len(goals)) + 1)
+        workers = workers or os.cpu_count() or 1
+        tables = []
+        with ProcessPoolExecutor(workers) if workers > 1 else _InlineExecutor() as executor:
+            for size in sizes:
+                starts = list(combinations(goals, size))
+                chunks = [starts[index::workers] for index in range(min(workers, len(starts)))]
+                futures = [executor.submit(_build_table, board.neighbors, cell_count, chunk) for chunk in chunks]
+                table = bytearray(futures[0].result())
+                for future in futures[1:]:
+                    other = future.result()
+                    for position, value in enumerate(other):
+                        if value < table[position]:
+                            table[position] = value
+                tables.append(bytes(table))
+        return PatternDatabase(board, tables, layout_hash(layout))
+
+    # Saves the pattern database into the binary format
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.max_size, len(self.board.cells), self.signature))
+            for table in self.tables:
+                f.write(table)
+
+    # Loads the pattern database of a layout. It returns None if the file does not exist or if it was built for a different layout.
+    @staticmethod
+    def load(layout: SokobanLayout, path: Optional[str] = None) -> Optional['PatternDatabase']:
+        path = path or pdb_path(layout)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, max_size, cell_count, signature = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION or signature != layout_hash(layout):
+            return None
+        board = SokobanBoard(layout)
+        if cell_count != len(board.cells):
+            return None
+        tables, position = [], _HEADER.size
+        for size in range(1, max_size + 1):
+            length = comb(cell_count, size) * cell_count
+            tables.append(data[position:position+length])
+            position += length
+        return PatternDatabase(board, tables, signature)
+
+# A stand-in for the process pool that runs the tasks in the current process (used when there is a single worker)
+class _InlineExecutor:
+    class _Result:
+        def __init__(self, value) -> None:
+            self.value = value
+        def result(self):
+            return self.value
+
+    def __enter__(self) -> '_InlineExecutor':
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    def submit(self, fn, *args) -> '_InlineExecutor._Result':
+        return _InlineExecutor._Result(fn(*args))
+
+if __name__ == "__main__":
+    import argparse, time
+    from sokoban import SokobanProblem
+    # Build the pattern databases for the given levels offline
+    parser = argparse.ArgumentParser(description="Build the sokoban pattern databases")
+    parser.add_argument("levels", nargs="+", help="paths to the sokoban levels")
+    parser.add_argument("--size", "-k", type=int, default=2, help="the maximum number of crates in a pattern")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="the number of worker processes (defaults to the cpu count)")
+    parser.add_argument("--output", "-o", default=None, help="the directory where the databases are saved")
+    args = parser.parse_args()
+    for level in args.levels:
+        start = time.time()
+        layout = SokobanProblem.from_file(level).layout
+        database = PatternDatabase.build(layout, args.size, args.workers)
+        path = pdb_path(layout, args.output)
+        database.save(path)
+        print(f"{level}: patterns up to size {database.max_size}, {database.size_in_bytes} bytes in {time.time() - start:.3f} seconds -> {path}")
@@ -0,0 +1,22 @@
+import glob, os, sys
+
+# The modules of the problem set are imported by their top-level names (like the autograder does),
+# so the problem set directory is added to the path. Run the tests from the problem set directory: python -m pytest tests
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# The bundled graph files (the tests import these helpers with "from conftest import ...")
+GRAPHS = sorted(glob.glob(os.path.join(ROOT, "graphs", "*.json")))
+
+# Returns the cost of following the solution from the initial state (None if there is no solution).
+# Unlike portfolio.solution_cost, it fails the test if the solution does not reach the goal.
+def path_cost(problem, initial_state, solution):
+    if solution is None:
+        return None
+    cost, state = 0, initial_state
+    for action in solution:
+        cost += problem.get_cost(state, action)
+        state = problem.get_successor(state, action)
+    assert problem.is_goal(state)
+    return cost
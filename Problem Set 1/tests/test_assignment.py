@@ -0,0 +1,41 @@
+from itertools import permutations
+import random
+import pytest
+
+from assignment import Assignment
+
+def brute_force(costs, column_count):
+    return min(sum(row[column] for row, column in zip(costs, columns)) for columns in permutations(range(column_count), len(costs)))
+
+def check(assignment: Assignment, costs, column_count):
+    columns = assignment.columns()
+    assert len(set(columns)) == len(columns)
+    assert assignment.total() == pytest.approx(sum(row[column] for row, column in zip(costs, columns)))
+    assert assignment.total() == pytest.approx(brute_force(costs, column_count))
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    column_count = rng.randint(1, 6)
+    row_count = rng.randint(1, column_count)
+    costs = [[rng.randint(0, 20) for _ in range(column_count)] for _ in range(row_count)]
+    assignment = Assignment(column_count)
+    for row in costs:
+        assignment.add_row(row)
+    check(assignment, costs, column_count)
+
+@pytest.mark.parametrize("seed", range(50))
+def test_replace_row_matches_brute_force(seed):
+    rng = random.Random(seed)
+    column_count = rng.randint(1, 6)
+    # Both the square case (the exact repair) and the rectangular case (solved again) are covered
+    row_count = column_count if seed % 2 == 0 else rng.randint(1, column_count)
+    costs = [[rng.randint(0, 20) for _ in range(column_count)] for _ in range(row_count)]
+    assignment = Assignment(column_count)
+    for row in costs:
+        assignment.add_row(row)
+    for _ in range(5):
+        row = rng.randrange(row_count)
+        costs[row] = [rng.randint(0, 20) for _ in range(column_count)]
+        assignment.replace_row(row, costs[row])
+        check(assignment, costs, column_count)
@@ -0,0 +1,38 @@
+import os, random
+import pytest
+
+from conftest import GRAPHS, path_cost
+from graph import GraphNode, GraphRoutingProblem, graphrouting_heuristic
+from mathutils import Point
+from search import AStarSearch, BidirectionalAStar, BidirectionalUniformCostSearch, UniformCostSearch
+
+def random_graph(seed: int, size: int = 30, edges: int = 60) -> GraphRoutingProblem:
+    rng = random.Random(seed)
+    nodes = [GraphNode(f"n{index}", Point(rng.randint(0, 20), rng.randint(0, 20))) for index in range(size)]
+    adjacency = {node: [] for node in nodes}
+    for _ in range(edges):
+        a, b = rng.sample(nodes, 2)
+        if b not in adjacency[a]:
+            adjacency[a].append(b)
+    for adjacent in adjacency.values():
+        adjacent.sort(key=lambda node: node.name)
+    return GraphRoutingProblem(nodes[0], nodes[-1], adjacency)
+
+PROBLEMS = [pytest.param(lambda path=path: GraphRoutingProblem.from_file(path), id=os.path.basename(path)) for path in GRAPHS]
+PROBLEMS += [pytest.param(lambda seed=seed: random_graph(seed), id=f"random{seed}") for seed in range(20)]
+
+@pytest.mark.parametrize("create", PROBLEMS)
+def test_bidirectional_ucs_matches_ucs(create):
+    problem = create()
+    initial_state = problem.get_initial_state()
+    expected = path_cost(problem, initial_state, UniformCostSearch(problem, initial_state))
+    cost = path_cost(problem, initial_state, BidirectionalUniformCostSearch(problem, initial_state))
+    assert cost == pytest.approx(expected) if expected is not None else cost is None
+
+@pytest.mark.parametrize("create", PROBLEMS)
+def test_bidirectional_astar_matches_astar(create):
+    problem = create()
+    initial_state = problem.get_initial_state()
+    expected = path_cost(problem, initial_state, AStarSearch(problem, initial_state, graphrouting_heuristic))
+    cost = path_cost(problem, initial_state, BidirectionalAStar(problem, initial_state, graphrouting_heuristic))
+    assert cost == pytest.approx(expected) if expected is not None else cost is None
@@ -0,0 +1,34 @@
+import os, pickle
+import pytest
+
+from conftest import GRAPHS
+from csr_graph import CSRGraph, CSRGraphRoutingProblem, csr_graphrouting_heuristic
+from search import AStarSearch
+
+def assert_same_graph(graph: CSRGraph, other: CSRGraph):
+    assert list(other.names) == list(graph.names)
+    assert list(other.offsets) == list(graph.offsets)
+    assert list(other.neighbors) == list(graph.neighbors)
+    assert list(other.weights) == list(graph.weights)
+    assert list(other.positions) == list(graph.positions)
+    assert (other.start, other.goal) == (graph.start, graph.goal)
+    assert (other.node_count, other.edge_count) == (graph.node_count, graph.edge_count)
+
+@pytest.mark.parametrize("path", GRAPHS, ids=os.path.basename)
+def test_save_load_roundtrip(path, tmp_path):
+    graph = CSRGraph.from_json(path)
+    binary = str(tmp_path / "graph.csr")
+    graph.save(binary)
+    loaded = CSRGraph.from_file(binary)
+    assert_same_graph(graph, loaded)
+    # A memory-mapped graph is copied into arrays when pickled
+    assert_same_graph(graph, pickle.loads(pickle.dumps(loaded)))
+
+@pytest.mark.parametrize("path", GRAPHS, ids=os.path.basename)
+def test_loaded_graph_gives_the_same_solution(path, tmp_path):
+    binary = str(tmp_path / "graph.csr")
+    CSRGraph.from_json(path).save(binary)
+    problem, loaded = CSRGraphRoutingProblem.from_file(path), CSRGraphRoutingProblem.from_file(binary)
+    expected = AStarSearch(problem, problem.get_initial_state(), csr_graphrouting_heuristic)
+    solution = AStarSearch(loaded, loaded.get_initial_state(), csr_graphrouting_heuristic)
+    assert solution == expected
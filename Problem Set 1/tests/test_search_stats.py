@@ -0,0 +1,29 @@
+import os
+import pytest
+
+from conftest import ROOT
+from graph import GraphRoutingProblem, graphrouting_heuristic
+from search import AStarSearch, BreadthFirstSearch, UniformCostSearch
+from search_stats import SearchStatistics
+
+SEARCHES = [
+    pytest.param(lambda problem, state, stats: BreadthFirstSearch(problem, state, stats), id="bfs"),
+    pytest.param(lambda problem, state, stats: UniformCostSearch(problem, state, stats), id="ucs"),
+    pytest.param(lambda problem, state, stats: AStarSearch(problem, state, graphrouting_heuristic, stats=stats), id="astar"),
+]
+
+# When an agent replans, it fills the same statistics with several searches, so every counter must add up
+@pytest.mark.parametrize("search", SEARCHES)
+def test_shared_statistics_add_up(search):
+    problem = GraphRoutingProblem.from_file(os.path.join(ROOT, "graphs", "graph1.json"))
+    state = problem.get_initial_state()
+    single = SearchStatistics()
+    search(problem, state, single)
+    shared = SearchStatistics()
+    search(problem, state, shared)
+    search(problem, state, shared)
+    assert shared.searches == 2
+    assert shared.expanded == 2 * single.expanded
+    assert shared.generated == 2 * single.generated
+    assert shared.duplicates == 2 * single.duplicates
+    assert 0 <= single.duplicates <= single.generated
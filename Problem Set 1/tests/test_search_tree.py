@@ -0,0 +1,43 @@
+import os, random
+import pytest
+
+from conftest import GRAPHS, ROOT, path_cost
+from graph import GraphRoutingProblem
+from sokoban import SokobanProblem
+from sokoban_heuristic import strong_heuristic
+from search import AStarSearch, UniformCostSearch
+from search_tree import SearchTree
+
+# Follows the plan and, at a few random steps, takes another action to leave the plan, then replans with the tree.
+# Every replanned solution must cost the same as a fresh search from the same state.
+@pytest.mark.parametrize("level", ["level1.txt", "level2.txt"])
+def test_replanning_with_tree_matches_fresh_astar(level):
+    problem = SokobanProblem.from_file(os.path.join(ROOT, "levels", level))
+    rng = random.Random(0)
+    tree = SearchTree()
+    state = problem.get_initial_state()
+    plan = AStarSearch(problem, state, strong_heuristic, tree=tree)
+    assert path_cost(problem, state, plan) == path_cost(problem, state, AStarSearch(problem, state, strong_heuristic))
+    deviations = 0
+    while plan and deviations < 5:
+        others = [action for action in problem.get_actions(state) if action != plan[0]]
+        if others and rng.random() < 0.5:
+            state = problem.get_successor(state, rng.choice(others))
+            deviations += 1
+            plan = AStarSearch(problem, state, strong_heuristic, tree=tree)
+            fresh = AStarSearch(problem, state, strong_heuristic)
+            assert path_cost(problem, state, plan) == path_cost(problem, state, fresh)
+            continue
+        state = problem.get_successor(state, plan[0])
+        plan = plan[1:]
+    assert deviations > 0
+
+@pytest.mark.parametrize("path", GRAPHS, ids=os.path.basename)
+def test_replanning_with_tree_matches_fresh_ucs(path):
+    problem = GraphRoutingProblem.from_file(path)
+    tree = SearchTree()
+    # Every node is used as a start, so the later searches reuse what the earlier ones learned
+    for state in problem.adjacency:
+        expected = path_cost(problem, state, UniformCostSearch(problem, state))
+        cost = path_cost(problem, state, UniformCostSearch(problem, state, tree=tree))
+        assert cost == pytest.approx(expected) if expected is not None else cost is None
@@ -0,0 +1,70 @@
+from typing import Generic, List, Optional, Tuple
+from collections import OrderedDict
+
+from problem import S
+
+# This is the transposition table used by the iterative deepening searches to avoid searching the same state twice in one iteration.
+# For every state, it remembers the smallest path cost (g) with which the state was reached in the current iteration.
+# If the state is reached again with a path cost that is not smaller, the subtree below it was already searched with
+# at least the same remaining budget, so it can be pruned.
+# The table has a fixed capacity so the memory stays bounded. When it is full, an entry is replaced using one of the policies:
+#   - "lru": the least recently used entry is removed (an ordered dictionary keeps the entries in the order of their last use).
+#   - "depth": every state has a single slot (picked by its hash) and the entry that is closer to the root (the smaller g) is kept
+#     since it prunes a larger subtree. Entries from previous iterations are always replaced.
+# Forgetting an entry never makes the search wrong; it only makes it search some states again.
+class TranspositionTable(Generic[S]):
+    POLICIES = ("lru", "depth")
+
+    def __init__(self, capacity: int = 2**20, policy: str = "lru") -> None:
+        if policy not in TranspositionTable.POLICIES:
+            raise Exception(f"Unknown replacement policy '{policy}' (expected one of {', '.join(TranspositionTable.POLICIES)})")
+        if capacity <= 0:
+            raise Exception("The capacity of the transposition table must be positive")
+        self.capacity = capacity
+        self.policy = policy
+        self.iteration = 0
+        self.hits = 0
+        self.live = 0                                       # The number of slots filled in the current iteration ("depth" policy)
+        self.entries: "OrderedDict[S, float]" = OrderedDict()
+        self.slots: List[Optional[Tuple[S, float, int]]] = [None] * capacity if policy == "depth" else []
+
+    def __len__(self) -> int:
+        if self.policy == "lru":
+            return len(self.entries)
+        return self.live
+
+    # Starts a new iteration (the entries of the previous iterations are no longer used for pruning)
+    def new_iteration(self) -> None:
+        self.iteration += 1
+        self.live = 0
+        self.entries.clear()
+
+    # Records that the state was reached with the path cost g.
+    # It returns False if the state was already reached with a path cost that is not larger in this iteration (so it can be pruned).
+    def visit(self, state: S, g: float) -> bool:
+        if self.policy == "lru":
+            entries = self.entries
+            best = entries.get(state)
+            if best is not None:
+                entries.move_to_end(state)
+                if best <= g:
+                    self.hits += 1
+                    return False
+            elif len(entries) >= self.capacity:
+                entries.popitem(last=False)
+            entries[state] = g
+            return True
+        index = hash(state) % self.capacity
+        slot = self.slots[index]
+        if slot is not None and slot[2] == self.iteration:
+            if slot[0] == state:
+                if slot[1] <= g:
+                    self.hits += 1
+                    return False
+            elif slot[1] < g:
+                # The stored state is closer to the root so it is kept
+                return True
+        else:
+            self.live += 1
+        self.slots[index] = (state, g, self.iteration)
+        return True
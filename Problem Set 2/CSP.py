@@ -1,5 +1,5 @@
-from typing import Callable, Dict, List, Any, Tuple
-from helpers.utils import track_call_count
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
+from helpers.instrumentation import track_call_count
 
 # This is the type definition for an Assignment
 # Basically, an assignment is a dictionary where each key-value pair represents a variable and its assigned value respectively.
@@ -57,12 +57,236 @@ class BinaryConstraint(Constraint):
         variable1, variable2 = self.variables
         return variable2 if variable == variable1 else variable1
 
+# This is a class for the global all-different constraint (all the variables must take different values).
+# It is equivalent to a binary "not equal" constraint between every pair of its variables, but it is stored once
+# (instead of n*(n-1)/2 binary constraints) and it can prune more values than the pairwise constraints (see "prune").
+class AllDifferentConstraint(Constraint):
+    variables: Tuple[str, ...]  # The names of the variables that are in the constraint.
+
+    def __init__(self, variables: Iterable[str]) -> None:
+        super().__init__()
+        self.variables = tuple(variables)
+
+    # If any of the variables are unassigned, the assignment does not satisfy the condition.
+    # Important: If the value of a variable in the assignment is None, then it is assumed as if it is unassigned.
+    def is_satisfied(self, assignment: Assignment) -> bool:
+        values = [assignment.get(variable) for variable in self.variables]
+        if any(value is None for value in values): return False
+        return len(set(values)) == len(values)
+
+    # Returns the values that can not be a part of any solution of this constraint (Regin's filtering algorithm).
+    # "domains" should contain the domain of every variable of the constraint (the assigned variables have a single value).
+    # The variables that are missing from "domains" are ignored.
+    # A solution of the constraint is a matching in the bipartite graph between the variables and the values that covers
+    # all the variables. So the function finds a maximum matching, and if it does not cover all the variables, it returns None.
+    # Otherwise, an edge (variable, value) can be in some maximum matching iff it is in the matching, or it is in a cycle
+    # that alternates between the edges in and out of the matching (both ends are in the same strongly connected component
+    # when the matching edges point from the variables to the values and the other edges point from the values to the variables),
+    # or it is on an alternating path that starts at a free value (a value that is not in the matching).
+    # All the other edges are removed. The function returns a dictionary from the variables to their removed values
+    # (only the variables that lost some values are included).
+    def prune(self, domains: Dict[str, set]) -> Optional[Dict[str, set]]:
+        variables = [variable for variable in self.variables if variable in domains]
+        # Find a maximum matching using augmenting paths (the variables with the smallest domains are matched first)
+        matched_value: Dict[str, Any] = {}
+        matched_variable: Dict[Any, str] = {}
+        def augment(variable: str, visited: set) -> bool:
+            for value in domains[variable]:
+                if value in visited: continue
+                visited.add(value)
+                owner = matched_variable.get(value)
+                if owner is None or augment(owner, visited):
+                    matched_value[variable] = value
+                    matched_variable[value] = variable
+                    return True
+            return False
+        for variable in sorted(variables, key=lambda variable: len(domains[variable])):
+            if not augment(variable, set()):
+                return None
+        # The graph: a variable points to its matched value and a value points to the variables that have it in their domain
+        # (except the variable it is matched to). The nodes are tagged to separate the variables from the values.
+        successors: Dict[Tuple[int, Any], List[Tuple[int, Any]]] = {}
+        for variable in variables:
+            successors[(0, variable)] = [(1, matched_value[variable])]
+            for value in domains[variable]:
+                if matched_variable.get(value) != variable:
+                    successors.setdefault((1, value), []).append((0, variable))
+        # The nodes reachable from the free values (every edge leaving them is on an alternating path from a free value)
+        reachable = set()
+        stack = [(1, value) for value in {value for variable in variables for value in domains[variable]} if value not in matched_variable]
+        while stack:
+            node = stack.pop()
+            if node in reachable: continue
+            reachable.add(node)
+            stack.extend(successors.get(node, ()))
+        components = _strongly_connected_components(successors)
+        removed: Dict[str, set] = {}
+        for variable in variables:
+            component = components[(0, variable)]
+            for value in domains[variable]:
+                if value == matched_value[variable] or (1, value) in reachable:
+                    continue
+                if components[(1, value)] != component:
+                    removed.setdefault(variable, set()).add(value)
+        return removed
+
+# Returns the index of the strongly connected component of every node in a directed graph (Tarjan's algorithm)
+def _strongly_connected_components(successors: Dict[Any, List[Any]]) -> Dict[Any, int]:
+    index: Dict[Any, int] = {}
+    lowlink: Dict[Any, int] = {}
+    components: Dict[Any, int] = {}
+    stack: List[Any] = []
+    on_stack = set()
+    count = [0]
+    def visit(node: Any) -> None:
+        index[node] = lowlink[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+        for successor in successors.get(node, ()):
+            if successor not in index:
+                visit(successor)
+                lowlink[node] = min(lowlink[node], lowlink[successor])
+            elif successor in on_stack:
+                lowlink[node] = min(lowlink[node], index[successor])
+        if lowlink[node] == index[node]:
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                components[member] = count[0]
+                if member == node: break
+            count[0] += 1
+    for node in list(successors):
+        if node not in index:
+            visit(node)
+    return components
+
+# Returns the names of the variables involved in a constraint
+def constraint_variables(constraint: Constraint) -> Tuple[str, ...]:
+    if isinstance(constraint, UnaryConstraint):
+        return (constraint.variable,)
+    return tuple(getattr(constraint, "variables", ()))
+
+# This is the list that holds the constraints of a problem. It works like a normal list, but every change to it
+# increments its version, so the problem knows when its constraint index is out of date.
+class ConstraintList(list):
+    version: int = 0
+
+    def _changed(self) -> None:
+        self.version += 1
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._changed()
+        return result
+
+    def __imul__(self, count):
+        result = super().__imul__(count)
+        self._changed()
+        return result
+
+    def append(self, constraint: Constraint) -> None:
+        super().append(constraint)
+        self._changed()
+
+    def extend(self, constraints: Iterable[Constraint]) -> None:
+        super().extend(constraints)
+        self._changed()
+
+    def insert(self, index: int, constraint: Constraint) -> None:
+        super().insert(index, constraint)
+        self._changed()
+
+    def remove(self, constraint: Constraint) -> None:
+        super().remove(constraint)
+        self._changed()
+
+    def pop(self, index: int = -1) -> Constraint:
+        constraint = super().pop(index)
+        self._changed()
+        return constraint
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._changed()
+
 # This defines a generic CSP problem
 class Problem:
     variables: List[str]            # A list of the variable names in the problem
     domains: Dict[str, set]         # A dictionary containing the domain of each variable.
                                     # The domain is a set of values that the variable can take. 
-    constraints: List[Constraint]   # A list of constraints in the problem.
+    # "constraints" is the list of constraints in the problem (see the property below).
+
+    # The problem keeps an index from every variable to the constraints that involve it, so the solvers only visit
+    # the constraints of the assigned variable instead of all the constraints.
+    # The binary constraints and the all-different constraints are indexed separately since the solvers handle them differently.
+    # The constraints are kept in a ConstraintList, so the index is rebuilt after any change to the list
+    # (e.g. appending the constraints while building the problem) or when the list is replaced (e.g. by one_consistency).
+    # NOTE: Assigning a list to "constraints" copies it into a new ConstraintList, so later changes must go through "problem.constraints".
+    @property
+    def constraints(self) -> List[Constraint]:
+        constraints = self.__dict__.get("_constraints")
+        if constraints is None:
+            constraints = self._constraints = ConstraintList()
+        return constraints
+
+    @constraints.setter
+    def constraints(self, constraints: List[Constraint]) -> None:
+        if not isinstance(constraints, ConstraintList):
+            constraints = ConstraintList(constraints)
+        self._constraints = constraints
+        self.invalidate_constraint_index()
+
+    def invalidate_constraint_index(self) -> None:
+        self._constraint_index = None
+
+    def _get_constraint_index(self) -> Tuple[Dict[str, List[Constraint]], Dict[str, List[Tuple[str, BinaryConstraint]]], Dict[str, List[AllDifferentConstraint]]]:
+        index = self.__dict__.get("_constraint_index")
+        constraints = self.constraints
+        if index is None or index[0] is not constraints or index[1] != constraints.version:
+            incident: Dict[str, List[Constraint]] = {}
+            neighbors: Dict[str, List[Tuple[str, BinaryConstraint]]] = {}
+            all_different: Dict[str, List[AllDifferentConstraint]] = {}
+            for constraint in constraints:
+                for variable in constraint_variables(constraint):
+                    incident.setdefault(variable, []).append(constraint)
+                if isinstance(constraint, BinaryConstraint):
+                    variable1, variable2 = constraint.variables
+                    neighbors.setdefault(variable1, []).append((variable2, constraint))
+                    neighbors.setdefault(variable2, []).append((variable1, constraint))
+                elif isinstance(constraint, AllDifferentConstraint):
+                    for variable in constraint.variables:
+                        all_different.setdefault(variable, []).append(constraint)
+            index = (constraints, constraints.version, incident, neighbors, all_different)
+            self._constraint_index = index
+        return index[2], index[3], index[4]
+
+    # Returns the constraints that involve the given variable (in the order of the constraints list)
+    def constraints_of(self, variable: str) -> List[Constraint]:
+        return self._get_constraint_index()[0].get(variable, [])
+
+    # Returns the binary constraints that involve the given variable as a list of (other variable, constraint)
+    def neighbors_of(self, variable: str) -> List[Tuple[str, BinaryConstraint]]:
+        return self._get_constraint_index()[1].get(variable, [])
+
+    # Returns the all-different constraints that involve the given variable
+    def all_different_of(self, variable: str) -> List[AllDifferentConstraint]:
+        return self._get_constraint_index()[2].get(variable, [])
 
     # Returns True if the assignment is complete (all the variables has an value in the given assignment).
     @track_call_count
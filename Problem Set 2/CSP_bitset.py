@@ -0,0 +1,208 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from CSP import AllDifferentConstraint, Assignment, BinaryConstraint, Problem, UnaryConstraint
+
+# This is a compact representation of a CSP for the problems with small domains (e.g. sudoku).
+# The variables are identified by their index in "problem.variables" and the values of every variable by their index
+# in the sorted list of its initial domain. So a domain is a single integer (a bitmask) where the bit i is set if the
+# value i is still possible.
+# The binary constraints are compiled into support masks: for every value of a variable, the mask of the values of the
+# other variable that satisfy the constraint with it. So forward checking is a bitwise AND, and the MRV and LCV
+# heuristics are popcounts. The all-different constraints are compiled as a "not equal" constraint for every pair of
+# their variables (this is how forward checking and LCV treat them in CSP_solver).
+Mask = int
+
+def _not_equal(value1: Any, value2: Any) -> bool:
+    return value1 != value2
+
+# The number of set bits in a mask (int.bit_count is only available in python 3.10+)
+if hasattr(int, "bit_count"):
+    popcount: Callable[[Mask], int] = int.bit_count
+else:
+    def popcount(mask: Mask) -> int:
+        return bin(mask).count("1")
+
+# Returns the indices of the set bits of a mask (from the lowest to the highest)
+def bits(mask: Mask) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class BitsetProblem:
+    problem: Problem                                    # The original problem
+    variables: List[str]                                # The variable names (the id of a variable is its index in this list)
+    ids: Dict[str, int]                                 # The id of every variable
+    values: List[List[Any]]                             # The values of every variable (the bit i of a domain is the value values[id][i])
+    value_ids: List[Dict[Any, int]]                     # The index of every value of every variable
+    domains: List[Mask]                                 # The initial domains (after applying the unary constraints)
+    neighbors: List[List[Tuple[int, List[Mask]]]]       # For every variable, a list of (other variable id, supports) for each binary constraint
+                                                        # where supports[i] is the mask of the values of the other variable that satisfy
+                                                        # the constraint if the variable takes its value i
+
+    def __init__(self, problem: Problem) -> None:
+        self.problem = problem
+        self.variables = list(problem.variables)
+        self.ids = {variable: id for id, variable in enumerate(self.variables)}
+        self.values = [sorted(problem.domains[variable]) for variable in self.variables]
+        self.value_ids = [{value: index for index, value in enumerate(values)} for values in self.values]
+        self.domains = [(1 << len(values)) - 1 for values in self.values]
+        self.neighbors = [[] for _ in self.variables]
+        # The constraints with the same condition and the same domains share their support masks
+        # (e.g. all the "not equal" constraints of a sudoku), so they are only computed once.
+        # To make the lookups cheap, every distinct list of values is given a small number.
+        value_lists: Dict[Tuple[Any, ...], int] = {}
+        value_list_ids = [value_lists.setdefault(tuple(values), len(value_lists)) for values in self.values]
+        tables: Dict[Tuple[Any, int, int], Tuple[List[Mask], List[Mask]]] = {}
+        for constraint in problem.constraints:
+            try:
+                if isinstance(constraint, UnaryConstraint):
+                    id = self.ids[constraint.variable]
+                    condition, values, mask = constraint.condition, self.values[id], self.domains[id]
+                    for index in bits(mask):
+                        if not condition(values[index]):
+                            mask ^= 1 << index
+                    self.domains[id] = mask
+                    continue
+                if isinstance(constraint, BinaryConstraint):
+                    variable1, variable2 = constraint.variables
+                    pairs = [(self.ids[variable1], self.ids[variable2], constraint.condition)]
+                elif isinstance(constraint, AllDifferentConstraint):
+                    ids = [self.ids[variable] for variable in constraint.variables]
+                    pairs = [(id1, id2, _not_equal) for index, id1 in enumerate(ids) for id2 in ids[index+1:]]
+                else:
+                    raise Exception(f"The constraint {constraint} can not be represented as a bitset")
+            except KeyError as error:
+                raise Exception(f"The constraint {constraint} involves the variable {error} which is not in the problem variables")
+            for id1, id2, condition in pairs:
+                key = (condition, value_list_ids[id1], value_list_ids[id2])
+                table = tables.get(key)
+                if table is None:
+                    table = tables[key] = self._compile(condition, self.values[id1], self.values[id2])
+                forward, backward = table
+                self.neighbors[id1].append((id2, forward))
+                self.neighbors[id2].append((id1, backward))
+
+    # Computes the support masks of a binary constraint in both directions
+    @staticmethod
+    def _compile(condition: Callable[[Any, Any], bool], values1: List[Any], values2: List[Any]) -> Tuple[List[Mask], List[Mask]]:
+        forward = [0] * len(values1)
+        backward = [0] * len(values2)
+        for index1, value1 in enumerate(values1):
+            for index2, value2 in enumerate(values2):
+                if condition(value1, value2):
+                    forward[index1] |= 1 << index2
+                    backward[index2] |= 1 << index1
+        return forward, backward
+
+    # Returns False if a domain is empty after applying the unary constraints (the same as 1-Consistency)
+    def is_consistent(self) -> bool:
+        return all(self.domains)
+
+    # Converts the domains of the unassigned variables into masks (the assigned variables have a None domain)
+    def encode_domains(self, domains: Dict[str, set]) -> List[Optional[Mask]]:
+        return [
+            None if variable not in domains else sum(1 << self._value_id(id, value) for value in domains[variable])
+            for id, variable in enumerate(self.variables)
+        ]
+
+    # Converts the masks back into a dictionary of domains (the variables with a None domain are skipped)
+    def decode_domains(self, domains: List[Optional[Mask]]) -> Dict[str, set]:
+        return {
+            variable: {self.values[id][index] for index in bits(mask)}
+            for id, (variable, mask) in enumerate(zip(self.variables, domains)) if mask is not None
+        }
+
+    # Converts an assignment into a dictionary from the variable ids to the value indices
+    def encode_assignment(self, assignment: Assignment) -> Dict[int, int]:
+        encoded = {}
+        for variable, value in assignment.items():
+            if value is None: continue
+            id = self.ids.get(variable)
+            if id is None:
+                raise Exception(f"Unknown variable {variable}")
+            encoded[id] = self._value_id(id, value)
+        return encoded
+
+    # Converts a dictionary from the variable ids to the value indices back into an assignment
+    def decode_assignment(self, assignment: Dict[int, int]) -> Assignment:
+        return {self.variables[id]: self.values[id][index] for id, index in assignment.items()}
+
+    def _value_id(self, id: int, value: Any) -> int:
+        index = self.value_ids[id].get(value)
+        if index is None:
+            raise Exception(f"The value {value} is not in the domain of the variable {self.variables[id]}")
+        return index
+
+# The following functions are the same as the ones in CSP_solver but they work on the bitset representation.
+# They pick the same variables and the same values in the same order, so "solve" explores the same nodes.
+
+# Returns the id of the unassigned variable with the fewest remaining values (ties are broken by the lowest id)
+# NOTE: The domains are never empty during the search (forward checking fails instead), so the first variable
+#       with a single value can be returned directly.
+def minimum_remaining_values(domains: List[Optional[Mask]]) -> int:
+    best, best_count = -1, None
+    for id, mask in enumerate(domains):
+        if mask is None: continue
+        count = popcount(mask)
+        if count == 1:
+            return id
+        if best_count is None or count < best_count:
+            best, best_count = id, count
+    return best
+
+# Removes the values that conflict with the assigned value from the domains of the unassigned neighbors.
+# Returns False if a domain becomes empty.
+def forward_checking(bitset: BitsetProblem, assigned_id: int, assigned_index: int, domains: List[Optional[Mask]]) -> bool:
+    for other, supports in bitset.neighbors[assigned_id]:
+        mask = domains[other]
+        if mask is None: continue
+        mask &= supports[assigned_index]
+        if not mask:
+            return False
+        domains[other] = mask
+    return True
+
+# Returns the value indices of the variable ordered by the number of values they remove from the domains of the
+# unassigned neighbors (ties are broken by the lowest index which is the lowest value)
+def least_restraining_values(bitset: BitsetProblem, id: int, domains: List[Optional[Mask]]) -> List[int]:
+    mask = domains[id]
+    if not mask & (mask - 1):
+        return [mask.bit_length() - 1]
+    neighbors = [(domains[other], supports) for other, supports in bitset.neighbors[id] if domains[other] is not None]
+    conflicts = []
+    for index in bits(mask):
+        conflicts.append((sum(popcount(mask & ~supports[index]) for mask, supports in neighbors), index))
+    conflicts.sort()
+    return [index for _, index in conflicts]
+
+# Solves the problem using backtracking search with forward checking, MRV and LCV on the bitset representation.
+# It returns the same solution as CSP_solver.solve and it calls "problem.is_complete" for the same nodes,
+# but it does not modify the problem (the unary constraints are applied while building the bitset representation).
+def solve(problem: Problem) -> Optional[Assignment]:
+    bitset = BitsetProblem(problem)
+    if not bitset.is_consistent():
+        return None
+    domains: List[Optional[Mask]] = list(bitset.domains)
+    # The assignment is kept with the variable names so it can be checked by the problem
+    assignment: Assignment = {}
+    variables, values = bitset.variables, bitset.values
+
+    def backtrack(domains: List[Optional[Mask]]) -> Optional[Assignment]:
+        if problem.is_complete(assignment):
+            return dict(assignment)
+        id = minimum_remaining_values(domains)
+        variable = variables[id]
+        for index in least_restraining_values(bitset, id, domains):
+            # A list of a few integers is cheap to copy, so every value gets its own copy of the domains
+            child = domains[:]
+            child[id] = None
+            if not forward_checking(bitset, id, index, child):
+                continue
+            assignment[variable] = values[id][index]
+            result = backtrack(child)
+            if result is not None:
+                return result
+            del assignment[variable]
+        return None
+
+    return backtrack(domains)
@@ -1,5 +1,6 @@
 from typing import Any, Dict, List, Optional
-from CSP import Assignment, BinaryConstraint, Problem, UnaryConstraint
+from CSP import Assignment, Problem, UnaryConstraint
+from arc_consistency import ArcConsistency, ArcConsistencyCounters
 from helpers.utils import NotImplemented
 
 # This function applies 1-Consistency to the problem.
@@ -43,29 +44,89 @@ def minimum_remaining_values(problem: Problem, domains: Dict[str, set]) -> str:
 #            since they contain the current domains of unassigned variables only.
 def forward_checking(problem: Problem, assigned_variable: str, assigned_value: Any, domains: Dict[str, set]) -> bool:
     #DONE: Write this function
-    # My-Comment: get the constrains of the problem
-    constraints = problem.constraints
-    # My-Comment: I will loop over the constraints
-    for constraint in constraints:
-        # My-Comment: Check whether it is binary constrain or not
-        # My-Comment: Check whether if it is related to the assigned_variable
-        if isinstance(constraint, BinaryConstraint) and assigned_variable in constraint.variables:
-            # My-Comment: get the other variable
-            other_variable = constraint.get_other(assigned_variable)
-            # My-Comment: check if it is assigned skip
-            if other_variable not in domains:
+    # My-Comment: I will loop over the binary constraints of the assigned variable (the problem keeps an index of them)
+    for other_variable, constraint in problem.neighbors_of(assigned_variable):
+        # My-Comment: check if it is assigned skip
+        if other_variable not in domains:
+            continue
+        # My-Comment: calculate the new domain
+        new_domain = {value for value in domains[other_variable] if constraint.is_satisfied({assigned_variable: assigned_value, other_variable: value})}
+        # My-Comment: if it is empty return false
+        if len(new_domain) == 0:
+            return False
+        # My-Comment: assign the new domain
+        domains[other_variable] = new_domain
+    # My-Comment: an all-different constraint is the same as a "not equal" constraint with each of its other variables,
+    # My-Comment: so the assigned value is removed from their domains
+    for constraint in problem.all_different_of(assigned_variable):
+        for other_variable in constraint.variables:
+            if other_variable == assigned_variable or other_variable not in domains:
                 continue
-            # My-Comment: calculate the new domain
-            new_domain = {value for value in domains[other_variable] if constraint.is_satisfied({assigned_variable: assigned_value, other_variable: value})}
-            # My-Comment: if it is empty return false
-            if len(new_domain) == 0:
-                return False
-            # My-Comment: assign the new domain
-            domains[other_variable] = new_domain
+            if assigned_value in domains[other_variable]:
+                new_domain = domains[other_variable] - {assigned_value}
+                if len(new_domain) == 0:
+                    return False
+                domains[other_variable] = new_domain
     # My-Comment: Return True if nothing is empty
     return True
     # NotImplemented()
 
+# This records the changes of the domains during the backtracking search so they can be undone in place.
+# Every entry is either (variable, removed values) or (variable, None, the whole domain) when a variable was assigned
+# and removed from the domains. Undoing the entries in the reverse order restores the domains exactly.
+class DomainTrail:
+    def __init__(self, domains: Dict[str, set]) -> None:
+        self.domains = domains
+        self.entries: List[tuple] = []
+
+    # Returns the current position of the trail (to undo everything after it later)
+    def mark(self) -> int:
+        return len(self.entries)
+
+    def remove_values(self, variable: str, values: set) -> None:
+        self.domains[variable] -= values
+        self.entries.append((variable, values))
+
+    def remove_variable(self, variable: str) -> None:
+        self.entries.append((variable, None, self.domains.pop(variable)))
+
+    # Undoes all the changes recorded after the mark
+    def undo(self, mark: int) -> None:
+        domains, entries = self.domains, self.entries
+        while len(entries) > mark:
+            entry = entries.pop()
+            if entry[1] is None:
+                domains[entry[0]] = entry[2]
+            else:
+                domains[entry[0]] |= entry[1]
+
+# This is the same as forward_checking but it removes the values from the domains in place and records them on the trail.
+# If it returns False, the caller must undo the trail (some domains may have been reduced before the failure was found).
+def forward_checking_in_place(problem: Problem, assigned_variable: str, assigned_value: Any, domains: Dict[str, set], trail: DomainTrail) -> bool:
+    for other_variable, constraint in problem.neighbors_of(assigned_variable):
+        domain = domains.get(other_variable)
+        if domain is None:
+            continue
+        # My-Comment: call the condition directly with the values in the order of the constraint variables
+        condition = constraint.condition
+        if constraint.variables[0] == assigned_variable:
+            removed = {value for value in domain if not condition(assigned_value, value)}
+        else:
+            removed = {value for value in domain if not condition(value, assigned_value)}
+        if removed:
+            if len(removed) == len(domain):
+                return False
+            trail.remove_values(other_variable, removed)
+    for constraint in problem.all_different_of(assigned_variable):
+        for other_variable in constraint.variables:
+            domain = domains.get(other_variable)
+            if domain is None or assigned_value not in domain:
+                continue
+            if len(domain) == 1:
+                return False
+            trail.remove_values(other_variable, {assigned_value})
+    return True
+
 # This function should return the domain of the given variable order based on the "least restraining value" heuristic.
 # IMPORTANT: This function should not modify any of the given arguments.
 # Generally, this function is very similar to the forward checking function, but it differs as follows:
@@ -84,22 +145,33 @@ def least_restraining_values(problem: Problem, variable_to_assign: str, domains:
     domain = domains[variable_to_assign]
     # My-Comment: set conflict_values to 0
     conflict_values = {value: 0 for value in domain}
+    # My-Comment: get the binary constraints of the variable (the problem keeps an index of them)
+    neighbors = problem.neighbors_of(variable_to_assign)
     # My-Comment: loop over the domain
     for value in domain:
         # My-Comment: loop over the constraints
-        for constraint in problem.constraints:
-            # My-Comment: Check whether it is binary constrain or not
-            # My-Comment: Check whether if it is related to the assigned_variable
-            if isinstance(constraint, BinaryConstraint) and variable_to_assign in constraint.variables:
-                # My-Comment: get the other variable
-                other_variable = constraint.get_other(variable_to_assign)
-                # My-Comment: check if it is assigned skip
-                if other_variable not in domains:
-                    continue
-                # My-Comment: calculate count of unsatisfied constrains
-                # My-Comment: get the domain of the other value
-                domain_other_value = domains[other_variable]
-                conflict_values[value] += sum(1 for other_value in domain_other_value if not constraint.is_satisfied({variable_to_assign: value, other_variable: other_value}))
+        for other_variable, constraint in neighbors:
+            # My-Comment: check if it is assigned skip
+            if other_variable not in domains:
+                continue
+            # My-Comment: calculate count of unsatisfied constrains
+            # My-Comment: get the domain of the other value
+            domain_other_value = domains[other_variable]
+            # My-Comment: call the condition directly with the values in the order of the constraint variables (instead of building an assignment for every pair)
+            condition = constraint.condition
+            if constraint.variables[0] == variable_to_assign:
+                conflict_values[value] += sum(1 for other_value in domain_other_value if not condition(value, other_value))
+            else:
+                conflict_values[value] += sum(1 for other_value in domain_other_value if not condition(other_value, value))
+    # My-Comment: for the all-different constraints, a value only conflicts with the same value in the domain of every other variable
+    for constraint in problem.all_different_of(variable_to_assign):
+        for other_variable in constraint.variables:
+            if other_variable == variable_to_assign or other_variable not in domains:
+                continue
+            domain_other_value = domains[other_variable]
+            for value in domain:
+                if value in domain_other_value:
+                    conflict_values[value] += 1
 
     # My-Comment: sort then return the list
     return sorted(conflict_values, key=lambda x: (conflict_values[x], x))
@@ -114,43 +186,66 @@ def least_restraining_values(problem: Problem, variable_to_assign: str, domains:
 # IMPORTANT: To get the correct result for the explored nodes, you should check if the assignment is complete only once using "problem.is_complete"
 #            for every assignment including the initial empty assignment, EXCEPT for the assignments pruned by the forward checking.
 #            Also, if 1-Consistency deems the whole problem unsolvable, you shouldn't call "problem.is_complete" at all.
-def solve(problem: Problem) -> Optional[Assignment]:
+# The optional "propagation" argument selects how the domains are pruned (see arc_consistency.py):
+#   - "forward_checking" (default): forward checking after every assignment.
+#   - "preprocess": make the problem arc consistent before the search, then forward checking after every assignment.
+#   - "mac": make the problem arc consistent before the search, then maintain arc consistency after every assignment.
+# "algorithm" selects the arc consistency algorithm ("ac3" or "ac2001") and "counters" (an ArcConsistencyCounters) is filled with its work.
+# If the arc consistency preprocessing deems the problem unsolvable, "problem.is_complete" is not called (the same as 1-Consistency).
+PROPAGATIONS = ("forward_checking", "preprocess", "mac")
+
+def solve(problem: Problem, propagation: str = "forward_checking", algorithm: str = "ac3", counters: Optional[ArcConsistencyCounters] = None) -> Optional[Assignment]:
     #DONE: Write this function
+    if propagation not in PROPAGATIONS:
+        raise Exception(f"Unknown propagation: {propagation}. The valid propagations are {PROPAGATIONS}")
     # My-Comment: check the one consistency to return none if not 1-Consistency
     if not one_consistency(problem):
         return None
-    # My-Comment: set the assignment variable
-    assignment = {}
+    # My-Comment: the search works on a single assignment and a single copy of the domains which are modified in place.
+    # My-Comment: every change is recorded on a trail so it can be undone when backtracking (instead of copying the domains at every node)
+    assignment: Assignment = {}
+    domains = {variable: set(domain) for variable, domain in problem.domains.items()}
+    trail = DomainTrail(domains)
+    # My-Comment: run the arc consistency preprocessing if it is requested
+    arc_consistency = None
+    if propagation != "forward_checking":
+        arc_consistency = ArcConsistency(problem, algorithm, counters)
+        if not arc_consistency.make_arc_consistent(domains):
+            return None
+    mac = propagation == "mac"
     # My-Comment: define the backTrack Algo
-    def backTrack(problem: Problem, assignment: Assignment, domains: Dict[str, set]):
+    def backTrack() -> Optional[Assignment]:
         # My-Comment: check if the assignment is complete
         if problem.is_complete(assignment):
-            return assignment
+            return dict(assignment)
         # My-Comment: get the variable to assign
         variable_to_assign = minimum_remaining_values(problem, domains)
         # My-Comment: get the values of the variable
         values = least_restraining_values(problem, variable_to_assign, domains)
         # My-Comment: loop over the values
         for value in values:
-            # My-Comment: make the assignment copy
-            assignment_copy = assignment.copy()
-            # My-Comment: assign the value
-            assignment_copy[variable_to_assign] = value
-            # My-Comment: make the domain copy
-            domains_copy = domains.copy()
-            # My-Comment: remove the variable from the domain
-            domains_copy.pop(variable_to_assign)
-            # My-Comment: check if the value is consistent
-            if forward_checking(problem, variable_to_assign, value, domains_copy):
+            # My-Comment: remember the trail position to undo the changes of this value
+            mark = trail.mark()
+            # My-Comment: assign the value and remove the variable from the domains
+            assignment[variable_to_assign] = value
+            trail.remove_variable(variable_to_assign)
+            # My-Comment: check if the value is consistent (using forward checking or MAC)
+            if mac:
+                consistent = arc_consistency.assign(variable_to_assign, domains, assignment, trail)
+            else:
+                consistent = forward_checking_in_place(problem, variable_to_assign, value, domains, trail)
+            if consistent:
                 # My-Comment: get the result
-                result = backTrack(problem, assignment_copy, domains_copy)
+                result = backTrack()
                 # My-Comment: check if the result is not none
                 if result is not None:
                     return result
+            # My-Comment: undo the assignment and the domain changes
+            del assignment[variable_to_assign]
+            trail.undo(mark)
         # My-Comment: return None if no solution found
         return None
     
     # My-Comment: return the result
-    return backTrack(problem, assignment, problem.domains)
+    return backTrack()
     # NotImplemented()
-    
\ No newline at end of file
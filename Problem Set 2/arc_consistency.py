@@ -0,0 +1,181 @@
+from typing import Any, Deque, Dict, Iterable, Optional, Set, Tuple, Union
+from dataclasses import asdict, dataclass
+from collections import deque
+from CSP import AllDifferentConstraint, Assignment, BinaryConstraint, Problem
+
+# This module implements arc consistency for the binary constraints of a problem.
+# An arc (X, Y, constraint) is consistent if every value in the domain of X has a support in the domain of Y
+# (a value that satisfies the constraint with it). "revise" removes the values of X without a support, and
+# "propagate" keeps revising arcs until all of them are consistent (AC-3): whenever the domain of X is reduced,
+# the arcs (Z, X) are revised again since the removed values may have been the supports of the values of Z.
+# The all-different constraints are propagated as a whole with Regin's algorithm (see AllDifferentConstraint.prune)
+# which is stronger than making the "not equal" arcs between their variables consistent.
+# The AC-2001 variant remembers the last support found for every value (its residue). Since the domains only shrink
+# during propagation, if the residue is still in the domain of Y, the value is supported without looking at the domain.
+# The residues stay valid across the backtracking search (they are only hints), so they are never restored.
+#
+# It can be used:
+#   - As preprocessing: "make_arc_consistent" makes the whole problem arc consistent before the search.
+#   - During the search (MAC): after assigning a variable, "propagate" is called with the arcs that point to it.
+#     The assigned variables are not in the domains, so their value is read from the assignment.
+# NOTE: Like forward checking, the domains are modified in place. If a trail is given (see CSP_solver.DomainTrail),
+#       the removed values are recorded on it so they can be undone.
+
+ALGORITHMS = ("ac3", "ac2001")
+
+_MISSING = object()
+
+# These are the counters of the arc consistency propagation (to measure its cost against the pruning it does).
+#   - revisions: the number of revised arcs and propagated all-different constraints.
+#   - checks: the number of constraint checks (calls to the constraint condition).
+#   - residue_hits: the number of values whose residue was still in the domain (AC-2001 only).
+#   - pruned: the number of values removed from the domains.
+#   - wipeouts: the number of times a domain became empty (the propagation failed).
+@dataclass
+class ArcConsistencyCounters:
+    revisions: int = 0
+    checks: int = 0
+    residue_hits: int = 0
+    pruned: int = 0
+    wipeouts: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        return ", ".join(f"{name}: {value}" for name, value in self.to_dict().items())
+
+Arc = Tuple[str, str, BinaryConstraint]
+# An item of the propagation queue is either an arc or an all-different constraint
+Item = Union[Arc, AllDifferentConstraint]
+
+class ArcConsistency:
+    problem: Problem
+    algorithm: str
+    counters: ArcConsistencyCounters
+    residues: Optional[Dict[Tuple[int, str], Dict[Any, Any]]]   # The last support of every value of every (constraint, variable) for AC-2001
+
+    def __init__(self, problem: Problem, algorithm: str = "ac3", counters: Optional[ArcConsistencyCounters] = None) -> None:
+        if algorithm not in ALGORITHMS:
+            raise Exception(f"Unknown arc consistency algorithm: {algorithm}. The valid algorithms are {ALGORITHMS}")
+        self.problem = problem
+        self.algorithm = algorithm
+        self.counters = counters if counters is not None else ArcConsistencyCounters()
+        self.residues = {} if algorithm == "ac2001" else None
+
+    # Removes the values of "variable" that have no support in the domain of "other" (or the assigned value of "other").
+    # Returns the removed values (an empty set if the arc was already consistent).
+    def revise(self, variable: str, other: str, constraint: BinaryConstraint, domains: Dict[str, set], assignment: Assignment) -> set:
+        counters = self.counters
+        counters.revisions += 1
+        domain = domains[variable]
+        other_domain = domains.get(other)
+        if other_domain is None:
+            other_domain = (assignment[other],)
+        condition = constraint.condition
+        first = constraint.variables[0] == variable
+        residues = None
+        if self.residues is not None:
+            residues = self.residues.setdefault((id(constraint), variable), {})
+        removed = set()
+        checks = hits = 0
+        for value in domain:
+            if residues is not None:
+                residue = residues.get(value, _MISSING)
+                if residue is not _MISSING and residue in other_domain:
+                    hits += 1
+                    continue
+            for other_value in other_domain:
+                checks += 1
+                if condition(value, other_value) if first else condition(other_value, value):
+                    if residues is not None:
+                        residues[value] = other_value
+                    break
+            else:
+                removed.add(value)
+        counters.checks += checks
+        counters.residue_hits += hits
+        return removed
+
+    # Propagates an all-different constraint. Returns the removed values of every variable or None if the constraint can not be satisfied.
+    def revise_all_different(self, constraint: AllDifferentConstraint, domains: Dict[str, set], assignment: Assignment) -> Optional[Dict[str, set]]:
+        self.counters.revisions += 1
+        current = {}
+        for variable in constraint.variables:
+            domain = domains.get(variable)
+            if domain is not None:
+                current[variable] = domain
+            elif variable in assignment:
+                current[variable] = {assignment[variable]}
+        return constraint.prune(current)
+
+    # Revises the given arcs and all-different constraints (and the ones affected by their revisions) until all of them are consistent.
+    # Only the arcs between unassigned variables (or from an unassigned variable to an assigned one) are revised.
+    # Returns False if a domain becomes empty. Otherwise, it returns True.
+    def propagate(self, items: Iterable[Item], domains: Dict[str, set], assignment: Optional[Assignment] = None, trail=None) -> bool:
+        if assignment is None: assignment = {}
+        problem, counters = self.problem, self.counters
+        queue: Deque[Item] = deque()
+        queued: Set[Tuple[Optional[str], int]] = set()
+        # The arcs are identified by (variable, constraint) and the all-different constraints by (None, constraint)
+        def schedule(item: Item) -> None:
+            if isinstance(item, AllDifferentConstraint):
+                key = (None, id(item))
+            else:
+                key = (item[0], id(item[2]))
+            if key not in queued:
+                queued.add(key)
+                queue.append(item)
+        for item in items:
+            if isinstance(item, AllDifferentConstraint) or (item[0] in domains and (item[1] in domains or item[1] in assignment)):
+                schedule(item)
+        while queue:
+            item = queue.popleft()
+            if isinstance(item, AllDifferentConstraint):
+                queued.discard((None, id(item)))
+                changes = self.revise_all_different(item, domains, assignment)
+                if changes is None:
+                    counters.wipeouts += 1
+                    return False
+            else:
+                variable, other, constraint = item
+                queued.discard((variable, id(constraint)))
+                removed = self.revise(variable, other, constraint, domains, assignment)
+                if len(removed) == len(domains[variable]):
+                    counters.pruned += len(removed)
+                    counters.wipeouts += 1
+                    return False
+                changes = {variable: removed} if removed else {}
+            source = item if isinstance(item, AllDifferentConstraint) else item[2]
+            for variable, removed in changes.items():
+                counters.pruned += len(removed)
+                if trail is not None:
+                    trail.remove_values(variable, removed)
+                else:
+                    domains[variable] -= removed
+                # The arcs that point to the reduced variable and its all-different constraints must be revised again
+                for neighbor, neighbor_constraint in problem.neighbors_of(variable):
+                    if neighbor_constraint is not source and neighbor in domains:
+                        schedule((neighbor, variable, neighbor_constraint))
+                for all_different in problem.all_different_of(variable):
+                    if all_different is not item:
+                        schedule(all_different)
+        return True
+
+    # Makes all the arcs of the problem consistent (as preprocessing before the search).
+    # Returns False if a domain becomes empty. Otherwise, it returns True.
+    def make_arc_consistent(self, domains: Dict[str, set]) -> bool:
+        items: list = [
+            (variable, other, constraint)
+            for variable in self.problem.variables if variable in domains
+            for other, constraint in self.problem.neighbors_of(variable)
+        ]
+        items.extend(constraint for constraint in self.problem.constraints if isinstance(constraint, AllDifferentConstraint))
+        return self.propagate(items, domains)
+
+    # Maintains arc consistency after assigning a variable (MAC). The variable must be already removed from the domains.
+    # Returns False if a domain becomes empty. Otherwise, it returns True.
+    def assign(self, variable: str, domains: Dict[str, set], assignment: Assignment, trail=None) -> bool:
+        items: list = [(other, variable, constraint) for other, constraint in self.problem.neighbors_of(variable)]
+        items.extend(self.problem.all_different_of(variable))
+        return self.propagate(items, domains, assignment, trail)
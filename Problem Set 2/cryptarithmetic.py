@@ -1,9 +1,9 @@
 from typing import Tuple
 import re
-from CSP import Assignment, Problem, UnaryConstraint, BinaryConstraint
+from CSP import Assignment, Problem, UnaryConstraint, BinaryConstraint, AllDifferentConstraint
 
 # DONE (Optional): Import any builtin library or define any helper function you want to use
-from itertools import combinations, product
+from itertools import product
 
 # This is a class to define for cryptarithmetic puzzles as CSPs
 
@@ -66,9 +66,8 @@ class CryptArithmeticProblem(Problem):
         variables_set = set(LHS0 + LHS1 + RHS)
         # My-Comment: add the domains of LHS0, LHS1, RHS to the set
         problem.domains.update({var: set(range(10)) for var in variables_set})
-        # My-Comment: add constrain that no vaiable is equal to the other
-        problem.constraints.extend([BinaryConstraint([variable, other_variable], lambda x, y: x != y)
-                                   for variable, other_variable in combinations(variables_set, 2)])
+        # My-Comment: add constrain that no vaiable is equal to the other (a single all-different constraint instead of one for every pair)
+        problem.constraints.append(AllDifferentConstraint(variables_set))
         # # My-Comment: cast the set to list for the problem variables
         problem.variables = list(variables_set)
         # My-Comment: add carry variable but no carry for first column
@@ -5,7 +5,7 @@ from enum import Enum
 
 from mathutils import Direction, Point
 from game import Game
-from helpers.utils import track_call_count
+from helpers.instrumentation import track_call_count
 from helpers.mt19937 import RandomGenerator
 from agents import Agent
 
@@ -284,7 +284,8 @@ def path_length(path) -> int:
 # The result is cached inside the game object
 def compute_path(game: DungeonGame, p1: Point, p2: Point) -> List[Point]:
     cache = game.cache()
-    if p1 not in cache:
+    path_map = cache.get(p1)
+    if path_map is None:
         from collections import deque
         path_map = {p1: [p1]}
         queue = deque([p1])
@@ -298,7 +299,7 @@ def compute_path(game: DungeonGame, p1: Point, p2: Point) -> List[Point]:
                 path_map[child] = path + [child]
                 queue.append(child)
         cache[p1] = path_map
-    return cache[p1].get(p2, None)
+    return path_map.get(p2, None)
 
 # Finds the shortest path from a point to a path in the dungeon
 def path_to_path(game: DungeonGame, p1: Point, path: List[Point]):
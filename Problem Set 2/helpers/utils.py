@@ -1,7 +1,8 @@
 import os, sys
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional
+from collections.abc import MutableMapping
 from dataclasses import dataclass
-from collections import deque
+from collections import OrderedDict, deque
 import importlib
 from importlib import util as ilu
 import traceback
@@ -49,7 +50,11 @@ def track_call_count(fn):
     deco.calls = 0
     return deco
 
+# The fetch helpers also support the functions instrumented by helpers.instrumentation (they keep their counters in a probe)
 def fetch_tracked_call_count(fn):
+    probe = getattr(fn, "probe", None)
+    if probe is not None:
+        return probe.fetch_count()
     calls = getattr(fn, "calls", 0)
     setattr(fn, "calls", 0)
     return calls
@@ -65,6 +70,9 @@ def record_calls(fn):
     return deco
 
 def fetch_recorded_calls(fn):
+    probe = getattr(fn, "probe", None)
+    if probe is not None:
+        return probe.fetch_records()
     calls = getattr(fn, "calls", deque())
     setattr(fn, "calls", deque())
     return calls
@@ -78,14 +86,93 @@ def add_call_listener(listener):
         return decorated
     return decorator
 
+# This is a dictionary with a bounded number of entries. When it is full, adding a new key removes an entry according to the policy:
+#   - "lru": the least recently used entry (reading or writing a key makes it the most recently used).
+#   - "fifo": the oldest inserted entry.
+# It counts the hits (successful reads), the misses (failed reads and failed membership tests) and the evictions.
+# Any data stored in a bounded cache can disappear, so the code that uses it must be able to compute it again.
+class BoundedCache(MutableMapping):
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, capacity: int, policy: str = "lru") -> None:
+        if policy not in BoundedCache.POLICIES:
+            raise Exception(f"Unknown cache policy '{policy}' (expected one of {', '.join(BoundedCache.POLICIES)})")
+        if capacity <= 0:
+            raise Exception("The capacity of the cache must be positive")
+        self.capacity = capacity
+        self.policy = policy
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        if self.policy == "lru":
+            self.entries.move_to_end(key)
+        return value
+
+    # This is the same as the default "get" but it avoids raising an exception for every miss
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self.entries:
+            return self[key]
+        self.misses += 1
+        return default
+
+    def __contains__(self, key: Any) -> bool:
+        if key in self.entries:
+            return True
+        self.misses += 1
+        return False
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        entries = self.entries
+        if key in entries:
+            if self.policy == "lru":
+                entries.move_to_end(key)
+        elif len(entries) >= self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+        entries[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self.entries[key]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # Returns the counters of the cache
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self.entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __repr__(self) -> str:
+        return f"BoundedCache({self.policy}, {self.stats()})"
+
 class CacheContainer:
-    def cache(self) -> Dict[Any, Any]:
-        if hasattr(self, "_cache"):
-            return getattr(self, "_cache")
-        else:
+    # Returns the cache dictionary of this object.
+    # By default, it is an unbounded dictionary. If a capacity is given, the cache is replaced by a BoundedCache
+    # (keeping the most recent entries that fit) and the later calls without arguments return the same bounded cache.
+    def cache(self, capacity: Optional[int] = None, policy: str = "lru") -> Dict[Any, Any]:
+        cache = getattr(self, "_cache", None)
+        if capacity is not None:
+            if not (isinstance(cache, BoundedCache) and cache.capacity == capacity and cache.policy == policy):
+                bounded = BoundedCache(capacity, policy)
+                for key, value in (cache or {}).items():
+                    bounded[key] = value
+                cache = bounded
+                setattr(self, "_cache", cache)
+        elif cache is None:
             cache = {}
             setattr(self, "_cache", cache)
-            return cache
+        return cache
 
 # Unused
 def _cache_function(self) -> Dict[Any, Any]:
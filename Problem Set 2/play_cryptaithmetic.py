@@ -1,5 +1,7 @@
 from cryptarithmetic import CryptArithmeticProblem
-from CSP_solver import solve
+from CSP_solver import solve, PROPAGATIONS
+from arc_consistency import ALGORITHMS, ArcConsistencyCounters
+import CSP_bitset
 import argparse, time
 
 # This function requests a solution from the user
@@ -51,13 +53,19 @@ def main(args: argparse.Namespace):
     if agent_name == "human":
         solve_fn = solve_via_human
     elif agent_name == "backtrack":
-        solve_fn = solve
+        counters = ArcConsistencyCounters()
+        solve_fn = lambda problem: solve(problem, args.propagation, args.algorithm, counters)
+    elif agent_name == "bitset":
+        solve_fn = CSP_bitset.solve
     else:
         print(f"Unknown Agent: {agent_name}. Please select a valid agent.")
         return
 
     result = solve_fn(problem)
 
+    if agent_name == "backtrack" and args.propagation != "forward_checking":
+        print(f"Arc Consistency ({args.algorithm}): {counters}")
+
     print("The Result:")
     if result is None:
         print("No solution was found")
@@ -79,8 +87,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play CryptArithmetic as Human or AI")
     parser.add_argument("puzzle", help="path to the puzzle to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'backtrack'],
+                        choices=['human', 'backtrack', 'bitset'],
                         help="the agent that will play the game")
+    parser.add_argument("--propagation", "-p", default="forward_checking",
+                        choices=PROPAGATIONS,
+                        help="the propagation used by the backtrack agent (arc consistency as preprocessing or maintained during the search)")
+    parser.add_argument("--algorithm", "-ac", default="ac3",
+                        choices=ALGORITHMS,
+                        help="the arc consistency algorithm")
     
     args = parser.parse_args()
     try:
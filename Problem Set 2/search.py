@@ -1,25 +1,47 @@
-from typing import Tuple
+from typing import Optional, Tuple
 from game import HeuristicFunction, Game, S, A
 from helpers.utils import NotImplemented
 
 #DONE: Import any modules you want to use
+from search_stats import SearchStatistics
 
 # All search functions take a problem, a state, a heuristic function and the maximum search depth.
 # If the maximum search depth is -1, then there should be no depth cutoff (The expansion should not stop before reaching a terminal state) 
 
 # All the search functions should return the expected tree value and the best action to take based on the search results
 
+# Every search function also accepts an optional SearchStatistics object ("stats") which it fills while searching (see search_stats.py)
+# The peak frontier is the deepest path searched (the nodes on the recursion stack) and the cutoffs are the alpha-beta prunings
+
+# Starts filling the statistics (if requested) and returns the heuristic that the search should use (it is timed if the statistics are requested)
+def _start_stats(stats: Optional[SearchStatistics], algorithm: str, heuristic: HeuristicFunction) -> HeuristicFunction:
+    if stats is None:
+        return heuristic
+    stats.start(algorithm)
+    return stats.timed(heuristic)
+
+# Finishes filling the statistics (if requested) and returns the search result
+def _finish_stats(stats: Optional[SearchStatistics], result: Tuple[float, A]) -> Tuple[float, A]:
+    if stats is not None:
+        stats.finish(None)
+    return result
+
 # This is a simple search function that looks 1-step ahead and returns the action that lead to highest heuristic value.
 # This algorithm is bad if the heuristic function is weak. That is why we use minimax search to look ahead for many steps.
-def greedy(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1) -> Tuple[float, A]:
+def greedy(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1,
+           stats: Optional[SearchStatistics] = None) -> Tuple[float, A]:
+    heuristic = _start_stats(stats, "greedy", heuristic)
     agent = game.get_turn(state)
     
     terminal, values = game.is_terminal(state)
-    if terminal: return values[agent], None
+    if terminal: return _finish_stats(stats, (values[agent], None))
 
     actions_states = [(action, game.get_successor(state, action)) for action in game.get_actions(state)]
+    if stats is not None:
+        stats.expand(1, 0)
+        stats.generated += len(actions_states)
     value, _, action = max((heuristic(game, state, agent), -index, action) for index, (action , state) in enumerate(actions_states))
-    return value, action
+    return _finish_stats(stats, (value, action))
 
 # Apply Minimax search and return the game tree value and the best action
 # Hint: There may be more than one player, and in all the testcases, it is guaranteed that 
@@ -28,8 +50,12 @@ def greedy(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
 # and if it is > 0, it should be a min node. Also remember that game.is_terminal(s), returns the values
 # for all the agents. So to get the value for the player (which acts at the max nodes), you need to
 # get values[0].
-def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1) -> Tuple[float, A]:
+def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1,
+            stats: Optional[SearchStatistics] = None) -> Tuple[float, A]:
     #DONE: Complete this function
+    heuristic = _start_stats(stats, "minimax", heuristic)
+    # My-Comment: the depth of a node is root_depth - max_depth (this also works without a depth limit)
+    root_depth = max_depth
     # My-Comment: get the player
     player_agent = game.get_turn(state)
 
@@ -55,6 +81,9 @@ def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
         v, a = float('-inf'), None
         # My-Comment: get actions
         actions = game.get_actions(state)
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions)
         # My-Comment: loop over actions
         for action in actions:
             # My-Comment: get successor
@@ -72,6 +101,9 @@ def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
         v, a = float('inf'), None
         # My-Comment: get actions
         actions = game.get_actions(state)
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions)
         # My-Comment: loop over actions
         for action in actions:
             # My-Comment: get successor
@@ -83,13 +115,17 @@ def minimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth:
         return v, a
     
     # My-Comment: Call the recursive function with initial parameters
-    return current_turn(state, max_depth)
+    return _finish_stats(stats, current_turn(state, max_depth))
     # NotImplemented()
 
 # Apply Alpha Beta pruning and return the tree value and the best action
 # Hint: Read the hint for minimax.
-def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1) -> Tuple[float, A]:
+def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1,
+              stats: Optional[SearchStatistics] = None) -> Tuple[float, A]:
     #DONE: Complete this function
+    heuristic = _start_stats(stats, "alphabeta", heuristic)
+    # My-Comment: the depth of a node is root_depth - max_depth (this also works without a depth limit)
+    root_depth = max_depth
     # My-Comment: get the player
     player_agent = game.get_turn(state)
 
@@ -115,6 +151,9 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
         v, a = float('-inf'), None
         # My-Comment: get actions
         actions = game.get_actions(state)
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions)
         # My-Comment: for loop on actions to get successors
         for action in actions:
             # My-Comment: get successor
@@ -128,7 +167,10 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
             # My-Comment: return the maximum as no need for further search
             # My-Comment: as beta is the maximum value that minimizer make
             # My-Comment: The minimizing player already has a move that is as good as or better than what they would get from this branch.
-            if v >= beta: return v, a
+            if v >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                return v, a
             # My-Comment: update alpha with the max value
             # My-Comment: to make the alpha the best value that the maximizer can gurantee
             alpha = max(alpha, v)
@@ -141,6 +183,9 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
         v, a = float('inf'), None
         # My-Comment: get actions
         actions = game.get_actions(state)
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions)
         # My-Comment: for loop on actions to get successors
         for action in actions:
             # My-Comment: get successor
@@ -154,20 +199,27 @@ def alphabeta(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dept
             # My-Comment: return the minimum as no need for further search
             # My-Comment: as alpha is the minimum value that maximizer make
             # My-Comment: The maximizing player already has a move that is as good as or better than what they would get from this branch.
-            if v <= alpha: return v, a
+            if v <= alpha:
+                if stats is not None:
+                    stats.cutoffs += 1
+                return v, a
             # My-Comment: update beta with the min value
             # My-Comment: to make the beta the best value that the minimizer can gurantee
             beta = min(beta, v)
         return v, a
  
     # My-Comment: Call the recursive function with initial parameters
-    return current_turn(state, max_depth, float('-inf'), float('inf'))
+    return _finish_stats(stats, current_turn(state, max_depth, float('-inf'), float('inf')))
     # NotImplemented()
 
 # Apply Alpha Beta pruning with move ordering and return the tree value and the best action
 # Hint: Read the hint for minimax.
-def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1) -> Tuple[float, A]:
+def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1,
+                                 stats: Optional[SearchStatistics] = None) -> Tuple[float, A]:
     #DONE: Complete this function
+    heuristic = _start_stats(stats, "alphabeta_with_move_ordering", heuristic)
+    # My-Comment: the depth of a node is root_depth - max_depth (this also works without a depth limit)
+    root_depth = max_depth
     # My-Comment: get the player
     player_agent = game.get_turn(state)
 
@@ -193,6 +245,9 @@ def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: Heuristi
         v, a = float('-inf'), None
         # My-Comment: iterate over all possible actions and get action and successor
         actions_successor_states = [(action, game.get_successor(state, action)) for action in game.get_actions(state)]
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions_successor_states)
         # My-Comment: sort the actions based on the heuristic value value in descending
         actions_successor_states.sort(key=lambda x: heuristic(game, x[1], player_agent), reverse=True)
         # My-Comment: for loop on actions to get successors
@@ -206,7 +261,10 @@ def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: Heuristi
             # My-Comment: return the maximum as no need for further search
             # My-Comment: as beta is the maximum value that minimizer make
             # My-Comment: The minimizing player already has a move that is as good as or better than what they would get from this branch.
-            if v >= beta: return v, a
+            if v >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                return v, a
             # My-Comment: update alpha with the max value
             # My-Comment: to make the alpha the best value that the maximizer can gurantee
             alpha = max(alpha, v)
@@ -219,6 +277,9 @@ def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: Heuristi
         v, a = float('inf'), None
         # My-Comment: iterate over all possible actions and get action and successor
         actions_successor_states = [(action, game.get_successor(state, action)) for action in game.get_actions(state)]
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions_successor_states)
         # My-Comment: sort the actions based on the heuristic value value in ascending
         actions_successor_states.sort(key=lambda x: heuristic(game, x[1], player_agent))
         # My-Comment: for loop on actions to get successors
@@ -232,21 +293,28 @@ def alphabeta_with_move_ordering(game: Game[S, A], state: S, heuristic: Heuristi
             # My-Comment: return the minimum as no need for further search
             # My-Comment: as alpha is the minimum value that maximizer make
             # My-Comment: The maximizing player already has a move that is as good as or better than what they would get from this branch.
-            if v <= alpha: return v, a
+            if v <= alpha:
+                if stats is not None:
+                    stats.cutoffs += 1
+                return v, a
             # My-Comment: update beta with the min value
             # My-Comment: to make the beta the best value that the minimizer can gurantee
             beta = min(beta, v)
         return v, a
  
     # My-Comment: Call the recursive function with initial parameters
-    return current_turn(state, max_depth, float('-inf'), float('inf'))
+    return _finish_stats(stats, current_turn(state, max_depth, float('-inf'), float('inf')))
     # NotImplemented()
 
 # Apply Expectimax search and return the tree value and the best action
 # Hint: Read the hint for minimax, but note that the monsters (turn > 0) do not act as min nodes anymore,
 # they now act as chance nodes (they act randomly).
-def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1) -> Tuple[float, A]:
+def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_depth: int = -1,
+               stats: Optional[SearchStatistics] = None) -> Tuple[float, A]:
     #DONE: Complete this function
+    heuristic = _start_stats(stats, "expectimax", heuristic)
+    # My-Comment: the depth of a node is root_depth - max_depth (this also works without a depth limit)
+    root_depth = max_depth
     # My-Comment: get the player
     player_agent = game.get_turn(state)
 
@@ -272,6 +340,9 @@ def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dep
         v, a = float('-inf'), None
         # My-Comment: get actions
         actions = game.get_actions(state)
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions)
         # My-Comment: loop over actions
         for action in actions:
             # My-Comment: get successor
@@ -290,6 +361,9 @@ def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dep
         expected_value = 0
         # My-Comment: get actions
         actions = game.get_actions(state)
+        if stats is not None:
+            stats.expand(root_depth - max_depth + 1, 0)
+            stats.generated += len(actions)
         # My-Comment: for loop on actions to get successors
         for action in actions:
             # My-Comment: get successor
@@ -302,5 +376,5 @@ def expectimax(game: Game[S, A], state: S, heuristic: HeuristicFunction, max_dep
         return expected_value / len(actions), None
  
     # My-Comment: Call the recursive function with initial parameters
-    return current_turn(state, max_depth)
+    return _finish_stats(stats, current_turn(state, max_depth))
     # NotImplemented()
\ No newline at end of file
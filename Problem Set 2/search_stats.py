@@ -0,0 +1,106 @@
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import asdict, dataclass, field
+import json, time
+
+# These are the statistics of one search run. Every search function accepts an optional "stats" argument and fills it if it is given.
+# When it is not given, the searches only pay for a few "is None" checks.
+#   - expanded: the number of states whose actions were generated.
+#   - generated: the number of successors generated.
+#   - duplicates: the number of generated successors that were already seen (explored, in the frontier or on the current path).
+#   - reopened: the number of explored states that were searched again because a cheaper path to them was found.
+#   - cutoffs: the number of pruned successors or subtrees (the f threshold of IDA* or the alpha-beta cutoffs).
+#   - iterations: the number of iterations of the iterative searches (IDA* thresholds or ARA* weights).
+#   - peak_frontier / peak_closed: the largest sizes of the frontier (or the current path for depth-first searches) and the closed set.
+#   - heuristic_evaluations / heuristic_time: the number of heuristic calls and the total time spent in them (in seconds).
+#   - wall_time: the total time of the search (in seconds).
+#   - searches: the number of searches that filled these statistics.
+#   - solution_length: the number of actions in the solution (None if no solution was found).
+#   - labels: any information that identifies the run (e.g. the level and the heuristic). They are exported with the statistics.
+# The statistics are exported as JSON. "save" appends them as one line to a file (JSON lines) so the runs on different levels
+# (or different versions of the code) can be collected in one file and compared with "load".
+@dataclass
+class SearchStatistics:
+    algorithm: str = ""
+    expanded: int = 0
+    generated: int = 0
+    duplicates: int = 0
+    reopened: int = 0
+    cutoffs: int = 0
+    iterations: int = 0
+    peak_frontier: int = 0
+    peak_closed: int = 0
+    heuristic_evaluations: int = 0
+    heuristic_time: float = 0.0
+    wall_time: float = 0.0
+    searches: int = 0
+    solution_length: Optional[int] = None
+    labels: Dict[str, Any] = field(default_factory=dict)
+
+    # Marks the start of the search
+    # If the same statistics are filled by several searches (e.g. by an agent that replans at every step),
+    # the counters and the wall time add up over all of them, so the rates stay correct.
+    def start(self, algorithm: str) -> None:
+        self.algorithm = algorithm
+        self.searches += 1
+        self._start_generated = self.generated
+        self._start_time = time.perf_counter()
+
+    # Marks the end of the search and returns the solution (so it can be used in the return statements)
+    def finish(self, solution: Optional[List[Any]]) -> Optional[List[Any]]:
+        self.wall_time += time.perf_counter() - getattr(self, "_start_time", time.perf_counter())
+        self.solution_length = None if solution is None else len(solution)
+        return solution
+
+    # Counts the duplicates of the current search given the number of distinct states it reached
+    # (every successor generated since "start" that did not reach a new state was a duplicate)
+    def count_duplicates(self, seen: int) -> None:
+        self.duplicates += self.generated - getattr(self, "_start_generated", 0) - (seen - 1)
+
+    # Counts an expansion and updates the peak sizes
+    def expand(self, frontier_size: int, closed_size: int) -> None:
+        self.expanded += 1
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if closed_size > self.peak_closed:
+            self.peak_closed = closed_size
+
+    # Returns a version of the heuristic that counts its calls and the time spent in it
+    def timed(self, heuristic: Callable[..., float]) -> Callable[..., float]:
+        clock = time.perf_counter
+        def timed_heuristic(*args) -> float:
+            start = clock()
+            value = heuristic(*args)
+            self.heuristic_time += clock() - start
+            self.heuristic_evaluations += 1
+            return value
+        return timed_heuristic
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.expanded / self.wall_time if self.wall_time > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["nodes_per_second"] = self.nodes_per_second
+        return data
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    # Appends the statistics as one JSON line to the file
+    def save(self, path: str) -> None:
+        with open(path, 'a') as f:
+            f.write(self.to_json() + "\n")
+
+    # Reads all the statistics saved in a file
+    @staticmethod
+    def load(path: str) -> List["SearchStatistics"]:
+        results = []
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                data.pop("nodes_per_second", None)
+                results.append(SearchStatistics(**data))
+        return results
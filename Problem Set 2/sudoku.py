@@ -1,5 +1,5 @@
 from typing import Dict
-from CSP import Assignment, Problem, UnaryConstraint, BinaryConstraint
+from CSP import Assignment, Problem, UnaryConstraint, AllDifferentConstraint
 
 # A class for the sudoku problem which inherits from the generic CSP problem class
 class SudokuProblem(Problem):
@@ -20,7 +20,6 @@ class SudokuProblem(Problem):
     # Read a sudoku puzzle from a string
     @staticmethod
     def from_text(text: str) -> 'SudokuProblem':
-        not_equal_condition = lambda a, b: a != b
         unary_not_equal_condition = lambda f: (lambda v: v != f)
         
         lines = [line.strip() for line in text.splitlines()]
@@ -67,9 +66,11 @@ class SudokuProblem(Problem):
 
         for pair in var_fixed_pairs:
             for var_list, fixed_list in zip(*pair):
-                for index, variable in enumerate(var_list):
+                for variable in var_list:
                    constraints.extend(UnaryConstraint(variable, unary_not_equal_condition(fixed)) for fixed in fixed_list)
-                   constraints.extend(BinaryConstraint((variable, other), not_equal_condition) for other in var_list[index+1:])
+                # Every row, column and square is a single all-different constraint (instead of a "not equal" constraint for every pair)
+                if len(var_list) > 1:
+                    constraints.append(AllDifferentConstraint(var_list))
         
         problem = SudokuProblem()
         problem.size = size
@@ -0,0 +1,26 @@
+import os, sys
+
+# The modules of the problem set are imported by their top-level names (like the autograder does),
+# so the problem set directory is added to the path. Run the tests from the problem set directory: python -m pytest tests
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import glob
+from cryptarithmetic import CryptArithmeticProblem
+from sudoku import SudokuProblem
+from helpers.utils import fetch_tracked_call_count
+
+# The bundled puzzles as (problem class, path) pairs and their test ids (the tests import these helpers with "from conftest import ...")
+CASES = [
+    (cls, path)
+    for cls, pattern in [(SudokuProblem, "sudoku/*.txt"), (CryptArithmeticProblem, "puzzles/*.txt")]
+    for path in sorted(glob.glob(os.path.join(ROOT, pattern)))
+]
+IDS = [os.path.basename(path) for _, path in CASES]
+
+# Solves the puzzle with the given solve function and returns the solution and the number of explored nodes (is_complete calls)
+def counted_solve(solve, cls, path):
+    fetch_tracked_call_count(cls.is_complete) # Clear the call counter
+    solution = solve(cls.from_file(path))
+    return solution, fetch_tracked_call_count(cls.is_complete)
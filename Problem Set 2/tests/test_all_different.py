@@ -0,0 +1,44 @@
+from itertools import product
+import glob, os, random
+import pytest
+
+from CSP import AllDifferentConstraint
+from conftest import ROOT
+from sudoku import SudokuProblem
+
+# The values that can not be in any solution of the constraint (found by enumerating all the assignments), or None if there is no solution
+def brute_force_prune(variables, domains):
+    solutions = [values for values in product(*[sorted(domains[variable]) for variable in variables]) if len(set(values)) == len(values)]
+    if not solutions:
+        return None
+    supported = {variable: {values[index] for values in solutions} for index, variable in enumerate(variables)}
+    return {variable: domains[variable] - supported[variable] for variable in variables if domains[variable] - supported[variable]}
+
+@pytest.mark.parametrize("seed", range(40))
+def test_prune_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        variables = [f"v{index}" for index in range(rng.randint(1, 5))]
+        values = list(range(rng.randint(1, 6)))
+        domains = {variable: set(rng.sample(values, rng.randint(1, len(values)))) for variable in variables}
+        expected = brute_force_prune(variables, domains)
+        assert AllDifferentConstraint(variables).prune({variable: set(domain) for variable, domain in domains.items()}) == expected
+
+def test_prune_ignores_missing_variables():
+    constraint = AllDifferentConstraint(["a", "b", "c"])
+    assert constraint.prune({"a": {1}, "b": {1, 2}}) == {"b": {1}}
+
+def test_is_satisfied():
+    constraint = AllDifferentConstraint(["a", "b", "c"])
+    assert constraint.is_satisfied({"a": 1, "b": 2, "c": 3})
+    assert not constraint.is_satisfied({"a": 1, "b": 2, "c": 1})
+    assert not constraint.is_satisfied({"a": 1, "b": 2})
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(ROOT, "sudoku", "*.txt"))), ids=os.path.basename)
+def test_sudoku_uses_one_constraint_per_group(path):
+    problem = SudokuProblem.from_file(path)
+    groups = [constraint for constraint in problem.constraints if isinstance(constraint, AllDifferentConstraint)]
+    # Every row, column and square is at most one constraint, and every variable is in at most 3 of them
+    assert len(groups) <= 3 * problem.size
+    assert all(len(constraint.variables) > 1 for constraint in groups)
+    assert all(sum(variable in constraint.variables for constraint in groups) <= 3 for variable in problem.variables)
@@ -0,0 +1,112 @@
+import random
+import pytest
+
+import CSP_solver
+from arc_consistency import ALGORITHMS, ArcConsistency, ArcConsistencyCounters
+from CSP import BinaryConstraint, Problem
+from conftest import CASES, IDS, counted_solve
+from sudoku import SudokuProblem
+
+def less_than(a, b):
+    return a < b
+
+def not_equal(a, b):
+    return a != b
+
+def make_problem(domains, constraints) -> Problem:
+    problem = Problem()
+    problem.variables = list(domains)
+    problem.domains = {variable: set(domain) for variable, domain in domains.items()}
+    problem.constraints = constraints
+    return problem
+
+# Returns True if every value of every variable has a support in the domain of every neighbor
+def is_arc_consistent(problem: Problem, domains) -> bool:
+    for constraint in problem.constraints:
+        (x, y), condition = constraint.variables, constraint.condition
+        if any(not any(condition(a, b) for b in domains[y]) for a in domains[x]): return False
+        if any(not any(condition(a, b) for a in domains[x]) for b in domains[y]): return False
+    return True
+
+# The largest arc consistent domains, found by removing one unsupported value at a time until none is left
+def naive_arc_consistency(problem: Problem):
+    domains = {variable: set(domain) for variable, domain in problem.domains.items()}
+    changed = True
+    while changed:
+        changed = False
+        for constraint in problem.constraints:
+            (x, y), condition = constraint.variables, constraint.condition
+            for a in list(domains[x]):
+                if not any(condition(a, b) for b in domains[y]):
+                    domains[x].discard(a)
+                    changed = True
+            for b in list(domains[y]):
+                if not any(condition(a, b) for a in domains[x]):
+                    domains[y].discard(b)
+                    changed = True
+    return domains
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_chain_of_less_than(algorithm):
+    problem = make_problem(
+        {"x": {1, 2, 3}, "y": {1, 2, 3}, "z": {1, 2, 3}},
+        [BinaryConstraint(("x", "y"), less_than), BinaryConstraint(("y", "z"), less_than)]
+    )
+    domains = {variable: set(domain) for variable, domain in problem.domains.items()}
+    counters = ArcConsistencyCounters()
+    assert ArcConsistency(problem, algorithm, counters).make_arc_consistent(domains)
+    assert domains == {"x": {1}, "y": {2}, "z": {3}}
+    assert counters.pruned == 6
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_wipeout(algorithm):
+    problem = make_problem(
+        {"x": {1, 2}, "y": {1, 2}, "z": {1, 2}},
+        [BinaryConstraint(("x", "y"), not_equal), BinaryConstraint(("y", "z"), not_equal), BinaryConstraint(("x", "z"), not_equal),
+         BinaryConstraint(("x", "y"), less_than), BinaryConstraint(("y", "z"), less_than)]
+    )
+    domains = {variable: set(domain) for variable, domain in problem.domains.items()}
+    counters = ArcConsistencyCounters()
+    assert not ArcConsistency(problem, algorithm, counters).make_arc_consistent(domains)
+    assert counters.wipeouts == 1
+
+# On random binary CSPs, the propagation must reach the same domains as the naive fixed point
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_naive_arc_consistency(algorithm, seed):
+    rng = random.Random(seed)
+    variables = [f"v{index}" for index in range(rng.randint(2, 6))]
+    conditions = [less_than, not_equal, lambda a, b: (a + b) % 3 != 0, lambda a, b: abs(a - b) > 1]
+    constraints = [BinaryConstraint(tuple(rng.sample(variables, 2)), rng.choice(conditions)) for _ in range(rng.randint(1, 8))]
+    problem = make_problem({variable: set(rng.sample(range(6), rng.randint(1, 6))) for variable in variables}, constraints)
+    expected = naive_arc_consistency(problem)
+    domains = {variable: set(domain) for variable, domain in problem.domains.items()}
+    consistent = ArcConsistency(problem, algorithm).make_arc_consistent(domains)
+    if all(expected.values()):
+        assert consistent
+        assert domains == expected
+        assert is_arc_consistent(problem, domains)
+    else:
+        assert not consistent
+
+# AC-2001 only skips the checks of the values whose residue is still supported, so it removes the same values
+# as AC-3 in the same order and the search explores the same tree.
+@pytest.mark.parametrize("propagation", ["preprocess", "mac"])
+@pytest.mark.parametrize("cls, path", CASES, ids=IDS)
+def test_ac2001_explores_the_same_tree_as_ac3(cls, path, propagation):
+    counters, counters2001 = ArcConsistencyCounters(), ArcConsistencyCounters()
+    solution, explored = counted_solve(lambda problem: CSP_solver.solve(problem, propagation, "ac3", counters), cls, path)
+    solution2001, explored2001 = counted_solve(lambda problem: CSP_solver.solve(problem, propagation, "ac2001", counters2001), cls, path)
+    assert solution2001 == solution
+    assert explored2001 == explored
+    assert (counters2001.revisions, counters2001.pruned, counters2001.wipeouts) == (counters.revisions, counters.pruned, counters.wipeouts)
+    assert counters2001.checks <= counters.checks
+    assert counters.residue_hits == 0
+    expected = CSP_solver.solve(cls.from_file(path))
+    assert (solution is None) == (expected is None)
+    if solution is not None:
+        assert cls.from_file(path).satisfies_constraints(solution)
+
+def test_unknown_algorithm():
+    with pytest.raises(Exception):
+        CSP_solver.solve(SudokuProblem.from_file(CASES[0][1]), "mac", "ac4")
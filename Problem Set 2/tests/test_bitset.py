@@ -0,0 +1,32 @@
+import pytest
+
+import CSP_bitset
+import CSP_solver
+from conftest import CASES, IDS, counted_solve
+from sudoku import SudokuProblem
+
+# The bitset solver picks the same variables and values in the same order, so it explores the same nodes
+@pytest.mark.parametrize("cls, path", CASES, ids=IDS)
+def test_bitset_explores_the_same_nodes(cls, path):
+    solution, explored = counted_solve(CSP_bitset.solve, cls, path)
+    expected, expected_explored = counted_solve(CSP_solver.solve, cls, path)
+    assert solution == expected
+    assert explored == expected_explored
+
+@pytest.mark.parametrize("cls, path", CASES, ids=IDS)
+def test_encode_decode_roundtrip(cls, path):
+    problem = cls.from_file(path)
+    bitset = CSP_bitset.BitsetProblem(problem)
+    domains = {variable: set(domain) for variable, domain in problem.domains.items()}
+    del domains[problem.variables[0]]
+    encoded = bitset.encode_domains(domains)
+    assert encoded[0] is None
+    assert bitset.decode_domains(encoded) == domains
+    assignment = {variable: min(problem.domains[variable]) for variable in problem.variables[::2]}
+    assert bitset.decode_assignment(bitset.encode_assignment(assignment)) == assignment
+
+def test_unknown_value():
+    problem = SudokuProblem.from_file(CASES[0][1])
+    bitset = CSP_bitset.BitsetProblem(problem)
+    with pytest.raises(Exception):
+        bitset.encode_assignment({problem.variables[0]: "not a value"})
@@ -0,0 +1,42 @@
+from CSP import AllDifferentConstraint, BinaryConstraint, Problem
+
+def not_equal(a, b):
+    return a != b
+
+def make_problem() -> Problem:
+    problem = Problem()
+    problem.variables = ["a", "b", "c"]
+    problem.domains = {variable: {1, 2, 3} for variable in problem.variables}
+    return problem
+
+def neighbors(problem: Problem, variable: str):
+    return sorted(other for other, _ in problem.neighbors_of(variable))
+
+def test_append_to_the_default_list_persists():
+    problem = make_problem()
+    problem.constraints.append(BinaryConstraint(("a", "b"), not_equal))
+    assert len(problem.constraints) == 1
+    assert neighbors(problem, "a") == ["b"]
+
+# The index is rebuilt when the list changes without changing its length
+def test_index_follows_in_place_changes():
+    problem = make_problem()
+    problem.constraints = [BinaryConstraint(("a", "b"), not_equal)]
+    assert neighbors(problem, "a") == ["b"]
+    problem.constraints[0] = BinaryConstraint(("a", "c"), not_equal)
+    assert neighbors(problem, "a") == ["c"]
+    assert neighbors(problem, "b") == []
+    problem.constraints.pop()
+    problem.constraints.append(BinaryConstraint(("b", "c"), not_equal))
+    assert neighbors(problem, "a") == []
+    assert neighbors(problem, "b") == ["c"]
+
+def test_index_follows_replaced_list():
+    problem = make_problem()
+    problem.constraints = [BinaryConstraint(("a", "b"), not_equal)]
+    assert neighbors(problem, "c") == []
+    constraint = AllDifferentConstraint(["a", "b", "c"])
+    problem.constraints = [constraint]
+    assert neighbors(problem, "a") == []
+    assert problem.all_different_of("c") == [constraint]
+    assert problem.constraints_of("b") == [constraint]
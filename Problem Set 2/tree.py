@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from game import Game
 import json
 
-from helpers.utils import record_calls
+from helpers.instrumentation import record_calls
 
 # Some helper constants and functions to draw the tree node
 BRANCH_DOWN = "\u252c\u2500"